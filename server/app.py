@@ -1,21 +1,40 @@
 import logging
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS, cross_origin
 from utils.limit import calculate_limit
 
 import sys
 sys.dont_write_bytecode = True
 
+from core.binance import ExchangeError
 from core.exchange import fetch_ohlcv
-from core.signals import generate_signals
+from core.signals import AnalysisError, confluence_weights, generate_signals
 from core.shapes import generate_shapes
-from core.analysis import generate_analysis
+from core.analysis import generate_analysis_cached
+from core.batch import analysis_from_settings, combinations_from_config, load_settings, run_batch
+from core.stream import analysis_stream
 
 app = Flask(__name__)
 CORS(app, support_credentials=True)
 
 logging.basicConfig(level=logging.INFO)
 
+@app.errorhandler(ExchangeError)
+def handle_exchange_error(e):
+    logging.error(f"[exchange] {e}")
+    return jsonify({"error": str(e)}), 502
+
+@app.errorhandler(AnalysisError)
+def handle_analysis_error(e):
+    return jsonify({"error": str(e)}), 400
+
+def ndjson_response(items):
+    # Um objeto JSON por linha, serializado à medida que o gerador produz
+    return Response((app.json.dumps(item) + "\n" for item in items), mimetype="application/x-ndjson")
+
+def wants_stream(data):
+    return bool(data.get("stream")) or request.accept_mimetypes.best == "application/x-ndjson"
+
 @app.route('/')
 def index():
     return render_template("index.html")
@@ -30,13 +49,20 @@ def get_data():
     timerange = int(data.get("timerange", 1))
     analysis = data.get("analysis", {})
 
+    # Validado antes de buscar os candles (no modo streaming a resposta já teria começado)
+    confluence_weights(analysis)
+
     limit = calculate_limit(timeframe, timerange)
     candles = fetch_ohlcv(symbol, timeframe, limit)
 
-    shapes, buy, sell, buy_eval, sell_eval = generate_analysis(candles, analysis)
+    # Modo streaming: candles primeiro, enquanto os detectores ainda rodam (ver analysis_stream)
+    if wants_stream(data):
+        return ndjson_response(analysis_stream(symbol, timeframe, limit, candles, analysis))
+
+    shapes, buy, sell, buy_eval, sell_eval = generate_analysis_cached(symbol, timeframe, limit, candles, analysis)
 
     return jsonify({
-        "candles": candles,
+        "candles": candles.to_records(),
         "sell": sell,
         "buy": buy,
         "shapes": shapes,
@@ -46,5 +72,41 @@ def get_data():
         }
     })
 
+@app.route('/analysis/batch', methods=['POST'])
+def get_batch():
+    """
+    Analisa várias combinações símbolo x timeframe x timerange numa chamada.
+
+    Corpo: {"settings_id": id} para usar um perfil salvo em /settings, ou a
+    configuração inline {"currencies": [...], "timeframes": [...], "timeranges": [...]}
+    com "analysis" (mesmo formato de /analysis) ou os campos do perfil
+    ("indicators", "candle_patterns", "min_confluence"). Opcionais:
+    "include_candles" (padrão false) e "stream" (ou Accept: application/x-ndjson;
+    NDJSON, uma linha por combinação assim que fica pronta).
+    """
+    data = request.get_json()
+
+    settings_id = data.get("settings_id")
+    try:
+        config = load_settings(settings_id) if settings_id else data
+        analysis = data.get("analysis") or analysis_from_settings(config)
+        confluence_weights(analysis)
+        combinations = combinations_from_config(config)
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = run_batch(combinations, analysis, include_candles=bool(data.get("include_candles", False)))
+
+    if wants_stream(data):
+        return ndjson_response(results)
+
+    # Resposta única na ordem das combinações
+    by_combination = {(r["symbol"], r["timeframe"], r["timerange"]): r for r in results}
+    return jsonify({
+        "results": [by_combination[(c.symbol, c.timeframe, c.timerange)] for c in combinations]
+    })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
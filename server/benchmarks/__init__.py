@@ -0,0 +1,36 @@
+"""
+Benchmarks dos detectores contra as implementações anteriores (tests/legacy.py).
+
+Rodar a partir de server/, ex: python -m benchmarks.bench_candles
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def best_of(fn, repeat: int = 3) -> float:
+    """
+    Menor tempo (segundos) entre `repeat` execuções de `fn()`.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def parse_args(description: str, sizes, legacy_max: int):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(sizes), help="quantidades de candles")
+    parser.add_argument("--legacy-max", type=int, default=legacy_max,
+                        help="maior quantidade em que a implementação anterior também é medida")
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+def report(n: int, new: float, old: float = None):
+    if old is None:
+        print(f"{n:>9} candles  novo {new * 1e3:10.2f} ms  anterior {'-':>10}")
+    else:
+        print(f"{n:>9} candles  novo {new * 1e3:10.2f} ms  anterior {old * 1e3:10.2f} ms  {old / new:8.1f}x")
@@ -0,0 +1,39 @@
+import argparse
+import time
+
+from core import binance
+from core.backfill import backfill_klines
+from core.ratelimit import WeightLimiter
+from tests.fake_exchange import FakeExchange
+
+MINUTE_MS = 60_000
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill paginado contra a exchange local (tests/fake_exchange.py)")
+    parser.add_argument("--candles", type=int, default=50_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="latência simulada por requisição (s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    exchange = FakeExchange(latency=args.latency).start()
+    binance._client = binance.BinanceClient(base_url=exchange.url)
+
+    end_ms = exchange.now_ms
+    start_ms = end_ms // MINUTE_MS * MINUTE_MS - (args.candles - 1) * MINUTE_MS
+
+    try:
+        for workers in args.workers:
+            binance.weight_limiter = WeightLimiter()
+            exchange.calls.clear()
+
+            started = time.perf_counter()
+            candles = backfill_klines("BTCUSDT", "1m", start_ms, end_ms, max_workers=workers)
+            elapsed = time.perf_counter() - started
+
+            print(f"{workers:>3} workers  {len(exchange.calls):>4} páginas  {len(candles):>8} candles  "
+                  f"{elapsed * 1e3:9.1f} ms  {len(candles) / elapsed:12.0f} candles/s")
+    finally:
+        exchange.stop()
+
+if __name__ == "__main__":
+    main()
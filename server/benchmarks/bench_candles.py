@@ -0,0 +1,16 @@
+from benchmarks import best_of, parse_args, report
+from core.patterns import candles
+from tests import legacy
+from tests.data import random_ohlc
+
+def main():
+    args = parse_args("Padrões de candle: registro vetorizado x laço por candle", (10_000, 100_000, 1_000_000), 10_000)
+
+    for n in args.sizes:
+        df = random_ohlc(n, seed=0, tick=0.25)
+        new = best_of(lambda: candles.detect_candle_signals(df.copy()), args.repeat)
+        old = best_of(lambda: legacy.detect_candle_signals(df.copy()), 1) if n <= args.legacy_max else None
+        report(n, new, old)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from benchmarks import best_of, parse_args, report
+from tests import legacy
+from tests.data import random_ohlc
+from utils.perceptually_important import find_pips
+
+N_PIPS = (5, 20, 50)
+DIST_MEASURES = {1: "euclidiana", 2: "perpendicular", 3: "vertical"}
+
+def main():
+    args = parse_args("PIPs: heap por segmento x reescaneamento completo", (1_000, 10_000, 100_000), 10_000)
+
+    for n in args.sizes:
+        data = random_ohlc(n, seed=0)["close"].to_numpy()
+        for n_pips in N_PIPS:
+            for dist_measure, name in DIST_MEASURES.items():
+                print(f"pips={n_pips:<3} {name:<14}", end="")
+                new = best_of(lambda: find_pips(data, n_pips, dist_measure), args.repeat)
+                old = best_of(lambda: legacy.find_pips(data, n_pips, dist_measure), 1) if n <= args.legacy_max else None
+                report(n, new, old)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from benchmarks import best_of, parse_args, report
+from tests import legacy
+from tests.data import random_ohlc
+from utils.rolling_window import RollingExtremes, rw_extremes
+
+ORDER = 20
+
+def stream(data):
+    extremes = RollingExtremes(ORDER)
+    for price in data:
+        extremes.update(price)
+
+def main():
+    args = parse_args(f"Extremos por janela móvel (order={ORDER}): uma passada x rw_top/rw_bottom por candle",
+                      (10_000, 100_000, 1_000_000), 100_000)
+
+    for n in args.sizes:
+        data = random_ohlc(n, seed=0)["close"].to_numpy()
+        new = best_of(lambda: rw_extremes(data, ORDER), args.repeat)
+        old = best_of(lambda: legacy.rw_extremes(data, ORDER), 1) if n <= args.legacy_max else None
+        report(n, new, old)
+        print(f"{'':>17}RollingExtremes.update {best_of(lambda: stream(data), 1) * 1e3:10.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,39 @@
+import time
+
 from core.exchange import fetch_ohlcv
 from core.signals import generate_signals
 from core.shapes import generate_shapes
+from core.context import AnalysisContext
+from core.runner import run_detectors
+from core.cache import analysis_key, get_analysis_cache
+from utils.limit import timeframe_to_minutes
+
+def generate_analysis (candles, analysis, next_timestamp=None):
+  # DataFrame montado uma única vez sobre os arrays do CandleSeries
+  df = candles.frame()
+
+  # Formas e sinais compartilham os resultados dos detectores (cada um roda uma vez),
+  # e outras análises dos mesmos candles reaproveitam os que coincidirem
+  ctx = AnalysisContext(df, candles.fingerprint())
+
+  # Com ANALYSIS_WORKERS > 0 os detectores rodam em paralelo e preenchem o contexto
+  run_detectors(candles, analysis, ctx)
 
-def generate_analysis (candles, analysis):
-  shapes = generate_shapes(candles, analysis['shapes'])
-  buy, sell, buy_eval, sell_eval = generate_signals(candles, analysis)
+  shapes = generate_shapes(df, analysis['shapes'], ctx=ctx)
+  buy, sell, buy_eval, sell_eval = generate_signals(df, analysis, ctx=ctx, next_timestamp=next_timestamp)
 
   return shapes, buy, sell, buy_eval, sell_eval
+
+def generate_analysis_cached (symbol, timeframe, limit, candles, analysis, now=None):
+  # A análise usa só os candles fechados: o candle em aberto muda a cada sincronização,
+  # e o resultado fica em cache até o próximo fechar. O sinal do último candle
+  # fechado sai na abertura do candle em aberto, como antes.
+  now = time.time() if now is None else now
+  closed = candles.closed(timeframe_to_minutes(timeframe) * 60, now)
+  next_timestamp = int(candles.time[len(closed)]) if len(closed) < len(candles) else None
+
+  if not len(closed):
+    return generate_analysis(closed, analysis)
+
+  key = analysis_key(symbol, timeframe, limit, closed.last_timestamp(), closed.fingerprint(), analysis)
+  return get_analysis_cache().get_or_compute(key, lambda: generate_analysis(closed, analysis, next_timestamp))
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from settings import BACKFILL_WORKERS
+from core.binance import MAX_KLINES_PER_REQUEST, request_klines
+from core.series import CandleSeries
+from utils.limit import timeframe_to_minutes
+
+def split_pages(start_ms: int, end_ms: int, interval_ms: int, page_size: int):
+    """
+    Divide o intervalo [start_ms, end_ms] em páginas de até `page_size` candles.
+    """
+    span = interval_ms * page_size
+    return [(s, min(s + span - 1, end_ms)) for s in range(start_ms, end_ms + 1, span)]
+
+def backfill_klines(symbol: str, interval: str, start_ms: int, end_ms: int, max_workers: int = BACKFILL_WORKERS) -> CandleSeries:
+    """
+    Baixa todos os candles entre `start_ms` e `end_ms` (milissegundos, inclusivo).
+
+    O intervalo é dividido em páginas de startTime/endTime com no máximo
+    MAX_KLINES_PER_REQUEST candles, buscadas em paralelo (até `max_workers`
+    simultâneas) e limitadas pelo peso de requisições da Binance. O resultado
+    é ordenado por timestamp e sem duplicatas.
+    """
+    interval_ms = timeframe_to_minutes(interval) * 60 * 1000
+    pages = split_pages(start_ms, end_ms, interval_ms, MAX_KLINES_PER_REQUEST)
+
+    def fetch_page(page):
+        page_start, page_end = page
+        return request_klines(symbol, interval, MAX_KLINES_PER_REQUEST, start_time=page_start, end_time=page_end)
+
+    if len(pages) == 1 or max_workers <= 1:
+        results = [fetch_page(page) for page in pages]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pages))) as executor:
+            results = list(executor.map(fetch_page, pages))
+
+    return CandleSeries.merge(results)
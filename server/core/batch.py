@@ -0,0 +1,161 @@
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, NamedTuple
+
+from settings import BATCH_MAX_COMBINATIONS, BATCH_WORKERS
+from core.analysis import generate_analysis_cached
+from core.exchange_async import fetch_many_sync
+from utils.limit import calculate_limit
+
+INDICATORS = ('bb', 'ema', 'rsi', 'macd', 'stochastic')
+SHAPES = ('sr', 'flags', 'hs', 'fibonacci')
+
+class BatchError(ValueError):
+    """
+    Configuração de lote inválida (400).
+    """
+
+class Combination(NamedTuple):
+    symbol: str
+    timeframe: str
+    timerange: int
+    limit: int
+
+def analysis_from_settings(settings: Dict) -> Dict:
+    """
+    Converte um perfil de estratégia (tabela crypto_settings, ver /settings/create)
+    no dicionário `analysis` aceito por /analysis.
+
+    `indicators` ativa os indicadores, `candle_patterns` as formas (e 'candles'
+    os padrões de candle) e `min_confluence` é a confluência mínima de compra e venda.
+    """
+    indicators = set(settings.get('indicators') or [])
+    patterns = set(settings.get('candle_patterns') or [])
+    confluence = int(settings.get('min_confluence') or 1)
+
+    return {
+        "candles": 'candles' in patterns,
+        "confluence": {"buy": confluence, "sell": confluence},
+        "shapes": {name: name in patterns for name in SHAPES},
+        "indicators": {name: name in indicators for name in INDICATORS},
+    }
+
+def load_settings(settings_id: str) -> Dict:
+    """
+    Busca um perfil de estratégia no Supabase. Levanta `LookupError` se não existir.
+    """
+    # Importado aqui: só o modo com settings_id depende do cliente do Supabase
+    from app.db.supabase import supabase
+
+    response = supabase.table("crypto_settings").select("*").eq("id", settings_id).execute()
+    data = getattr(response, "data", None)
+    if not data:
+        raise LookupError(f"Configuração não encontrada: {settings_id}")
+    return data[0]
+
+# Nomes aceitos para cada lista da configuração: o corpo de /analysis/batch usa
+# 'timeframes'/'timeranges' e a tabela crypto_settings 'time_frames'/'time_ranges'
+CONFIG_FIELDS = {
+    'currencies': ('currencies',),
+    'timeframes': ('timeframes', 'time_frames'),
+    'timeranges': ('timeranges', 'time_ranges'),
+}
+
+def config_list(config: Dict, field: str) -> List:
+    """
+    Lista `field` da configuração (em qualquer um dos nomes de CONFIG_FIELDS).
+    Levanta `BatchError` se não for uma lista (ex: "1h" em vez de ["1h"]).
+    """
+    for name in CONFIG_FIELDS[field]:
+        value = config.get(name)
+        if value is None:
+            continue
+        if not isinstance(value, (list, tuple)):
+            raise BatchError(f"'{name}' deve ser uma lista")
+        return list(value)
+    return []
+
+def combinations_from_config(config: Dict) -> List[Combination]:
+    """
+    Combinações de uma configuração inline ou de um perfil salvo (ver `load_settings`).
+    """
+    return batch_combinations(*(config_list(config, field) for field in CONFIG_FIELDS))
+
+def batch_combinations(currencies: List[str], timeframes: List[str], timeranges: List) -> List[Combination]:
+    """
+    Todas as combinações símbolo x timeframe x timerange, sem repetições e na ordem recebida.
+    """
+    combinations = [
+        Combination(symbol, timeframe, int(timerange), calculate_limit(timeframe, int(timerange)))
+        for symbol, timeframe, timerange in itertools.product(
+            dict.fromkeys(currencies), dict.fromkeys(timeframes), dict.fromkeys(timeranges)
+        )
+    ]
+
+    if not combinations:
+        raise BatchError("Informe ao menos uma moeda, um timeframe e um timerange")
+    if len(combinations) > BATCH_MAX_COMBINATIONS:
+        raise BatchError(f"Máximo de {BATCH_MAX_COMBINATIONS} combinações por lote ({len(combinations)} pedidas)")
+    return combinations
+
+def run_batch(combinations: List[Combination], analysis: Dict, include_candles: bool = False, max_workers: int = BATCH_WORKERS) -> Iterator[Dict]:
+    """
+    Analisa todas as combinações e gera um resultado por combinação, na ordem em que ficam prontos.
+
+    Os candles de cada (símbolo, timeframe) são baixados uma única vez, com o
+    maior timerange pedido, todos concorrentemente (`fetch_many_sync`); os
+    timeranges menores usam os candles mais recentes da mesma série. As análises
+    rodam em até `max_workers` threads (com ANALYSIS_WORKERS > 0 os detectores
+    de cada uma vão para o pool de processos) e passam pelo cache de análises.
+
+    Falhas de uma combinação (ex: símbolo inexistente na Binance) aparecem no
+    campo "error" do seu resultado e não interrompem as demais.
+    """
+    series = {}
+    for combination in combinations:
+        key = (combination.symbol, combination.timeframe)
+        series[key] = max(series.get(key, 0), combination.limit)
+
+    fetched = fetch_many_sync([(symbol, timeframe, limit) for (symbol, timeframe), limit in series.items()], return_exceptions=True)
+    candles_by_series = dict(zip(series, fetched))
+
+    def analyze(combination: Combination) -> Dict:
+        result = {"symbol": combination.symbol, "timeframe": combination.timeframe, "timerange": combination.timerange}
+
+        candles = candles_by_series[(combination.symbol, combination.timeframe)]
+        if isinstance(candles, Exception):
+            result["error"] = str(candles)
+            return result
+
+        candles = candles.tail(combination.limit)
+        try:
+            shapes, buy, sell, buy_eval, sell_eval = generate_analysis_cached(
+                combination.symbol, combination.timeframe, combination.limit, candles, analysis
+            )
+        except Exception as e:
+            logging.exception(f"[LOTE] Falha na análise de {combination}")
+            result["error"] = str(e)
+            return result
+
+        if include_candles:
+            result["candles"] = candles.to_records()
+        result.update({
+            "sell": sell,
+            "buy": buy,
+            "shapes": shapes,
+            "evaluate": {
+                "buy": buy_eval,
+                "sell": sell_eval
+            }
+        })
+        return result
+
+    if max_workers <= 1 or len(combinations) == 1:
+        for combination in combinations:
+            yield analyze(combination)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(combinations))) as executor:
+        for future in as_completed([executor.submit(analyze, combination) for combination in combinations]):
+            yield future.result()
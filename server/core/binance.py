@@ -0,0 +1,189 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+from settings import (
+    BINANCE_API_URL,
+    EXCHANGE_BACKOFF_FACTOR,
+    EXCHANGE_CONNECT_TIMEOUT,
+    EXCHANGE_MAX_RETRIES,
+    EXCHANGE_POOL_SIZE,
+    EXCHANGE_READ_TIMEOUT,
+)
+from core.ratelimit import klines_weight, weight_limiter
+from core.series import CandleSeries
+
+MAX_KLINES_PER_REQUEST = 1000
+
+# Refeitos pelo adapter (GET é idempotente); 429/418 passam pelo `weight_limiter` (ver BinanceClient.get)
+RETRY_STATUS = (500, 502, 503, 504)
+RATE_LIMIT_STATUS = (418, 429)
+
+# Erros
+class ExchangeError(Exception):
+    """Erro genérico ao consultar a exchange."""
+
+class ExchangeTimeoutError(ExchangeError):
+    """A exchange não respondeu dentro do timeout."""
+
+class ExchangeConnectionError(ExchangeError):
+    """Não foi possível conectar à exchange."""
+
+class ExchangeResponseError(ExchangeError):
+    """A exchange respondeu com um status de erro."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+class ExchangeRateLimitError(ExchangeResponseError):
+    """Limite de requisições excedido (429) ou IP bloqueado (418)."""
+
+    def __init__(self, status: int, message: str, retry_after=None):
+        super().__init__(status, message)
+        self.retry_after = retry_after
+
+class ExchangeRetry(Retry):
+    """
+    Retry do adapter para falhas de conexão e 5xx, respeitando o Retry-After.
+
+    Só os status de RETRY_STATUS são refeitos aqui (o `Retry` padrão também
+    refaria 429 com Retry-After, sem passar pelo `weight_limiter`). Quando as
+    tentativas se esgotam, o status da última resposta fica em
+    `MaxRetryError.status` (ver `BinanceClient._send`).
+    """
+
+    RETRY_AFTER_STATUS_CODES = frozenset(RETRY_STATUS)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        try:
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+        except MaxRetryError as e:
+            e.status = response.status if response is not None else None
+            raise
+
+def retry_delay(attempt: int, backoff_factor: float, retry_after=None) -> float:
+    """
+    Espera antes da próxima tentativa: o Retry-After da resposta, se houver,
+    ou backoff exponencial.
+    """
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return backoff_factor * (2 ** attempt)
+
+# Cliente
+class BinanceClient:
+    """
+    Cliente HTTP compartilhado para a API REST da Binance.
+
+    Mantém uma única `requests.Session` com pool de conexões keep-alive e
+    aplica timeouts de conexão/leitura. Falhas de conexão e 5xx são refeitas
+    pelo adapter com backoff exponencial, ou pelo Retry-After quando vier. Em
+    429/418 o `weight_limiter` é pausado pelo Retry-After, e só o 429 é refeito
+    (por `get`, que passa de novo pelo limiter); 418 significa IP bloqueado e
+    não é refeito.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BINANCE_API_URL,
+        connect_timeout: float = EXCHANGE_CONNECT_TIMEOUT,
+        read_timeout: float = EXCHANGE_READ_TIMEOUT,
+        max_retries: int = EXCHANGE_MAX_RETRIES,
+        backoff_factor: float = EXCHANGE_BACKOFF_FACTOR,
+        pool_size: int = EXCHANGE_POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        retry = ExchangeRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _send(self, url: str, params):
+        try:
+            return self.session.get(url, params=params, timeout=self.timeout)
+        except requests.exceptions.Timeout as e:
+            raise ExchangeTimeoutError(str(e)) from e
+        except requests.exceptions.RetryError as e:
+            # Retries do adapter esgotados; o MaxRetryError traz o motivo e o status da última resposta
+            reason = e.args[0] if e.args else e
+            status = getattr(reason, 'status', None) or 502
+            raise ExchangeResponseError(status, str(getattr(reason, 'reason', reason))) from e
+        except requests.exceptions.ConnectionError as e:
+            raise ExchangeConnectionError(str(e)) from e
+        except requests.exceptions.RequestException as e:
+            raise ExchangeError(str(e)) from e
+
+    def get(self, path: str, params=None, weight: int = 1):
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            weight_limiter.acquire(weight)
+            response = self._send(url, params)
+
+            used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+            if used_weight is not None:
+                weight_limiter.sync(int(used_weight))
+
+            if response.status_code not in RATE_LIMIT_STATUS:
+                break
+
+            # Ninguém mais neste processo consulta a exchange até o Retry-After passar
+            retry_after = response.headers.get('Retry-After')
+            weight_limiter.pause(retry_delay(attempt, self.backoff_factor, retry_after))
+            if response.status_code == 418 or attempt == self.max_retries:
+                raise ExchangeRateLimitError(response.status_code, response.text, retry_after)
+
+        if response.status_code >= 400:
+            raise ExchangeResponseError(response.status_code, response.text)
+
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ExchangeError(f"Resposta inválida da exchange: {e}") from e
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> BinanceClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BinanceClient()
+    return _client
+
+# Klines
+def request_klines(symbol, interval, limit=100, start_time=None, end_time=None):
+    """
+    Faz uma única chamada ao endpoint de klines. `start_time`/`end_time` em milissegundos.
+    Retorna um `CandleSeries`.
+    """
+    params = {
+        'symbol': symbol,
+        'interval': interval,
+        'limit': limit
+    }
+    if start_time is not None:
+        params['startTime'] = int(start_time)
+    if end_time is not None:
+        params['endTime'] = int(end_time)
+
+    return CandleSeries.from_klines(get_client().get('/api/v3/klines', params, weight=klines_weight(limit)))
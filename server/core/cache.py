@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from settings import ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_SIZE, DETECTOR_CACHE_SIZE
+
+class AnalysisKey(NamedTuple):
+    symbol: str
+    timeframe: str
+    limit: int
+    last_timestamp: int   # abertura do último candle fechado (segundos)
+    fingerprint: str      # conteúdo dos candles fechados (ver `CandleSeries.fingerprint`)
+    analysis_hash: str
+
+def analysis_hash(analysis) -> str:
+    """
+    Hash canônico da configuração: a ordem das chaves não importa.
+    """
+    canonical = json.dumps(analysis, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def analysis_key(symbol: str, timeframe: str, limit: int, last_timestamp: int, fingerprint: str, analysis) -> AnalysisKey:
+    return AnalysisKey(symbol, timeframe, int(limit), int(last_timestamp), fingerprint, analysis_hash(analysis))
+
+class DiskCache:
+    """
+    Resultados serializados (pickle) em SQLite, compartilhados entre processos
+    e reinícios do servidor. Ao gravar um resultado, os anteriores da mesma
+    série (symbol, timeframe, limit) com candles mais antigos, ou com o mesmo
+    último candle mas outro conteúdo, são removidos.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            # Tabela de uma versão anterior, sem o fingerprint na chave: é só cache, recria
+            columns = [row[1] for row in conn.execute("pragma table_info(results)")]
+            if columns and 'fingerprint' not in columns:
+                conn.execute("drop table results")
+
+            conn.execute("""
+                create table if not exists results (
+                    symbol text not null,
+                    timeframe text not null,
+                    limit_ integer not null,
+                    last_timestamp integer not null,
+                    fingerprint text not null,
+                    analysis_hash text not null,
+                    value blob not null,
+                    primary key (symbol, timeframe, limit_, last_timestamp, fingerprint, analysis_hash)
+                ) without rowid
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: AnalysisKey) -> Optional[Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "select value from results where symbol = ? and timeframe = ? and limit_ = ? and last_timestamp = ? and fingerprint = ? and analysis_hash = ?",
+                tuple(key)
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def put(self, key: AnalysisKey, value: Any):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                "delete from results where symbol = ? and timeframe = ? and limit_ = ? and (last_timestamp < ? or (last_timestamp = ? and fingerprint != ?))",
+                (key.symbol, key.timeframe, key.limit, key.last_timestamp, key.last_timestamp, key.fingerprint)
+            )
+            conn.execute("insert or replace into results values (?, ?, ?, ?, ?, ?, ?)", (*key, blob))
+
+class LRUCache:
+    """
+    Dicionário em memória limitado a `maxsize` entradas, descartando as usadas
+    há mais tempo. Seguro entre threads; `maxsize` 0 desativa o cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+class AnalysisCache:
+    """
+    Cache dos resultados de `generate_analysis`.
+
+    LRU em memória limitado a `maxsize` entradas e, opcionalmente, um
+    `DiskCache`. A chave inclui o timestamp do último candle fechado e o
+    fingerprint dos candles fechados, então quando um novo candle fecha (ou um
+    candle já fechado é corrigido) a chave muda e o resultado antigo deixa de
+    ser usado. Os valores retornados são compartilhados e não devem ser alterados.
+
+    Chamadas simultâneas de `get_or_compute` com a mesma chave calculam uma vez
+    só: as demais esperam o resultado (ou a exceção) da primeira.
+    """
+
+    def __init__(self, maxsize: int = ANALYSIS_CACHE_SIZE, disk: DiskCache = None):
+        self.memory = LRUCache(maxsize)
+        self.disk = disk
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: AnalysisKey) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        return value
+
+    def put(self, key: AnalysisKey, value: Any):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def get_or_compute(self, key: AnalysisKey, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # O cálculo em andamento pode ter terminado desde o `get` acima, aqui ou em
+            # outro processo (pelo disco)
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def clear(self):
+        self.memory.clear()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_analysis_cache() -> AnalysisCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            disk = DiskCache(ANALYSIS_CACHE_PATH) if ANALYSIS_CACHE_PATH else None
+            _cache = AnalysisCache(ANALYSIS_CACHE_SIZE, disk)
+    return _cache
+
+_detector_cache = None
+
+def get_detector_cache() -> LRUCache:
+    """
+    Resultados de detectores compartilhados entre análises (ver `AnalysisContext`),
+    com chave (fingerprint dos candles, detector e parâmetros).
+    """
+    global _detector_cache
+    with _cache_lock:
+        if _detector_cache is None:
+            _detector_cache = LRUCache(DETECTOR_CACHE_SIZE)
+    return _detector_cache
@@ -0,0 +1,62 @@
+from typing import Any, Callable, Hashable
+
+import pandas as pd
+
+from core.cache import LRUCache, get_detector_cache
+
+class AnalysisContext:
+    """
+    Resultados de detectores compartilhados dentro de uma mesma análise.
+
+    Formas (gráfico) e sinais partem das mesmas buscas de padrões; com um
+    contexto, cada detector roda uma vez por requisição e os dois caminhos
+    derivam suas saídas do resultado em cache. As chaves identificam apenas o
+    detector e seus parâmetros, não os dados.
+
+    Com um `fingerprint` dos candles (ver `CandleSeries.fingerprint`), os
+    resultados também vão para um cache do processo com chave
+    (fingerprint, chave), reaproveitado por outras análises dos mesmos candles,
+    ex: configurações diferentes para o mesmo símbolo. Valores em cache são
+    compartilhados e não devem ser alterados.
+    """
+
+    def __init__(self, df: pd.DataFrame, fingerprint: str = None, shared: LRUCache = None):
+        self.df = df
+        self.fingerprint = fingerprint
+        self.shared = shared if shared is not None or fingerprint is None else get_detector_cache()
+        self._cache = {}
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Resultado em cache (do contexto ou do processo) ou None.
+        """
+        if key in self._cache:
+            return self._cache[key]
+
+        value = self.shared.get((self.fingerprint, key)) if self.shared is not None else None
+        if value is not None:
+            self._cache[key] = value
+        return value
+
+    def store(self, key: Hashable, value: Any):
+        self._cache[key] = value
+        if self.shared is not None:
+            self.shared.put((self.fingerprint, key), value)
+
+    def items(self):
+        return self._cache.items()
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.store(key, value)
+        return value
+
+def cached(ctx: AnalysisContext, key: Hashable, compute: Callable[[], Any]) -> Any:
+    """
+    Usa o cache do contexto quando houver um; sem contexto apenas calcula.
+    """
+    if ctx is None:
+        return compute()
+    return ctx.cached(key, compute)
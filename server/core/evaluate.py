@@ -1,39 +1,73 @@
-import pandas as pd
+import numpy as np
+
+from core.series import index_timestamps
+
+def nearest_indices(times: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Índice do valor mais próximo de cada alvo em `times` (ordenado), com o mesmo
+    critério de `Index.get_indexer(..., method='nearest')`: em empate, fica o da direita.
+    """
+    n = len(times)
+    left = np.searchsorted(times, targets, side='right') - 1  # último <= alvo
+    right = np.searchsorted(times, targets, side='left')      # primeiro >= alvo
+
+    left_c = np.clip(left, 0, n - 1)
+    right_c = np.clip(right, 0, n - 1)
+    left_dist = np.abs(times[left_c] - targets)
+    right_dist = np.abs(times[right_c] - targets)
+
+    use_left = (left >= 0) & ((left_dist < right_dist) | (right >= n))
+    return np.where(use_left, left_c, right_c)
 
 def evaluate_signals(df, signals, direction='buy', future_candles=10):
-    hits = 0
-    misses = 0
-    total = len(signals)
+    """
+    Avalia sinais comparando a abertura do candle do sinal com o fechamento
+    `future_candles` candles depois.
+
+    Todos os sinais são localizados de uma vez (searchsorted) e os preços lidos
+    por indexação de arrays. `future_candles` pode ser um inteiro ou uma lista
+    de horizontes; com uma lista, retorna {horizonte: resultado}.
+    """
+    if direction not in ('buy', 'sell'):
+        raise ValueError("Direction must be 'buy' or 'sell'")
 
-    for ts in signals:
-        entry_time = pd.to_datetime(ts, unit='s')
-        idx = df.index.get_indexer([entry_time], method='nearest')[0]
+    single = np.isscalar(future_candles)
+    horizons = [future_candles] if single else list(future_candles)
 
-        if idx + future_candles >= len(df):
-            # Evita erro de index
-            total -= 1
-            continue
+    n = len(df)
+    opens = df['open'].values
+    closes = df['close'].values
 
-        entry_open = df.iloc[idx]['open']
-        exit_close = df.iloc[idx + future_candles]['close']
+    # Sinais e índice comparados em segundos
+    signal_times = np.asarray(signals, dtype=np.int64)
+    if n:
+        index_times = index_timestamps(df.index)
+        idx = nearest_indices(index_times, signal_times)
+    else:
+        idx = np.zeros(len(signal_times), dtype=np.int64)
+
+    results = {}
+    for horizon in horizons:
+        # Evita erro de index
+        valid = idx + horizon < n
+        entry_open = opens[idx[valid]]
+        exit_close = closes[idx[valid] + horizon]
 
         if direction == 'buy':
             success = exit_close > entry_open
-        elif direction == 'sell':
-            success = exit_close < entry_open
         else:
-            raise ValueError("Direction must be 'buy' or 'sell'")
+            success = exit_close < entry_open
 
-        if success:
-            hits += 1
-        else:
-            misses += 1
+        total = int(valid.sum())
+        hits = int(success.sum())
+        misses = total - hits
+        assertiveness = (hits / total * 100) if total > 0 else 0
 
-    assertiveness = (hits / total * 100) if total > 0 else 0
+        results[horizon] = {
+            'total': total,
+            'hits': hits,
+            'misses': misses,
+            'assertiveness': round(assertiveness, 2)
+        }
 
-    return {
-        'total': total,
-        'hits': hits,
-        'misses': misses,
-        'assertiveness': round(assertiveness, 2)
-    }
+    return results[future_candles] if single else results
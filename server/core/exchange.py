@@ -1,28 +1,54 @@
-import requests
+import time
+
+from core.backfill import backfill_klines
+from core.store import get_store
+from utils.limit import candle_open, candles_between, shift_candles
+
+def sync_range(symbol, interval, limit=100, store=None):
+    """
+    Calcula o intervalo (start_ms, end_ms) que falta no armazenamento local.
+
+    O último candle armazenado é buscado de novo (ele pode ainda estar aberto).
+    Retorna a janela completa dos `limit` candles se o histórico local for
+    menor que `limit`, se estiver tão desatualizado que o delta seria maior que
+    a janela pedida, ou se houver buracos na janela (ex: uma janela menor
+    sincronizada depois de muito tempo parado deixa um intervalo sem candles
+    entre os dados antigos e os novos).
+    """
+    store = store or get_store()
+    _, last, count = store.bounds(symbol, interval)
+
+    # Aberturas alinhadas como na Binance (semanas na segunda, meses no dia 1)
+    now_ms = int(time.time() * 1000)
+    current_open = candle_open(interval, now_ms)
+    window_start = shift_candles(interval, current_open, -(limit - 1))
+
+    if last is None or count < limit or candles_between(interval, last * 1000, current_open) >= limit:
+        return window_start, now_ms
+
+    # Entre o início da janela e o último candle armazenado deve haver um candle por intervalo
+    expected = candles_between(interval, window_start, last * 1000) + 1
+    if store.count(symbol, interval, window_start // 1000, last) != expected:
+        return window_start, now_ms
+
+    return last * 1000, now_ms
+
+def sync_ohlcv(symbol, interval, limit=100, store=None):
+    """
+    Atualiza o armazenamento local buscando apenas os candles que ainda não estão nele.
+    Janelas maiores que o limite de uma chamada são paginadas por `backfill_klines`.
+    """
+    store = store or get_store()
+    start_ms, end_ms = sync_range(symbol, interval, limit, store)
+    store.upsert(symbol, interval, backfill_klines(symbol, interval, start_ms, end_ms))
 
 def fetch_ohlcv(symbol, interval, limit=100):
-    url = 'https://api.binance.com/api/v3/klines'
-    params = {
-        'symbol': symbol,
-        'interval': interval,
-        'limit': limit
-    }
-
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return [
-            {
-                "timestamp": int(k[0] // 1000),
-                "open": float(k[1]),
-                "high": float(k[2]),
-                "low": float(k[3]),
-                "close": float(k[4]),
-                "volume": float(k[5])
-            }
-            for k in data
-        ]
-    except Exception as e:
-        print(f"[fetch_ohlcv] Erro ao buscar dados da Binance: {e}")
-        return []
+    """
+    Retorna os `limit` candles mais recentes (`CandleSeries`), sincronizando antes
+    o armazenamento local.
+
+    Levanta `ExchangeError` (ou uma subclasse) se a Binance não puder ser consultada.
+    """
+    store = get_store()
+    sync_ohlcv(symbol, interval, limit, store)
+    return store.read(symbol, interval, limit)
@@ -0,0 +1,173 @@
+import asyncio
+import aiohttp
+from typing import Sequence, Tuple
+
+from settings import (
+    BINANCE_API_URL,
+    EXCHANGE_BACKOFF_FACTOR,
+    EXCHANGE_CONNECT_TIMEOUT,
+    EXCHANGE_MAX_RETRIES,
+    EXCHANGE_POOL_SIZE,
+    EXCHANGE_READ_TIMEOUT,
+)
+from core.backfill import split_pages
+from core.binance import (
+    MAX_KLINES_PER_REQUEST,
+    RATE_LIMIT_STATUS,
+    RETRY_STATUS,
+    ExchangeConnectionError,
+    ExchangeError,
+    ExchangeRateLimitError,
+    ExchangeResponseError,
+    ExchangeTimeoutError,
+    retry_delay,
+)
+from core.exchange import sync_range
+from core.ratelimit import klines_weight, weight_limiter
+from core.series import CandleSeries
+from core.store import get_store
+from utils.limit import timeframe_to_minutes
+
+class AsyncBinanceClient:
+    """
+    Versão asyncio do `BinanceClient`, sobre uma `aiohttp.ClientSession`.
+
+    Usa o mesmo `weight_limiter` global do cliente síncrono, os mesmos timeouts
+    e a mesma política de retry (backoff exponencial em falhas de conexão e 5xx;
+    em 429/418 o limiter é pausado pelo Retry-After e só o 429 é refeito).
+    O número de conexões simultâneas é limitado por `pool_size`.
+
+    Uso:
+        async with AsyncBinanceClient() as client:
+            klines = await client.klines("BTCUSDT", "1h", 500)
+    """
+
+    def __init__(
+        self,
+        base_url: str = BINANCE_API_URL,
+        connect_timeout: float = EXCHANGE_CONNECT_TIMEOUT,
+        read_timeout: float = EXCHANGE_READ_TIMEOUT,
+        max_retries: int = EXCHANGE_MAX_RETRIES,
+        backoff_factor: float = EXCHANGE_BACKOFF_FACTOR,
+        pool_size: int = EXCHANGE_POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.pool_size)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+
+    def _backoff(self, attempt: int) -> float:
+        return retry_delay(attempt, self.backoff_factor)
+
+    async def get(self, path: str, params=None, weight: int = 1):
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await weight_limiter.acquire_async(weight)
+
+            try:
+                async with self.session.get(url, params=params) as response:
+                    used_weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+                    if used_weight is not None:
+                        weight_limiter.sync(int(used_weight))
+
+                    if response.status in RETRY_STATUS and not last_attempt:
+                        await asyncio.sleep(retry_delay(attempt, self.backoff_factor, response.headers.get('Retry-After')))
+                        continue
+
+                    # A espera do Retry-After vale para todas as requisições (a próxima volta pelo limiter)
+                    if response.status in RATE_LIMIT_STATUS:
+                        retry_after = response.headers.get('Retry-After')
+                        weight_limiter.pause(retry_delay(attempt, self.backoff_factor, retry_after))
+                        if response.status == 418 or last_attempt:
+                            raise ExchangeRateLimitError(response.status, await response.text(), retry_after)
+                        continue
+                    if response.status >= 400:
+                        raise ExchangeResponseError(response.status, await response.text())
+
+                    try:
+                        return await response.json(content_type=None)
+                    except ValueError as e:
+                        raise ExchangeError(f"Resposta inválida da exchange: {e}") from e
+
+            except asyncio.TimeoutError as e:
+                if last_attempt:
+                    raise ExchangeTimeoutError(str(e)) from e
+            except aiohttp.ClientConnectionError as e:
+                if last_attempt:
+                    raise ExchangeConnectionError(str(e)) from e
+            except aiohttp.ClientError as e:
+                raise ExchangeError(str(e)) from e
+
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def klines(self, symbol, interval, limit=100, start_time=None, end_time=None):
+        params = {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit
+        }
+        if start_time is not None:
+            params['startTime'] = int(start_time)
+        if end_time is not None:
+            params['endTime'] = int(end_time)
+
+        return CandleSeries.from_klines(await self.get('/api/v3/klines', params, weight=klines_weight(limit)))
+
+async def fetch_ohlcv_async(symbol, interval, limit=100, client: AsyncBinanceClient = None) -> CandleSeries:
+    """
+    Versão asyncio de `fetch_ohlcv`: sincroniza o armazenamento local buscando
+    as páginas que faltam em paralelo e retorna os `limit` candles mais recentes.
+    """
+    if client is None:
+        async with AsyncBinanceClient() as client:
+            return await fetch_ohlcv_async(symbol, interval, limit, client)
+
+    store = get_store()
+    start_ms, end_ms = await asyncio.to_thread(sync_range, symbol, interval, limit, store)
+
+    interval_ms = timeframe_to_minutes(interval) * 60 * 1000
+    pages = await asyncio.gather(*(
+        client.klines(symbol, interval, MAX_KLINES_PER_REQUEST, start_time=page_start, end_time=page_end)
+        for page_start, page_end in split_pages(start_ms, end_ms, interval_ms, MAX_KLINES_PER_REQUEST)
+    ))
+
+    await asyncio.to_thread(store.upsert, symbol, interval, CandleSeries.merge(pages))
+    return await asyncio.to_thread(store.read, symbol, interval, limit)
+
+async def fetch_many(requests: Sequence[Tuple[str, str, int]], return_exceptions: bool = False, client: AsyncBinanceClient = None):
+    """
+    Baixa vários (symbol, timeframe, limit) concorrentemente.
+
+    Todas as requisições dividem o mesmo pool de conexões e o limitador de peso
+    global, então o tempo total é ditado pelo limite de peso da Binance e não
+    pela latência de cada chamada. Retorna um `CandleSeries` por item, na mesma
+    ordem de `requests`; com `return_exceptions=True`, falhas aparecem como a
+    exceção correspondente em vez de interromper as demais.
+    """
+    if client is None:
+        async with AsyncBinanceClient() as client:
+            return await fetch_many(requests, return_exceptions, client)
+
+    return await asyncio.gather(
+        *(fetch_ohlcv_async(symbol, interval, limit, client) for symbol, interval, limit in requests),
+        return_exceptions=return_exceptions
+    )
+
+def fetch_many_sync(requests: Sequence[Tuple[str, str, int]], return_exceptions: bool = False):
+    """
+    Atalho para chamar `fetch_many` a partir de código síncrono (ex: rotas Flask).
+    """
+    return asyncio.run(fetch_many(requests, return_exceptions))
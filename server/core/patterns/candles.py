@@ -1,126 +1,138 @@
-import pandas as pd
+import numpy as np
 
-# Engulfing
-def engulfing(df):
-    df['engulfing'] = 0
-    for i in range(1, len(df)):
-        prev, curr = df.iloc[i-1], df.iloc[i]
-        if (prev['close'] < prev['open'] and curr['open'] < curr['close'] and curr['open'] < prev['close'] and curr['close'] > prev['open']):
-            df.at[df.index[i], 'engulfing'] = 1  # Bullish
-        elif (prev['close'] > prev['open'] and curr['open'] > curr['close'] and curr['open'] > prev['close'] and curr['close'] < prev['open']):
-            df.at[df.index[i], 'engulfing'] = -1  # Bearish
+# Registro de padrões de candle.
+# Cada padrão é uma função (open, high, low, close) -> array int com
+# 1 (alta), -1 (baixa) ou 0 para cada candle, escrita com operações sobre
+# arrays inteiros. Para adicionar um padrão basta decorá-lo com @candle_pattern.
+CANDLE_PATTERNS = {}
+
+# Combinação dos padrões nos sinais finais: (padrão, valor que conta como sinal)
+BUY_PATTERNS = [('engulfing', 1), ('hammer', 1), ('morning_star', 1), ('harami', 1), ('inverted_hammer', 1)]
+SELL_PATTERNS = [('engulfing', 1), ('evening_star', 1), ('harami', 1)]
+
+def candle_pattern(name):
+    def register(fn):
+        CANDLE_PATTERNS[name] = fn
+        return fn
+    return register
+
+def shift(a, n=1):
+    """
+    Desloca o array `n` posições para frente, preenchendo o início com NaN
+    (equivalente a olhar `n` candles para trás).
+    """
+    out = np.empty_like(a, dtype=np.float64)
+    out[:n] = np.nan
+    out[n:] = a[:-n]
+    return out
+
+def apply_pattern(df, name):
+    fn = CANDLE_PATTERNS[name]
+    df[name] = fn(df['open'].values, df['high'].values, df['low'].values, df['close'].values)
     return df
 
+# Engulfing
+@candle_pattern('engulfing')
+def engulfing_pattern(o, h, l, c):
+    po, pc = shift(o), shift(c)
+    bullish = (pc < po) & (o < c) & (o < pc) & (c > po)
+    bearish = (pc > po) & (o > c) & (o > pc) & (c < po)
+    return np.select([bullish, bearish], [1, -1], 0)
+
 # Hammer
-def hammer(df):
-    df['hammer'] = 0
-    for i in range(len(df)):
-        c = df.iloc[i]
-        body = abs(c['close'] - c['open'])
-        lower_wick = min(c['open'], c['close']) - c['low']
-        upper_wick = c['high'] - max(c['open'], c['close'])
-        if lower_wick > 2 * body and upper_wick < body:
-            df.at[df.index[i], 'hammer'] = 1
-    return df
+@candle_pattern('hammer')
+def hammer_pattern(o, h, l, c):
+    body = np.abs(c - o)
+    lower_wick = np.minimum(o, c) - l
+    upper_wick = h - np.maximum(o, c)
+    return ((lower_wick > 2 * body) & (upper_wick < body)).astype(np.int64)
 
 # Doji
-def doji(df):
-    df['doji'] = 0
-    for i in range(len(df)):
-        c = df.iloc[i]
-        body = abs(c['close'] - c['open'])
-        total_range = c['high'] - c['low']
-        if total_range > 0 and body < 0.1 * total_range:
-            df.at[df.index[i], 'doji'] = 1
-    return df
+@candle_pattern('doji')
+def doji_pattern(o, h, l, c):
+    body = np.abs(c - o)
+    total_range = h - l
+    return ((total_range > 0) & (body < 0.1 * total_range)).astype(np.int64)
 
 # Morning Star
-def morning_star(df):
-    df['morning_star'] = 0
-    for i in range(2, len(df)):
-        c1, c2, c3 = df.iloc[i-2], df.iloc[i-1], df.iloc[i]
-        # Condição 1: Primeiro candle de baixa (corpo grande)
-        bearish_c1 = c1['close'] < c1['open'] and (c1['open'] - c1['close']) > (c1['high'] - c1['low']) * 0.6
-        # Condição 2: Segundo candle pequeno (doji ou corpo pequeno), idealmente gap down
-        small_body_c2 = abs(c2['close'] - c2['open']) < (c2['high'] - c2['low']) * 0.3
-        gap_down_c2 = c2['high'] < c1['close']
-        # Condição 3: Terceiro candle de alta (corpo grande) fechando acima do ponto médio do primeiro
-        bullish_c3 = c3['close'] > c3['open'] and (c3['close'] - c3['open']) > (c3['high'] - c3['low']) * 0.6
-        close_above_mid_c1 = c3['close'] > (c1['open'] + c1['close']) / 2
-
-        if bearish_c1 and small_body_c2 and gap_down_c2 and bullish_c3 and close_above_mid_c1:
-            df.at[df.index[i], 'morning_star'] = 1
-    return df
+@candle_pattern('morning_star')
+def morning_star_pattern(o, h, l, c):
+    o1, h1, l1, c1 = shift(o, 2), shift(h, 2), shift(l, 2), shift(c, 2)
+    o2, h2, l2, c2 = shift(o, 1), shift(h, 1), shift(l, 1), shift(c, 1)
+    # Condição 1: Primeiro candle de baixa (corpo grande)
+    bearish_c1 = (c1 < o1) & ((o1 - c1) > (h1 - l1) * 0.6)
+    # Condição 2: Segundo candle pequeno (doji ou corpo pequeno), idealmente gap down
+    small_body_c2 = np.abs(c2 - o2) < (h2 - l2) * 0.3
+    gap_down_c2 = h2 < c1
+    # Condição 3: Terceiro candle de alta (corpo grande) fechando acima do ponto médio do primeiro
+    bullish_c3 = (c > o) & ((c - o) > (h - l) * 0.6)
+    close_above_mid_c1 = c > (o1 + c1) / 2
+
+    return (bearish_c1 & small_body_c2 & gap_down_c2 & bullish_c3 & close_above_mid_c1).astype(np.int64)
 
 # Evening Star
-def evening_star(df):
-    df['evening_star'] = 0
-    for i in range(2, len(df)):
-        c1, c2, c3 = df.iloc[i-2], df.iloc[i-1], df.iloc[i]
-        # Condição 1: Primeiro candle de alta (corpo grande)
-        bullish_c1 = c1['close'] > c1['open'] and (c1['close'] - c1['open']) > (c1['high'] - c1['low']) * 0.6
-        # Condição 2: Segundo candle pequeno (doji ou corpo pequeno), idealmente gap up
-        small_body_c2 = abs(c2['close'] - c2['open']) < (c2['high'] - c2['low']) * 0.3
-        gap_up_c2 = c2['low'] > c1['close']
-        # Condição 3: Terceiro candle de baixa (corpo grande) fechando abaixo do ponto médio do primeiro
-        bearish_c3 = c3['close'] < c3['open'] and (c3['open'] - c3['close']) > (c3['high'] - c3['low']) * 0.6
-        close_below_mid_c1 = c3['close'] < (c1['open'] + c1['close']) / 2
-
-        if bullish_c1 and small_body_c2 and gap_up_c2 and bearish_c3 and close_below_mid_c1:
-            df.at[df.index[i], 'evening_star'] = -1
-    return df
+@candle_pattern('evening_star')
+def evening_star_pattern(o, h, l, c):
+    o1, h1, l1, c1 = shift(o, 2), shift(h, 2), shift(l, 2), shift(c, 2)
+    o2, h2, l2, c2 = shift(o, 1), shift(h, 1), shift(l, 1), shift(c, 1)
+    # Condição 1: Primeiro candle de alta (corpo grande)
+    bullish_c1 = (c1 > o1) & ((c1 - o1) > (h1 - l1) * 0.6)
+    # Condição 2: Segundo candle pequeno (doji ou corpo pequeno), idealmente gap up
+    small_body_c2 = np.abs(c2 - o2) < (h2 - l2) * 0.3
+    gap_up_c2 = l2 > c1
+    # Condição 3: Terceiro candle de baixa (corpo grande) fechando abaixo do ponto médio do primeiro
+    bearish_c3 = (c < o) & ((o - c) > (h - l) * 0.6)
+    close_below_mid_c1 = c < (o1 + c1) / 2
+
+    return -(bullish_c1 & small_body_c2 & gap_up_c2 & bearish_c3 & close_below_mid_c1).astype(np.int64)
 
 # Harami
-def harami(df):
-    df['harami'] = 0
-    for i in range(1, len(df)):
-        prev, curr = df.iloc[i-1], df.iloc[i]
-        # Bullish Harami: Grande candle de baixa seguido por pequeno candle de alta contido no corpo do anterior
-        if (prev['close'] < prev['open'] and  # Previous candle is bearish
-            curr['open'] < curr['close'] and  # Current candle is bullish
-            curr['low'] > prev['close'] and  # Current candle's low is above previous close (within body)
-            curr['high'] < prev['open'] and  # Current candle's high is below previous open (within body)
-            abs(prev['close'] - prev['open']) > 2 * abs(curr['close'] - curr['open'])): # Previous body is much larger
-            df.at[df.index[i], 'harami'] = 1  # Bullish Harami
-        # Bearish Harami: Grande candle de alta seguido por pequeno candle de baixa contido no corpo do anterior
-        elif (prev['close'] > prev['open'] and  # Previous candle is bullish
-              curr['open'] > curr['close'] and  # Current candle is bearish
-              curr['low'] > prev['open'] and  # Current candle's low is above previous open (within body)
-              curr['high'] < prev['close'] and  # Current candle's high is below previous close (within body)
-              abs(prev['close'] - prev['open']) > 2 * abs(curr['close'] - curr['open'])): # Previous body is much larger
-            df.at[df.index[i], 'harami'] = -1 # Bearish Harami
-    return df
+@candle_pattern('harami')
+def harami_pattern(o, h, l, c):
+    po, pc = shift(o), shift(c)
+    # Corpo anterior muito maior que o atual
+    large_prev_body = np.abs(pc - po) > 2 * np.abs(c - o)
+    # Bullish Harami: Grande candle de baixa seguido por pequeno candle de alta contido no corpo do anterior
+    bullish = (pc < po) & (o < c) & (l > pc) & (h < po) & large_prev_body
+    # Bearish Harami: Grande candle de alta seguido por pequeno candle de baixa contido no corpo do anterior
+    bearish = (pc > po) & (o > c) & (l > po) & (h < pc) & large_prev_body
+    return np.select([bullish, bearish], [1, -1], 0)
 
 # Inverted Hammer
+@candle_pattern('inverted_hammer')
+def inverted_hammer_pattern(o, h, l, c):
+    body = np.abs(c - o)
+    upper_wick = h - np.maximum(o, c)
+    lower_wick = np.minimum(o, c) - l
+    # Condições para Inverted Hammer: corpo pequeno, sombra superior longa, sombra inferior pequena/inexistente
+    return ((upper_wick > 2 * body) & (lower_wick < body) & (body > 0)).astype(np.int64)
+
+def engulfing(df):
+    return apply_pattern(df, 'engulfing')
+
+def hammer(df):
+    return apply_pattern(df, 'hammer')
+
+def doji(df):
+    return apply_pattern(df, 'doji')
+
+def morning_star(df):
+    return apply_pattern(df, 'morning_star')
+
+def evening_star(df):
+    return apply_pattern(df, 'evening_star')
+
+def harami(df):
+    return apply_pattern(df, 'harami')
+
 def inverted_hammer(df):
-    df['inverted_hammer'] = 0
-    for i in range(len(df)):
-        c = df.iloc[i]
-        body = abs(c['close'] - c['open'])
-        upper_wick = c['high'] - max(c['open'], c['close'])
-        lower_wick = min(c['open'], c['close']) - c['low']
-        # Condições para Inverted Hammer: corpo pequeno, sombra superior longa, sombra inferior pequena/inexistente
-        if upper_wick > 2 * body and lower_wick < body and body > 0:
-            df.at[df.index[i], 'inverted_hammer'] = 1
-    return df
+    return apply_pattern(df, 'inverted_hammer')
 
 # Detectar padrões
 def detect_candle_signals(df):
-    df = engulfing(df)
-    df = hammer(df)
-    df = doji(df)
-    df = morning_star(df)
-    df = evening_star(df)
-    df = harami(df)
-    df = inverted_hammer(df)
-
-    df['candles_buy'] = (df['engulfing'] == 1) | \
-                        (df['hammer'] == 1) | \
-                        (df['morning_star'] == 1) | \
-                        (df['harami'] == 1) | \
-                        (df['inverted_hammer'] == 1)
-
-    df['candles_sell'] = (df['engulfing'] == 1) | \
-                         (df['evening_star'] == 1) | \
-                         (df['harami'] == 1)
-    return df
\ No newline at end of file
+    for name in CANDLE_PATTERNS:
+        df = apply_pattern(df, name)
+
+    df['candles_buy'] = np.logical_or.reduce([df[name].values == value for name, value in BUY_PATTERNS])
+    df['candles_sell'] = np.logical_or.reduce([df[name].values == value for name, value in SELL_PATTERNS])
+    return df
@@ -1,6 +1,6 @@
 import pandas as pd
 
-def bollinger_bands(df, window=20, num_std=2):
+def bollinger_bands(df, window=20, num_std=2, keep_std=True):
     """
     Calcula as Bandas de Bollinger e detecta sinais de compra e venda
     baseados na interação do preço com as bandas.
@@ -9,69 +9,60 @@ def bollinger_bands(df, window=20, num_std=2):
         df (pd.DataFrame): DataFrame com colunas 'close', 'open', 'high', 'low'.
         window (int): Período para o cálculo da Média Móvel Simples (SMA).
         num_std (int): Número de desvios padrão para as bandas superior e inferior.
+        keep_std (bool): Se False, não grava a coluna intermediária 'BB_Std'.
 
     Retorna:
         pd.DataFrame: O DataFrame original com as colunas
                       'BB_Middle', 'BB_Upper', 'BB_Lower',
-                      'bb_buy', e 'bb_sell'.
+                      'bb_buy', e 'bb_sell' (e 'BB_Std' se keep_std).
     """
     # 1. Cálculo das Bandas de Bollinger
-    df['BB_Middle'] = df['close'].rolling(window=window, min_periods=1).mean()
-    df['BB_Std'] = df['close'].rolling(window=window, min_periods=1).std()
-    df['BB_Upper'] = df['BB_Middle'] + num_std * df['BB_Std']
-    df['BB_Lower'] = df['BB_Middle'] - num_std * df['BB_Std']
-
-    # 2. Inicialização das colunas de sinal
-    df['bb_buy'] = 0
-    df['bb_sell'] = 0
+    close = df['close']
+    middle = close.rolling(window=window, min_periods=1).mean()
+    std = close.rolling(window=window, min_periods=1).std()
+    upper = middle + num_std * std
+    lower = middle - num_std * std
+
+    df['BB_Middle'] = middle
+    if keep_std:
+        df['BB_Std'] = std
+    df['BB_Upper'] = upper
+    df['BB_Lower'] = lower
+
+    # 2. Valores do candle anterior
+    prev_close = close.shift(1)
+    prev_middle = middle.shift(1)
+    prev_upper = upper.shift(1)
+    prev_lower = lower.shift(1)
+
+    # Bandas precisam estar definidas (podem ser NaN no início do DataFrame);
+    # o primeiro candle não tem anterior para comparar
+    valid = upper.notna() & lower.notna()
+    valid.iloc[:1] = False
 
     # 3. Detecção dos Sinais de Bollinger Bands
-    # Iteramos a partir do segundo elemento para ter acesso ao candle anterior
-    for i in range(1, len(df)):
-        current_row = df.iloc[i]
-        prev_row = df.iloc[i-1]
-
-        # Garantir que os valores das bandas não são NaN (podem ser no início do DataFrame)
-        if pd.isna(current_row['BB_Upper']) or pd.isna(current_row['BB_Lower']):
-            continue
-
-        # --- Sinais de COMPRA (bb_buy) ---
-        # Priorizamos o preenchimento com 1 e não sobrescrevemos se já for 1
-
-        # 1. Preço toca ou cruza a banda inferior (Oversold)
-        # Se o fechamento atual está na ou abaixo da banda inferior
-        if current_row['close'] <= current_row['BB_Lower']:
-            df.at[df.index[i], 'bb_buy'] = 1
-
-        # 2. Reversão da Banda Inferior (Bollinger Bounce de COMPRA)
-        # Se o candle anterior estava fechando na ou abaixo da banda inferior,
-        # e o candle atual fecha acima dela, indicando uma possível reversão de alta.
-        elif prev_row['close'] <= prev_row['BB_Lower'] and current_row['close'] > current_row['BB_Lower']:
-            df.at[df.index[i], 'bb_buy'] = 1
-        
-        # 3. Fechamento acima da banda média (confirmação de força de alta)
-        # Se o preço veio de baixo da banda média e a cruza para cima
-        elif prev_row['close'] < prev_row['BB_Middle'] and current_row['close'] > current_row['BB_Middle']:
-            df.at[df.index[i], 'bb_buy'] = 1
-        
-        # --- Sinais de VENDA (bb_sell) ---
-        # Priorizamos o preenchimento com 1 e não sobrescrevemos se já for 1
-
-        # 1. Preço toca ou cruza a banda superior (Overbought)
-        # Se o fechamento atual está na ou acima da banda superior
-        if current_row['close'] >= current_row['BB_Upper']:
-            df.at[df.index[i], 'bb_sell'] = 1
-
-        # 2. Reversão da Banda Superior (Bollinger Bounce de VENDA)
-        # Se o candle anterior estava fechando na ou acima da banda superior,
-        # e o candle atual fecha abaixo dela, indicando uma possível reversão de baixa.
-        elif prev_row['close'] >= prev_row['BB_Upper'] and current_row['close'] < current_row['BB_Upper']:
-            df.at[df.index[i], 'bb_sell'] = 1
-
-        # 3. Fechamento abaixo da banda média (confirmação de força de baixa)
-        # Se o preço veio de cima da banda média e a cruza para baixo
-        elif prev_row['close'] > prev_row['BB_Middle'] and current_row['close'] < current_row['BB_Middle']:
-            df.at[df.index[i], 'bb_sell'] = 1
+    # Todas as regras marcam 1, então a precedência if/elif entre elas equivale a um OR
+
+    # --- Sinais de COMPRA (bb_buy) ---
+    # 1. Preço toca ou cruza a banda inferior (Oversold)
+    touch_lower = close <= lower
+    # 2. Reversão da Banda Inferior (Bollinger Bounce de COMPRA):
+    #    candle anterior na ou abaixo da banda inferior e o atual fecha acima dela
+    bounce_lower = (prev_close <= prev_lower) & (close > lower)
+    # 3. Fechamento acima da banda média (confirmação de força de alta)
+    cross_up_middle = (prev_close < prev_middle) & (close > middle)
+
+    # --- Sinais de VENDA (bb_sell) ---
+    # 1. Preço toca ou cruza a banda superior (Overbought)
+    touch_upper = close >= upper
+    # 2. Reversão da Banda Superior (Bollinger Bounce de VENDA):
+    #    candle anterior na ou acima da banda superior e o atual fecha abaixo dela
+    bounce_upper = (prev_close >= prev_upper) & (close < upper)
+    # 3. Fechamento abaixo da banda média (confirmação de força de baixa)
+    cross_down_middle = (prev_close > prev_middle) & (close < middle)
+
+    df['bb_buy'] = (valid & (touch_lower | bounce_lower | cross_up_middle)).astype(int)
+    df['bb_sell'] = (valid & (touch_upper | bounce_upper | cross_down_middle)).astype(int)
 
     return df
 
@@ -1,94 +1,137 @@
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Sequence, Union
+
+from core.series import index_timestamps
 
 FIB_LEVELS = [0.0, 0.236, 0.382, 0.5, 0.618, 0.786, 1.0]
 ACTIVE_LEVELS = [0.382, 0.5]
 
-def generate_fibonacci_signals(df: pd.DataFrame, lookback_period: int = 100) -> pd.DataFrame:
+def fibonacci_prices(high: np.ndarray, low: np.ndarray, lookback_period: int = 100) -> np.ndarray:
+    """
+    Preços dos níveis de Fibonacci para todos os candles, num array (candles x FIB_LEVELS).
+
+    O range de cada candle vai da mínima à máxima dos últimos `lookback_period`
+    candles; candles sem janela completa ficam com NaN.
+    """
+    high_max = pd.Series(high, dtype=np.float64).rolling(window=lookback_period).max().values
+    low_min = pd.Series(low, dtype=np.float64).rolling(window=lookback_period).min().values
+    diff = high_max - low_min
+    return low_min[:, None] + np.asarray(FIB_LEVELS)[None, :] * diff[:, None]
+
+def _touch_signals(low: np.ndarray, high: np.ndarray, support: np.ndarray, resistance: np.ndarray, valid: np.ndarray):
+    """
+    Máquina de estados de um nível ativo, sem laço.
+
+    O nível é armado (compra) quando a mínima toca o suporte e desarmado
+    (venda) quando a máxima toca o nível acima; no mesmo candle a compra é
+    avaliada antes da venda. Logo o estado após cada candle é: desarmado se
+    tocou a resistência, armado se tocou o suporte, senão o anterior — um
+    forward fill do último evento.
+    """
+    arm = valid & (low <= support)
+    disarm = valid & (high >= resistance) if resistance is not None else np.zeros_like(arm)
+
+    event = np.where(disarm, 0.0, np.where(arm, 1.0, np.nan))
+    armed_after = pd.Series(event).ffill().fillna(0.0).values.astype(bool)
+    armed_before = np.zeros_like(armed_after)
+    armed_before[1:] = armed_after[:-1]
+
+    buy = arm & ~armed_before
+    sell = disarm & (armed_before | arm)
+    return buy, sell
+
+def generate_fibonacci_signals(
+    df: pd.DataFrame,
+    lookback_period: Union[int, Sequence[int]] = 100,
+    active_levels: Sequence[float] = None
+) -> pd.DataFrame:
     """
-    Marca sinais de compra/venda nos níveis de Fibonacci 0.5 e 0.618.
+    Marca sinais de compra/venda nos níveis de Fibonacci ativos.
 
     Args:
         df (pd.DataFrame): DataFrame OHLC com índice datetime
-        lookback_period (int): Número de candles usados para o cálculo do range Fibonacci
+        lookback_period (int | list[int]): Número de candles usados para o cálculo do range
+            Fibonacci. Com uma lista, todos os ranges são avaliados na mesma chamada, cada um
+            em 'fibonacci_buy_<lookback>'/'fibonacci_sell_<lookback>', e as colunas
+            'fibonacci_buy'/'fibonacci_sell' indicam sinal em qualquer um deles.
+        active_levels (list[float]): Níveis de FIB_LEVELS que geram sinais (padrão: ACTIVE_LEVELS)
 
     Returns:
         pd.DataFrame: DataFrame com colunas 'fibonacci_buy' e 'fibonacci_sell'
     """
-    df = df.copy()
-    df['fibonacci_buy'] = False
-    df['fibonacci_sell'] = False
+    single = np.isscalar(lookback_period)
+    lookbacks = [lookback_period] if single else list(lookback_period)
+    active_levels = ACTIVE_LEVELS if active_levels is None else active_levels
+    level_indices = [FIB_LEVELS.index(lvl) for lvl in active_levels]
 
-    df['high_max'] = df['high'].rolling(window=lookback_period).max()
-    df['low_min'] = df['low'].rolling(window=lookback_period).min()
+    low = df['low'].values
+    high = df['high'].values
+    n = len(df)
 
-    level_indices = [FIB_LEVELS.index(lvl) for lvl in ACTIVE_LEVELS]
-    order_array = [False] * len(FIB_LEVELS)
+    columns = {}
+    any_buy = np.zeros(n, dtype=bool)
+    any_sell = np.zeros(n, dtype=bool)
 
-    for i in range(lookback_period, len(df)):
-        high = df['high_max'].iloc[i]
-        low = df['low_min'].iloc[i]
-
-        if pd.isna(high) or pd.isna(low):
-            continue
-
-        diff = high - low
-        fib_prices = [low + level * diff for level in FIB_LEVELS]
-
-        current_low = df['low'].iloc[i]
-        current_high = df['high'].iloc[i]
+    for lookback in lookbacks:
+        fib_prices = fibonacci_prices(high, low, lookback)
+        valid = ~np.isnan(fib_prices[:, 0]) & (np.arange(n) >= lookback)
 
+        buy = np.zeros(n, dtype=bool)
+        sell = np.zeros(n, dtype=bool)
         for j in level_indices:
-            # Sinal de compra: preço atual tocando o nível ativo (suporte)
-            if current_low <= fib_prices[j] and not order_array[j]:
-                df.at[df.index[i], 'fibonacci_buy'] = True
-                order_array[j] = True
-
-            # Sinal de venda: preço atual tocando nível acima (resistência)
-            if j < len(FIB_LEVELS) - 1:
-                if current_high >= fib_prices[j + 1] and order_array[j]:
-                    df.at[df.index[i], 'fibonacci_sell'] = True
-                    order_array[j] = False
-
-    return df
-
-def calculate_fibonacci_lines(df: pd.DataFrame, lookback_period: int = 100) -> Dict[float, List[Dict[str, Any]]]:
+            # Compra: preço tocando o nível ativo (suporte) | Venda: preço tocando o nível acima (resistência)
+            resistance = fib_prices[:, j + 1] if j < len(FIB_LEVELS) - 1 else None
+            level_buy, level_sell = _touch_signals(low, high, fib_prices[:, j], resistance, valid)
+            buy |= level_buy
+            sell |= level_sell
+
+        if not single:
+            columns[f'fibonacci_buy_{lookback}'] = buy
+            columns[f'fibonacci_sell_{lookback}'] = sell
+        any_buy |= buy
+        any_sell |= sell
+
+    columns['fibonacci_buy'] = any_buy
+    columns['fibonacci_sell'] = any_sell
+    return df.assign(**columns)
+
+def calculate_fibonacci_lines(df: pd.DataFrame, lookback_period: int = 100, compact: bool = True) -> Dict[float, Any]:
     """
     Recebe um DataFrame com candles (com índice datetime ou timestamp em segundos)
-    e retorna um dicionário onde a chave é o nível Fibonacci e o valor é a lista
-    de pontos para plotar a linha horizontal no lightweight-charts via addLineSeries.
+    e retorna um dicionário onde a chave é o nível Fibonacci e o valor é a linha
+    horizontal daquele nível, calculada sobre o range dos últimos `lookback_period` candles.
 
     Args:
         df (pd.DataFrame): DataFrame com colunas 'high', 'low' e índice datetime ou int timestamp
         lookback_period (int): número de candles para calcular o range
-        fib_levels (List[float]): níveis Fibonacci desejados
+        compact (bool): formato da linha (ver abaixo)
 
     Returns:
-        Dict[float, List[Dict]]: dicionário {nivel: [{time, value}, ...], ...}
+        compact=True: {nivel: {"start": time, "end": time, "price": preço}, ...}
+            Início e fim da linha no eixo x e o preço constante.
+        compact=False: {nivel: [{time, value}, ...], ...}
+            Formato antigo, um ponto por candle, para o lightweight-charts via addLineSeries.
     """
+    if len(df) < lookback_period:
+        return {}
 
-    df = df.copy()
-    df['high_max'] = df['high'].rolling(window=lookback_period).max()
-    df['low_min'] = df['low'].rolling(window=lookback_period).min()
-
-    # Pega o último valor válido para high_max e low_min
-    high = df['high_max'].dropna().iloc[-1]
-    low = df['low_min'].dropna().iloc[-1]
-    diff = high - low
-
-    fib_prices = [low + level * diff for level in FIB_LEVELS]
+    # Range do último candle (última janela completa)
+    fib_prices = fibonacci_prices(df['high'].values, df['low'].values, lookback_period)[-1].tolist()
 
-    # Pega a lista de timestamps para o eixo x
-    if isinstance(df.index[0], pd.Timestamp):
+    # Timestamps do eixo x
+    if isinstance(df.index, pd.DatetimeIndex):
         # Converter para int timestamp em segundos para JS
-        times = [int(ts.timestamp()) for ts in df.index]
+        times = index_timestamps(df.index).tolist()
     else:
         times = df.index.tolist()
 
-    # Monta os pontos para cada linha (preço constante, tempo variável)
     lines_data = {}
     for level, price in zip(FIB_LEVELS, fib_prices):
-        points = [{"time": t, "value": price} for t in times]
-        lines_data[level] = points
+        if compact:
+            lines_data[level] = {"start": times[0], "end": times[-1], "price": price}
+        else:
+            # Monta os pontos para cada linha (preço constante, tempo variável)
+            lines_data[level] = [{"time": t, "value": price} for t in times]
 
     return lines_data
@@ -5,9 +5,17 @@ import mplfinance as mpf
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
+from core.context import AnalysisContext, cached
+from core.series import index_timestamps
 from utils.perceptually_important import find_pips
-from utils.rolling_window import rw_top, rw_bottom
-from utils.trendline_automation import fit_trendlines_single
+from utils.rolling_window import RollingExtremes, rw_confirmations
+from utils.trendline_automation import TrendlineWindow, fit_trendlines_iterative
+
+# Relative tolerance (to the flag tip price) for ties with the trendlines: a flat
+# line or a price right on the breakout line, common with tick-rounded prices.
+# Ties are decided by the previous iterative fit (fit_trendlines_iterative), so
+# flag vs pennant and breakouts stay as they were.
+TIE_TOLERANCE = 1e-9
 
 @dataclass
 class FlagPattern:
@@ -205,13 +213,14 @@ def find_flags_pennants_pips(data: np.array, order:int):
     bear_pennants = []
     bull_flags = []
     bear_flags = []
+    tops, bottoms = rw_confirmations(data, order)
     for i in range(len(data)):
 
         # Pattern data is organized like so:
-        if rw_top(data, i, order):
+        if tops[i]:
             pending_bear = FlagPattern(i - order, data[i - order])
         
-        if rw_bottom(data, i, order):
+        if bottoms[i]:
             pending_bull = FlagPattern(i - order, data[i - order])
 
         if pending_bear is not None:
@@ -241,206 +250,238 @@ def find_flags_pennants_pips_df(df: pd.DataFrame, order: int = 20) -> Dict[str,
     min_pole_height = df['close'].mean() * 0.02  # 2% do preço médio
     
     bull_flags, bear_flags, bull_pennants, bear_pennants = find_flags_pennants_pips(close_prices, order)
+    times = index_timestamps(df.index)
     
-    for pattern in bull_flags + bear_flags + bull_pennants + bear_pennants:
-        # Filtros adicionais
-        if not (pattern.pole_height > min_pole_height and 
-                pattern.pole_width >= 5 and
-                is_valid_proportion(pattern.pole_height, pattern.flag_height, 
-                                   pattern.pole_width, pattern.flag_width)):
-            continue
-            
-        time_start = int(df.index[pattern.tip_x].timestamp())
-        time_end = int(df.index[pattern.conf_x].timestamp())
-        
-        # Determinar o tipo
-        if pattern in bull_flags:
-            p_type = "bull_flag"
-        elif pattern in bear_flags:
-            p_type = "bear_flag"
-        elif pattern in bull_pennants:
-            p_type = "bull_pennant"
-        else:
-            p_type = "bear_pennant"
-        
-        # Linha superior
-        patterns.append({
-            "points": [
-                time_start, float(pattern.resist_intercept),
-                time_end, float(pattern.resist_intercept + pattern.resist_slope * pattern.flag_width)
-            ],
-            "type": p_type
-        })
-        
-        # Linha inferior
-        patterns.append({
-            "points": [
-                time_start, float(pattern.support_intercept),
-                time_end, float(pattern.support_intercept + pattern.support_slope * pattern.flag_width)
-            ],
-            "type": p_type
-        })
+    for pattern_list, pattern_type in [
+        (bull_flags, "bull_flag"),
+        (bear_flags, "bear_flag"),
+        (bull_pennants, "bull_pennant"),
+        (bear_pennants, "bear_pennant")
+    ]:
+        for pattern in pattern_list:
+            # Filtros adicionais
+            if not (pattern.pole_height > min_pole_height and 
+                    pattern.pole_width >= 5 and
+                    is_valid_proportion(pattern.pole_height, pattern.flag_height, 
+                                       pattern.pole_width, pattern.flag_width)):
+                continue
+
+            patterns.extend(flag_lines(pattern, pattern_type, times))
 
     return patterns
 
 # Trending
-def check_bull_pattern_trendline(pending: FlagPattern, data: np.array, i:int, order:int):
-    
-    # Check if data max less than pole tip 
-    if data[pending.tip_x + 1 : i].max() > pending.tip_y:
-        return False
-
-    flag_min = data[pending.tip_x:i].min()
-
-    # Find flag/pole height and width
-    pole_height = pending.tip_y - pending.base_y
-    pole_width = pending.tip_x - pending.base_x
-    
-    flag_height = pending.tip_y - flag_min
-    flag_width = i - pending.tip_x
-
-    if flag_width > pole_width * 0.5: # Flag should be less than half the width of pole
-        return False
-
-    if flag_height > pole_height * 0.75: # Flag should smaller vertically than preceding trend
-        return False
-
-    # Find trendlines going from flag tip to the previous bar (not including current bar)
-    support_coefs, resist_coefs = fit_trendlines_single(data[pending.tip_x:i])
-    support_slope, support_intercept = support_coefs[0], support_coefs[1]
-    resist_slope, resist_intercept = resist_coefs[0], resist_coefs[1]
-
-    # Check for breakout of upper trendline to confirm pattern
-    current_resist = resist_intercept + resist_slope * (flag_width + 1)
-    if data[i] <= current_resist:
-        return False
-
-    # Pattern is confiremd, fill out pattern details in pending
-    if support_slope > 0:
-        pending.pennant = True
-    else:
-        pending.pennant = False
-
-    pending.conf_x = i
-    pending.conf_y = data[i]
-    pending.flag_width = flag_width
-    pending.flag_height = flag_height
-    pending.pole_width = pole_width
-    pending.pole_height = pole_height
-    
-    pending.support_slope = support_slope
-    pending.support_intercept = support_intercept
-    pending.resist_slope = resist_slope
-    pending.resist_intercept = resist_intercept
-
-    return True
-
-def check_bear_pattern_trendline(pending: FlagPattern, data: np.array, i:int, order:int):
-    # Check if data max less than pole tip 
-    if data[pending.tip_x + 1 : i].min() < pending.tip_y:
-        return False
-
-    flag_max = data[pending.tip_x:i].max()
-
-    # Find flag/pole height and width
-    pole_height = pending.base_y - pending.tip_y
-    pole_width = pending.tip_x - pending.base_x
-    
-    flag_height = flag_max - pending.tip_y
-    flag_width = i - pending.tip_x
-
-    if flag_width > pole_width * 0.5: # Flag should be less than half the width of pole
-        return False
-
-    if flag_height > pole_height * 0.75: # Flag should smaller vertically than preceding trend
-        return False
-
-    # Find trendlines going from flag tip to the previous bar (not including current bar)
-    support_coefs, resist_coefs = fit_trendlines_single(data[pending.tip_x:i])
-    support_slope, support_intercept = support_coefs[0], support_coefs[1]
-    resist_slope, resist_intercept = resist_coefs[0], resist_coefs[1]
-
-    # Check for breakout of lower trendline to confirm pattern
-    current_support = support_intercept + support_slope * (flag_width + 1)
-    if data[i] >= current_support:
-        return False
-
-    # Pattern is confiremd, fill out pattern details in pending
-    if resist_slope < 0:
-        pending.pennant = True
-    else:
-        pending.pennant = False
+class _PendingTrendlineFlag:
+    # A pending flag plus running state over its flag window data[tip_x:i]
+    def __init__(self, pattern: FlagPattern, window: np.array, bull: bool):
+        self.pattern = pattern
+        self.bull = bull
+        self.fit = TrendlineWindow(window)
+        self.after_tip = window[1:].max() if bull else window[1:].min() # data[tip_x + 1:i]
+        self.extreme = window.min() if bull else window.max()            # flag_min / flag_max
+        self.dead = False
+
+    def append(self, price: float):
+        if self.bull:
+            self.after_tip = max(self.after_tip, price)
+            self.extreme = min(self.extreme, price)
+        else:
+            self.after_tip = min(self.after_tip, price)
+            self.extreme = max(self.extreme, price)
+        self.fit.append(price)
+
+    def _tie(self, lines, price: float, flag_width: int) -> bool:
+        # Flat flag line or price on the breakout line (see TIE_TOLERANCE)
+        (support_slope, support_intercept), (resist_slope, resist_intercept) = lines
+        tol = TIE_TOLERANCE * abs(self.pattern.tip_y)
+        if self.bull:
+            slope, line = support_slope, resist_intercept + resist_slope * (flag_width + 1)
+        else:
+            slope, line = resist_slope, support_intercept + support_slope * (flag_width + 1)
+        return abs(slope) * flag_width <= tol or abs(price - line) <= tol
+
+    def check(self, price: float, i: int, data: List[float]) -> bool:
+        # Same rules as the previous per-bar check (refitting data[tip_x:i] on
+        # every bar, see tests/legacy.py), on the running state.
+        # Rules that fail can never pass later (the window only grows), so the
+        # flag is marked dead and stops being updated.
+        pending = self.pattern
+        pole_width = pending.tip_x - pending.base_x
+        flag_width = i - pending.tip_x
+
+        if self.bull:
+            pole_height = pending.tip_y - pending.base_y
+            flag_height = pending.tip_y - self.extreme
+            broken = self.after_tip > pending.tip_y # Check if data max less than pole tip
+        else:
+            pole_height = pending.base_y - pending.tip_y
+            flag_height = self.extreme - pending.tip_y
+            broken = self.after_tip < pending.tip_y # Check if data min greater than pole tip
+
+        if broken or flag_width > pole_width * 0.5 or flag_height > pole_height * 0.75:
+            self.dead = True
+            return False
+
+        # Trendlines from flag tip to the previous bar (not including current bar)
+        lines = self.fit.fit()
+        if self._tie(lines, price, flag_width):
+            try:
+                lines = fit_trendlines_iterative(np.array(data[pending.tip_x:i]))
+            except Exception:
+                pass # Iterative fit gives up on some windows; keep the exact one
+        (support_slope, support_intercept), (resist_slope, resist_intercept) = lines
+
+        # Check for breakout of the trendline to confirm pattern
+        if self.bull:
+            if price <= resist_intercept + resist_slope * (flag_width + 1):
+                return False
+            pending.pennant = bool(support_slope > 0)
+        else:
+            if price >= support_intercept + support_slope * (flag_width + 1):
+                return False
+            pending.pennant = bool(resist_slope < 0)
+
+        pending.conf_x = i
+        pending.conf_y = price
+        pending.flag_width = flag_width
+        pending.flag_height = flag_height
+        pending.pole_width = pole_width
+        pending.pole_height = pole_height
+
+        pending.support_slope = support_slope
+        pending.support_intercept = support_intercept
+        pending.resist_slope = resist_slope
+        pending.resist_intercept = resist_intercept
+
+        return True
+
+class FlagScanner:
+    # Incremental trendline flag/pennant detector.
+    #
+    # Feed closes one at a time with update(), e.g. when a candle closes, or a
+    # whole history with run(). Each pending flag keeps its running max/min and
+    # an incrementally updated trendline fit, so a bar costs about the same
+    # regardless of how wide the flag has grown.
+    def __init__(self, order: int):
+        assert(order >= 3)
+        self.order = order
+        self.extremes = RollingExtremes(order)
+        self.data = []
+        self.pending_bull = None # Pending pattern
+        self.pending_bear = None # Pending pattern
+
+        self.last_bottom = -1
+        self.last_top = -1
+
+        self.bull_pennants = []
+        self.bear_pennants = []
+        self.bull_flags = []
+        self.bear_flags = []
+
+    def _pending(self, base_x: int, tip_x: int, i: int, bull: bool):
+        pending = FlagPattern(base_x, self.data[base_x])
+        pending.tip_x = tip_x
+        pending.tip_y = self.data[tip_x]
+        return _PendingTrendlineFlag(pending, np.array(self.data[tip_x:i]), bull)
+
+    def update(self, price: float) -> List[FlagPattern]:
+        # Adds the next close and returns the patterns confirmed on it
+        i = len(self.data)
+        self.data.append(price)
+        is_top, is_bottom = self.extremes.update(price)
+        confirmed = []
+
+        if is_top:
+            self.last_top = i - self.order
+            if self.last_bottom != -1:
+                self.pending_bull = self._pending(self.last_bottom, self.last_top, i, True)
+
+        if is_bottom:
+            self.last_bottom = i - self.order
+            if self.last_top != -1:
+                self.pending_bear = self._pending(self.last_top, self.last_bottom, i, False)
+
+        for side in ('pending_bear', 'pending_bull'):
+            state = getattr(self, side)
+            if state is None or state.dead:
+                continue
+
+            if state.check(price, i, self.data):
+                pattern = state.pattern
+                if state.bull:
+                    (self.bull_pennants if pattern.pennant else self.bull_flags).append(pattern)
+                else:
+                    (self.bear_pennants if pattern.pennant else self.bear_flags).append(pattern)
+                confirmed.append(pattern)
+                setattr(self, side, None)
+            elif not state.dead:
+                state.append(price)
 
-    pending.conf_x = i
-    pending.conf_y = data[i]
-    pending.flag_width = flag_width
-    pending.flag_height = flag_height
-    pending.pole_width = pole_width
-    pending.pole_height = pole_height
-    
-    pending.support_slope = support_slope
-    pending.support_intercept = support_intercept
-    pending.resist_slope = resist_slope
-    pending.resist_intercept = resist_intercept
+        return confirmed
 
-    return True
+    def run(self, data: np.array):
+        for price in np.asarray(data, dtype=np.float64).tolist():
+            self.update(price)
+        return self.bull_flags, self.bear_flags, self.bull_pennants, self.bear_pennants
 
 def find_flags_pennants_trendline(data: np.array, order:int):
-    assert(order >= 3)
-    pending_bull = None # Pending pattern
-    pending_bear = None  # Pending pattern
-
-    last_bottom = -1
-    last_top = -1
+    return FlagScanner(order).run(data)
 
-    bull_pennants = []
-    bear_pennants = []
-    bull_flags = []
-    bear_flags = []
-    for i in range(len(data)):
-
-        # Pattern data is organized like so:
-        if rw_top(data, i, order):
-            last_top = i - order
-            if last_bottom != -1:
-                pending = FlagPattern(last_bottom, data[last_bottom])
-                pending.tip_x = last_top
-                pending.tip_y = data[last_top]
-                pending_bull = pending
-        
-        if rw_bottom(data, i, order):
-            last_bottom = i - order
-            if last_top != -1:
-                pending = FlagPattern(last_top, data[last_top])
-                pending.tip_x = last_bottom
-                pending.tip_y = data[last_bottom]
-                pending_bear = pending
+def trendline_flag_patterns(df: pd.DataFrame, order: int = 20, ctx: AnalysisContext = None) -> List[Tuple[FlagPattern, str]]:
+    """
+    Bandeiras/pennants por linhas de tendência como (FlagPattern, tipo), com
+    posições em índices inteiros de candle (tip_x, conf_x, ...).
+    """
+    close_prices = df['close'].values
+    bull_flags, bear_flags, bull_pennants, bear_pennants = cached(
+        ctx, ('flags_trendline', order), lambda: find_flags_pennants_trendline(close_prices, order)
+    )
+
+    return [
+        (pattern, pattern_type)
+        for pattern_list, pattern_type in [
+            (bull_flags, "bull_flag"),
+            (bear_flags, "bear_flag"),
+            (bull_pennants, "bull_pennant"),
+            (bear_pennants, "bear_pennant")
+        ]
+        for pattern in pattern_list
+    ]
 
-        if pending_bear is not None:
-            if check_bear_pattern_trendline(pending_bear, data, i, order):
-                if pending_bear.pennant:
-                    bear_pennants.append(pending_bear)
-                else:
-                    bear_flags.append(pending_bear)
-                pending_bear = None
-        
-        if pending_bull is not None:
-            if check_bull_pattern_trendline(pending_bull, data, i, order):
-                if pending_bull.pennant:
-                    bull_pennants.append(pending_bull)
-                else:
-                    bull_flags.append(pending_bull)
-                pending_bull = None
+def flag_lines(pattern: FlagPattern, pattern_type: str, times: np.array) -> List[Dict]:
+    """
+    Linhas de resistência e suporte de um padrão para o gráfico; `times` são os
+    timestamps dos candles (ver `index_timestamps`).
+    """
+    time_start = int(times[pattern.tip_x])
+    time_end = int(times[pattern.conf_x])
 
-    return bull_flags, bear_flags, bull_pennants, bear_pennants
+    return [
+        # Linha superior/resistência
+        {
+            "points": [
+                time_start, float(pattern.resist_intercept),
+                time_end, float(pattern.resist_intercept + pattern.resist_slope * pattern.flag_width)
+            ],
+            "type": pattern_type
+        },
+        # Linha inferior/suporte
+        {
+            "points": [
+                time_start, float(pattern.support_intercept),
+                time_end, float(pattern.support_intercept + pattern.support_slope * pattern.flag_width)
+            ],
+            "type": pattern_type
+        }
+    ]
 
-def find_flags_pennants_trendline_df(df: pd.DataFrame, order: int = 20) -> Dict[str, List[Dict]]:
+def find_flags_pennants_trendline_df(df: pd.DataFrame, order: int = 20, ctx: AnalysisContext = None) -> Dict[str, List[Dict]]:
     """
     Detecta padrões de bandeiras/pennants baseados em linhas de tendência e retorna no formato:
     {
         "flag": [
             {
-                "points": [time1, price1, time2, price2],  # timestamps em milissegundos
+                "points": [time1, price1, time2, price2],  # timestamps em segundos
                 "type": "bull_flag" | "bear_flag" | "bull_pennant" | "bear_pennant"
             },
             ...
@@ -448,82 +489,42 @@ def find_flags_pennants_trendline_df(df: pd.DataFrame, order: int = 20) -> Dict[
     }
     """
     patterns = []
-    close_prices = df['close'].values
-    
-    # Encontra padrões usando a função existente
-    bull_flags, bear_flags, bull_pennants, bear_pennants = find_flags_pennants_trendline(close_prices, order)
-    
-    # Processa todos os tipos de padrões
-    for pattern_list, pattern_type in [
-        (bull_flags, "bull_flag"),
-        (bear_flags, "bear_flag"),
-        (bull_pennants, "bull_pennant"),
-        (bear_pennants, "bear_pennant")
-    ]:
-        for pattern in pattern_list:
-            time_start = int(df.index[pattern.tip_x].timestamp())
-            time_end = int(df.index[pattern.conf_x].timestamp())
-            
-            # Linha superior/resistência
-            patterns.append({
-                "points": [
-                    time_start, float(pattern.resist_intercept),
-                    time_end, float(pattern.resist_intercept + pattern.resist_slope * pattern.flag_width)
-                ],
-                "type": pattern_type
-            })
-            
-            # Linha inferior/suporte
-            patterns.append({
-                "points": [
-                    time_start, float(pattern.support_intercept),
-                    time_end, float(pattern.support_intercept + pattern.support_slope * pattern.flag_width)
-                ],
-                "type": pattern_type
-            })
+    times = index_timestamps(df.index)
+
+    for pattern, pattern_type in trendline_flag_patterns(df, order, ctx):
+        patterns.extend(flag_lines(pattern, pattern_type, times))
 
     return patterns
 
 # Signals
-def detect_flag_signals(df: pd.DataFrame):
+def detect_flag_signals(df: pd.DataFrame, ctx: AnalysisContext = None):
     """
     Adiciona colunas 'flag_buy' e 'flag_sell' ao DataFrame com base no rompimento das bandeiras (flags/pennants).
     """
     df = df.copy()
-    df['flags_buy'] = False
-    df['flags_sell'] = False
-
-    flags = find_flags_pennants_trendline_df(df)
-
-    for flag in flags:
-        points = flag['points']
-        direction = flag['type']
-        
-        # Converte os timestamps para índices no DataFrame
-        try:
-            dt_start = pd.to_datetime(points[0], unit='s')
-            dt_end = pd.to_datetime(points[2], unit='s')
-
-            idx_start = df.index.get_indexer([dt_start], method='nearest')[0]
-            idx_end = df.index.get_indexer([dt_end], method='nearest')[0]
-        except KeyError:
-            continue  # pula se não conseguir localizar os pontos no índice
+    n = len(df)
+    close_prices = df['close'].values
+    flags_buy = np.zeros(n, dtype=bool)
+    flags_sell = np.zeros(n, dtype=bool)
 
-        if idx_end + 2 >= len(df):
+    for pattern, pattern_type in trendline_flag_patterns(df, ctx=ctx):
+        # Candle de confirmação do padrão (rompimento)
+        breakout_idx = pattern.conf_x
+        if breakout_idx + 2 >= n:
             continue  # evita extrapolar o DataFrame
 
-        # Candle após o fim do padrão (rompimento)
-        breakout_idx = idx_end
-        breakout_close = df['close'].iloc[breakout_idx]
-        previous_close = df['close'].iloc[breakout_idx - 1]
+        breakout_close = close_prices[breakout_idx]
+        previous_close = close_prices[breakout_idx - 1]
 
-        if "bull" in direction:
+        if "bull" in pattern_type:
             if breakout_close > previous_close:
-                df.loc[df.index[breakout_idx], 'flags_buy'] = True
-        elif "bear" in direction:
+                flags_buy[breakout_idx] = True
+        elif "bear" in pattern_type:
             if breakout_close < previous_close:
-                df.loc[df.index[breakout_idx], 'flags_sell'] = True
+                flags_sell[breakout_idx] = True
 
+    df['flags_buy'] = flags_buy
+    df['flags_sell'] = flags_sell
     return df
 
 # Helpers
@@ -2,7 +2,9 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import mplfinance as mpf
-from utils.rolling_window import rw_top, rw_bottom
+from utils.rolling_window import RollingExtremes
+from core.context import AnalysisContext, cached
+from core.series import index_timestamps
 from typing import List
 from collections import deque
 from dataclasses import dataclass
@@ -274,43 +276,72 @@ def check_ihs_pattern(extrema_indices: List[int], data: np.array, i:int, early_f
 
     return pat
 
-def find_hs_patterns(data: np.array, order:int, early_find:bool = False):
-    assert(order >= 1)
-    
-    # head and shoulders top checked from/after a confirmed bottom (before right shoulder)
-    # head and shoulders bottom checked from/after a confirmed top 
-    
-    last_is_top = False
-    recent_extrema = deque(maxlen=5)
-    recent_types = deque(maxlen=5) # -1 for bottoms 1 for tops
-
-    # Lock variables to prevent finding the same pattern multiple times
-    hs_lock = False
-    ihs_lock = False
-
-    ihs_patterns = [] # Inverted (bullish)
-    hs_patterns = []  # Regular (bearish)
-    for i in range(len(data)):
-
-        if rw_top(data, i, order):
-            recent_extrema.append(i - order)
-            recent_types.append(1)
-            ihs_lock = False
-            last_is_top = True
-        
-        if rw_bottom(data, i, order):
-            recent_extrema.append(i - order)
-            recent_types.append(-1)
-            hs_lock = False
-            last_is_top = False
-
-        if len(recent_extrema) < 5:
-            continue
+class HSDetector:
+    # Incremental head and shoulders detector.
+    #
+    # Keeps the recent extrema, their types and the lock flags between calls,
+    # so a live feed only pays for the newest close. update() appends one close
+    # and returns the patterns confirmed on it; run() feeds a whole series.
+    # Closes are kept in a growable buffer that the pattern checks index into.
+    def __init__(self, order: int, early_find: bool = False):
+        assert(order >= 1)
+        self.order = order
+        self.early_find = early_find
+        self.extremes = RollingExtremes(order)
+
+        self._buffer = np.empty(256, dtype=np.float64)
+        self.n = 0
+
+        # head and shoulders top checked from/after a confirmed bottom (before right shoulder)
+        # head and shoulders bottom checked from/after a confirmed top 
+        self.last_is_top = False
+        self.recent_extrema = deque(maxlen=5)
+        self.recent_types = deque(maxlen=5) # -1 for bottoms 1 for tops
+
+        # Lock variables to prevent finding the same pattern multiple times
+        self.hs_lock = False
+        self.ihs_lock = False
+
+        self.ihs_patterns = [] # Inverted (bullish)
+        self.hs_patterns = []  # Regular (bearish)
+
+    @property
+    def data(self) -> np.array:
+        return self._buffer[:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def update(self, close: float) -> List[HSPattern]:
+        if self.n == len(self._buffer):
+            self._buffer = np.resize(self._buffer, 2 * len(self._buffer))
+        self._buffer[self.n] = close
+        self.n += 1
+
+        i = self.n - 1
+        order = self.order
+        is_top, is_bottom = self.extremes.update(close)
+
+        if is_top:
+            self.recent_extrema.append(i - order)
+            self.recent_types.append(1)
+            self.ihs_lock = False
+            self.last_is_top = True
         
+        if is_bottom:
+            self.recent_extrema.append(i - order)
+            self.recent_types.append(-1)
+            self.hs_lock = False
+            self.last_is_top = False
+
+        if len(self.recent_extrema) < 5:
+            return []
+
+        recent_types = self.recent_types
         hs_alternating = True
         ihs_alternating = True
         
-        if last_is_top:
+        if self.last_is_top:
             for j in range(2, 5):
                 if recent_types[j] == recent_types[j - 1]: 
                     ihs_alternating = False
@@ -319,8 +350,8 @@ def find_hs_patterns(data: np.array, order:int, early_find:bool = False):
                 if recent_types[j] == recent_types[j - 1]: 
                     hs_alternating = False
             
-            ihs_extrema = list(recent_extrema)[1:5]
-            hs_extrema = list(recent_extrema)[0:4]
+            ihs_extrema = list(self.recent_extrema)[1:5]
+            hs_extrema = list(self.recent_extrema)[0:4]
         else:
             
             for j in range(2, 5):
@@ -331,29 +362,52 @@ def find_hs_patterns(data: np.array, order:int, early_find:bool = False):
                 if recent_types[j] == recent_types[j - 1]: 
                     ihs_alternating = False
             
-            ihs_extrema = list(recent_extrema)[0:4]
-            hs_extrema = list(recent_extrema)[1:5]
-        
-        if ihs_lock or not ihs_alternating:
+            ihs_extrema = list(self.recent_extrema)[0:4]
+            hs_extrema = list(self.recent_extrema)[1:5]
+
+        data = self.data
+        if self.ihs_lock or not ihs_alternating:
             ihs_pat = None
         else:
-            ihs_pat = check_ihs_pattern(ihs_extrema, data, i, early_find)
+            ihs_pat = check_ihs_pattern(ihs_extrema, data, i, self.early_find)
 
-        if hs_lock or not hs_alternating:
+        if self.hs_lock or not hs_alternating:
             hs_pat = None
         else:
-            hs_pat = check_hs_pattern(hs_extrema, data, i, early_find)
+            hs_pat = check_hs_pattern(hs_extrema, data, i, self.early_find)
 
+        found = []
         if hs_pat is not None:
-            hs_lock = True
-            hs_patterns.append(hs_pat)
+            self.hs_lock = True
+            self.hs_patterns.append(hs_pat)
+            found.append(hs_pat)
         
         if ihs_pat is not None:
-            ihs_lock = True
-            ihs_patterns.append(ihs_pat)
+            self.ihs_lock = True
+            self.ihs_patterns.append(ihs_pat)
+            found.append(ihs_pat)
+
+        return found
 
+    def run(self, data: np.array):
+        for close in np.asarray(data, dtype=np.float64).tolist():
+            self.update(close)
+        return self.hs_patterns, self.ihs_patterns
+
+def find_hs_patterns(data: np.array, order:int, early_find:bool = False):
+    return HSDetector(order, early_find).run(data)
 
-    return hs_patterns, ihs_patterns
+def hs_detector_for(df: pd.DataFrame, order: int = 20, detector: HSDetector = None) -> HSDetector:
+    """
+    Retorna um detector já alimentado com os fechamentos de `df`.
+    Se `detector` for informado, ele é reaproveitado (apenas os candles novos são processados).
+    """
+    if detector is None:
+        detector = HSDetector(order)
+    close_prices = df['close'].values
+    if len(detector) < len(close_prices):
+        detector.run(close_prices[len(detector):])
+    return detector
 
 def get_pattern_return(data: np.array, pat: HSPattern, log_prices: bool = True) -> float:
 
@@ -390,7 +444,43 @@ def get_pattern_return(data: np.array, pat: HSPattern, log_prices: bool = True)
             return -1 * (exit_price - entry_price) / entry_price
 
 # Patterns
-def detect_hs_patterns(df: pd.DataFrame, order: int = 20) -> Dict[str, List[Dict]]:
+def hs_lines(pat: HSPattern, pattern_type: str, times: np.array) -> Dict:
+    """
+    Linhas de um padrão para o gráfico. O padrão guarda índices de candle;
+    `times` são os timestamps dos candles (ver `index_timestamps`).
+    """
+    time_neck_start = float(times[pat.start_i])
+    time_l_shoulder = float(times[pat.l_shoulder])
+    time_l_armpit = float(times[pat.l_armpit])
+    time_head = float(times[pat.head])
+    time_r_armpit = float(times[pat.r_armpit])
+    time_r_shoulder = float(times[pat.r_shoulder])
+    time_break = float(times[pat.break_i])
+    
+    # Linha do pescoço
+    neck_line = [
+        [time_l_armpit, float(pat.l_armpit_p)],
+        [time_r_armpit, float(pat.r_armpit_p)]
+    ]
+    
+    # Linhas do padrão
+    pattern_lines = [
+        [time_neck_start, float(pat.neck_start)],
+        [time_l_shoulder, float(pat.l_shoulder_p)],
+        [time_l_armpit, float(pat.l_armpit_p)],
+        [time_head, float(pat.head_p)],
+        [time_r_armpit, float(pat.r_armpit_p)],
+        [time_r_shoulder, float(pat.r_shoulder_p)],
+        [time_break, float(pat.break_p)]
+    ]
+    
+    return {
+        "points": pattern_lines,
+        "neckline": neck_line,
+        "type": pattern_type
+    }
+
+def detect_hs_patterns(df: pd.DataFrame, order: int = 20, ctx: AnalysisContext = None) -> Dict[str, List[Dict]]:
     """
     Detecta padrões Head & Shoulders (Ombro-Cabeça-Ombro) e retorna as linhas para plotagem
     Retorna:
@@ -404,121 +494,37 @@ def detect_hs_patterns(df: pd.DataFrame, order: int = 20) -> Dict[str, List[Dict
         ]
     }
     """
-    patterns = []
-    close_prices = df['close'].values
-    
     # Detecta padrões
-    hs_patterns, ihs_patterns = find_hs_patterns(close_prices, order)
-    
-    # Processa padrões Head & Shoulders (bearish)
-    for pat in hs_patterns:
-        time_neck_start = df.index[pat.start_i].timestamp()
-        time_l_shoulder = df.index[pat.l_shoulder].timestamp()
-        time_l_armpit = df.index[pat.l_armpit].timestamp()
-        time_head = df.index[pat.head].timestamp()
-        time_r_armpit = df.index[pat.r_armpit].timestamp()
-        time_r_shoulder = df.index[pat.r_shoulder].timestamp()
-        time_break = df.index[pat.break_i].timestamp()
-        
-        # Linha do pescoço
-        neck_line = [
-            [time_l_armpit, float(pat.l_armpit_p)],
-            [time_r_armpit, float(pat.r_armpit_p)]
-        ]
-        
-        # Linhas do padrão
-        pattern_lines = [
-            [time_neck_start, float(pat.neck_start)],
-            [time_l_shoulder, float(pat.l_shoulder_p)],
-            [time_l_armpit, float(pat.l_armpit_p)],
-            [time_head, float(pat.head_p)],
-            [time_r_armpit, float(pat.r_armpit_p)],
-            [time_r_shoulder, float(pat.r_shoulder_p)],
-            [time_break, float(pat.break_p)]
-        ]
-        
-        patterns.append({
-            "points": pattern_lines,
-            "neckline": neck_line,
-            "type": "head_shoulders"
-        })
-    
-    # Processa padrões Inverse Head & Shoulders (bullish)
-    for pat in ihs_patterns:
-        time_neck_start = df.index[pat.start_i].timestamp()
-        time_l_shoulder = df.index[pat.l_shoulder].timestamp()
-        time_l_armpit = df.index[pat.l_armpit].timestamp()
-        time_head = df.index[pat.head].timestamp()
-        time_r_armpit = df.index[pat.r_armpit].timestamp()
-        time_r_shoulder = df.index[pat.r_shoulder].timestamp()
-        time_break = df.index[pat.break_i].timestamp()
-        
-        # Linha do pescoço
-        neck_line = [
-            [time_l_armpit, float(pat.l_armpit_p)],
-            [time_r_armpit, float(pat.r_armpit_p)]
-        ]
-        
-        # Linhas do padrão
-        pattern_lines = [
-            [time_neck_start, float(pat.neck_start)],
-            [time_l_shoulder, float(pat.l_shoulder_p)],
-            [time_l_armpit, float(pat.l_armpit_p)],
-            [time_head, float(pat.head_p)],
-            [time_r_armpit, float(pat.r_armpit_p)],
-            [time_r_shoulder, float(pat.r_shoulder_p)],
-            [time_break, float(pat.break_p)]
-        ]
-        
-        patterns.append({
-            "points": pattern_lines,
-            "neckline": neck_line,
-            "type": "inverse_head_shoulders"
-        })
+    detector = cached(ctx, ('hs', order), lambda: hs_detector_for(df, order))
+    times = index_timestamps(df.index)
     
+    # Head & Shoulders (bearish) seguidos de Inverse Head & Shoulders (bullish)
+    patterns = [hs_lines(pat, "head_shoulders", times) for pat in detector.hs_patterns]
+    patterns += [hs_lines(pat, "inverse_head_shoulders", times) for pat in detector.ihs_patterns]
     return patterns
 
 # Signals
-def detect_hs_signals(df: pd.DataFrame) -> Dict[str, List[int]]:
+def detect_hs_signals(df: pd.DataFrame, ctx: AnalysisContext = None) -> Dict[str, List[int]]:
     """
     Gera sinais de compra/venda baseados em padrões Head & Shoulders
-    Retorna:
-    {
-        "buy": [timestamp1, timestamp2, ...],  # Lista de timestamps de compra (Inverse HS)
-        "sell": [timestamp1, timestamp2, ...]  # Lista de timestamps de venda (HS)
-    }
+    Adiciona ao DataFrame:
+        hs_buy: 1 no candle de rompimento de cada Inverse HS
+        hs_sell: -1 no candle de rompimento de cada HS
     """
-    df['hs_buy'] = 0
-    df['hs_sell'] = 0
-    
-    close_prices = df['close'].values
     order = 20  # Ajuste conforme necessário
     
     # Detecta padrões
-    hs_patterns, ihs_patterns = find_hs_patterns(close_prices, order)
+    detector = cached(ctx, ('hs', order), lambda: hs_detector_for(df, order))
     
+    hs_buy = np.zeros(len(df), dtype=np.int64)
+    hs_sell = np.zeros(len(df), dtype=np.int64)
+
     # Sinais de venda (Head & Shoulders tradicional)
-    for pat in hs_patterns:
-        df.at[df.index[pat.break_i], 'hs_sell'] = -1
+    hs_sell[[pat.break_i for pat in detector.hs_patterns]] = -1
     
     # Sinais de compra (Inverse Head & Shoulders)
-    for pat in ihs_patterns:
-        df.at[df.index[pat.break_i], 'hs_buy'] = 1
+    hs_buy[[pat.break_i for pat in detector.ihs_patterns]] = 1
     
+    df['hs_buy'] = hs_buy
+    df['hs_sell'] = hs_sell
     return df
-
-def _filter_close_signals(df: pd.DataFrame, signals: List[int], min_gap: int = 3) -> List[int]:
-    """
-    Filtra sinais que estão muito próximos no tempo
-    """
-    if not signals:
-        return []
-    
-    signal_indices = [df.index.get_loc(pd.to_datetime(ts/1000, unit='s')) for ts in signals]
-    filtered = [signals[0]]
-    
-    for i in range(1, len(signals)):
-        if signal_indices[i] - signal_indices[i-1] >= min_gap:
-            filtered.append(signals[i])
-    
-    return filtered
\ No newline at end of file
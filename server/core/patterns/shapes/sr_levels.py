@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, List
 
+from core.context import AnalysisContext, cached
+
 def pivotid(df, l, n1, n2):
     """
     Identifies pivot points (high, low, or both) in a DataFrame.
@@ -13,21 +15,12 @@ def pivotid(df, l, n1, n2):
     if l - n1 < 0 or l + n2 >= len(df):
         return 0
 
-    pividlow = 1
-    pividhigh = 1
-    
-    # Check for pivot low
-    for i in range(l - n1, l + n2 + 1):
-        if df.iloc[l]['low'] > df.iloc[i]['low']:
-            pividlow = 0
-            break
-            
-    # Check for pivot high
-    for i in range(l - n1, l + n2 + 1):
-        if df.iloc[l]['high'] < df.iloc[i]['high']:
-            pividhigh = 0
-            break
-            
+    lows = df['low'].values
+    highs = df['high'].values
+
+    pividlow = lows[l] <= lows[l - n1:l + n2 + 1].min()
+    pividhigh = highs[l] >= highs[l - n1:l + n2 + 1].max()
+
     if pividlow and pividhigh:
         return 3
     elif pividlow:
@@ -37,6 +30,83 @@ def pivotid(df, l, n1, n2):
     else:
         return 0
 
+def pivot_ids(low, high, n1, n2):
+    """
+    Classifica todos os candles de uma vez, com o mesmo resultado de `pivotid`
+    para cada índice: 1 = pivot de fundo, 2 = pivot de topo, 3 = ambos, 0 = nenhum.
+
+    Usa mínimo/máximo móveis sobre a janela [l - n1, l + n2] em vez de
+    comparar cada vizinho.
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    n1 = int(n1)
+    n2 = int(n2)
+    n = len(low)
+
+    pivots = np.zeros(n, dtype=np.int64)
+    width = n1 + n2 + 1
+    if n < width:
+        return pivots
+
+    # Janela terminando em l + n2, para l em [n1, n - n2)
+    window_min = pd.Series(low).rolling(width).min().values[width - 1:]
+    window_max = pd.Series(high).rolling(width).max().values[width - 1:]
+
+    is_low = low[n1:n - n2] <= window_min
+    is_high = high[n1:n - n2] >= window_max
+    pivots[n1:n - n2] = is_low * 1 + is_high * 2
+    return pivots
+
+def cluster_levels(prices, volumes, tolerance_pct=0.3, min_touches=2):
+    """
+    Agrupa níveis de preço próximos numa única varredura ordenada.
+
+    Um preço entra no grupo atual se estiver a menos de `tolerance_pct`% da
+    média do grupo; a média é mantida com uma soma acumulada. Retorna os
+    grupos com pelo menos `min_touches` preços, cada um com 'price' (média),
+    'touches', 'volume' (soma) e 'strength' (touches * volume).
+    """
+    if len(prices) == 0:
+        return []
+
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+    order = np.argsort(prices, kind='stable')
+    sorted_prices = prices[order].tolist()
+    sorted_volumes = volumes[order].tolist()
+
+    grouped = []
+
+    def close_group(price_sum, volume_sum, count):
+        if count >= min_touches:
+            grouped.append({
+                'price': price_sum / count,
+                'touches': count,
+                'volume': volume_sum,
+                'strength': count * volume_sum
+            })
+
+    price_sum = 0
+    volume_sum = 0
+    count = 0
+
+    for price, volume in zip(sorted_prices, sorted_volumes):
+        if count:
+            avg_price = price_sum / count
+            if not abs(price - avg_price) / avg_price * 100 < tolerance_pct:
+                close_group(price_sum, volume_sum, count)
+                price_sum = 0
+                volume_sum = 0
+                count = 0
+
+        price_sum += price
+        volume_sum += volume
+        count += 1
+
+    close_group(price_sum, volume_sum, count)
+    return grouped
+
 def calculate_atr(df, period=14):
     """
     Calcula o Average True Range para determinar tolerâncias dinâmicas.
@@ -120,7 +190,82 @@ def calculate_momentum_confirmation(df, index, lookback=5):
     
     return rsi
 
-def detect_support_resistance_signals(df, n1=5, n2=5, min_touches=2, volume_factor=0.005):
+def calculate_momentum_series(close, lookback=5):
+    """
+    Versão vetorizada de `calculate_momentum_confirmation` para todos os índices.
+
+    As somas de ganhos/perdas são acumuladas na mesma ordem do cálculo por
+    índice, então os valores são idênticos.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    rsi = np.zeros(n)
+    if n <= lookback:
+        return rsi
+
+    # Para o índice i = lookback + t as variações usadas são diff[t:t + lookback]
+    diff = np.diff(close)
+    size = n - lookback
+    gain_sum = np.zeros(size)
+    loss_sum = np.zeros(size)
+    gain_count = np.zeros(size, dtype=np.int64)
+    loss_count = np.zeros(size, dtype=np.int64)
+
+    for k in range(lookback):
+        change = diff[k:k + size]
+        gain_sum += np.where(change > 0, change, 0.0)
+        loss_sum += np.where(change < 0, -change, 0.0)
+        gain_count += change > 0
+        loss_count += change < 0
+
+    avg_gain = np.where(gain_count > 0, gain_sum / np.maximum(gain_count, 1), 0.01)
+    avg_loss = np.where(loss_count > 0, loss_sum / np.maximum(loss_count, 1), 0.01)
+
+    rs = avg_gain / avg_loss
+    rsi[lookback:] = 100 - (100 / (1 + rs))
+    return rsi
+
+def score_levels(near, no_break, shared_met, touches):
+    """
+    Pontua cada candle contra cada nível (matriz candles x níveis).
+
+    `near` e `no_break` são as condições que dependem do nível; `shared_met` é
+    a quantidade de condições (das 6) atendidas que não dependem dele.
+    Retorna, por candle, a maior força entre os níveis com pelo menos 5 de 6
+    condições e o índice do primeiro nível que a atinge (-1 se nenhum).
+    """
+    conditions_met = near.astype(np.int64) + no_break + shared_met[:, None]
+    strength = (conditions_met / 6) * touches[None, :]
+    strength = np.where(conditions_met >= 5, strength, 0.0)
+
+    best = strength.argmax(axis=1)
+    best_strength = strength[np.arange(len(strength)), best]
+    best = np.where(best_strength > 0, best, -1)
+    return best_strength, best
+
+def support_resistance_clusters(df, n1=5, n2=5, min_touches=2, ctx: AnalysisContext = None):
+    """
+    Pivots e níveis agrupados usados tanto pelas formas quanto pelos sinais.
+
+    Retorna (pivots, suportes, resistências), onde suportes/resistências são os
+    grupos de `cluster_levels`. Com um `ctx`, o cálculo é feito uma vez por
+    análise; o resultado é compartilhado e não deve ser alterado.
+    """
+    def compute():
+        lows = df['low'].values
+        highs = df['high'].values
+        volumes = df['volume'].values if 'volume' in df.columns else np.ones(len(df))
+
+        pivots = pivot_ids(lows, highs, n1, n2)
+        is_support = pivots == 1
+        is_resistance = pivots == 2
+        supports = cluster_levels(lows[is_support], volumes[is_support], min_touches=min_touches)
+        resistances = cluster_levels(highs[is_resistance], volumes[is_resistance], min_touches=min_touches)
+        return pivots, supports, resistances
+
+    return cached(ctx, ('sr_clusters', n1, n2, min_touches), compute)
+
+def detect_support_resistance_signals(df, n1=5, n2=5, min_touches=2, volume_factor=0.005, ctx: AnalysisContext = None):
     """
     Versão melhorada para detectar sinais de suporte e resistência com maior acurácia.
     
@@ -129,6 +274,7 @@ def detect_support_resistance_signals(df, n1=5, n2=5, min_touches=2, volume_fact
         n1, n2: Parâmetros para detecção de pivots
         min_touches: Número mínimo de toques para confirmar nível
         volume_factor: Fator para confirmar breakouts com volume
+        ctx: Contexto da análise, para reaproveitar pivots e níveis já calculados
     """
     df_copy = df.copy()
     
@@ -136,193 +282,109 @@ def detect_support_resistance_signals(df, n1=5, n2=5, min_touches=2, volume_fact
     atr = calculate_atr(df_copy)
     df_copy['atr'] = atr
     
-    # Detecta pivots
-    pivot_values = [0] * len(df_copy)
-    for l_idx in range(len(df_copy)):
-        pivot_values[l_idx] = pivotid(df_copy, l_idx, n1, n2)
-    
-    df_copy['pivot'] = pivot_values
-    
-    # Coleta níveis de suporte e resistência com informações adicionais
-    support_data = []
-    resistance_data = []
-    
-    for i in range(len(df_copy)):
-        if df_copy.iloc[i]['pivot'] == 1:  # Support
-            support_data.append({
-                'price': df_copy.iloc[i]['low'],
-                'index': i,
-                'volume': df_copy.iloc[i].get('volume', 1)
-            })
-        elif df_copy.iloc[i]['pivot'] == 2:  # Resistance
-            resistance_data.append({
-                'price': df_copy.iloc[i]['high'],
-                'index': i,
-                'volume': df_copy.iloc[i].get('volume', 1)
-            })
-    
-    # Agrupa níveis próximos e conta toques
-    def group_and_count_touches(level_data, tolerance_pct=0.3):
-        if not level_data:
-            return []
-        
-        grouped_levels = []
-        sorted_data = sorted(level_data, key=lambda x: x['price'])
-        
-        current_group = [sorted_data[0]]
-        
-        for data in sorted_data[1:]:
-            # Se o nível está próximo do grupo atual
-            avg_price = sum(d['price'] for d in current_group) / len(current_group)
-            if abs(data['price'] - avg_price) / avg_price * 100 < tolerance_pct:
-                current_group.append(data)
-            else:
-                # Finaliza grupo atual
-                if len(current_group) >= min_touches:
-                    group_price = sum(d['price'] for d in current_group) / len(current_group)
-                    group_volume = sum(d['volume'] for d in current_group)
-                    grouped_levels.append({
-                        'price': group_price,
-                        'touches': len(current_group),
-                        'volume': group_volume,
-                        'strength': len(current_group) * group_volume
-                    })
-                current_group = [data]
-        
-        # Adiciona último grupo
-        if len(current_group) >= min_touches:
-            group_price = sum(d['price'] for d in current_group) / len(current_group)
-            group_volume = sum(d['volume'] for d in current_group)
-            grouped_levels.append({
-                'price': group_price,
-                'touches': len(current_group),
-                'volume': group_volume,
-                'strength': len(current_group) * group_volume
-            })
-        
-        return grouped_levels
-    
-    # Agrupa e filtra níveis significativos
-    significant_supports = group_and_count_touches(support_data)
-    significant_resistances = group_and_count_touches(resistance_data)
+    lows = df_copy['low'].values
+    highs = df_copy['high'].values
+    volumes = df_copy['volume'].values if 'volume' in df_copy.columns else np.ones(len(df_copy))
+
+    # Detecta pivots e agrupa níveis próximos de suporte (pivots de fundo) e resistência (pivots de topo) e conta toques
+    pivots, significant_supports, significant_resistances = support_resistance_clusters(df_copy, n1, n2, min_touches, ctx)
+    df_copy['pivot'] = pivots.copy()
     
     # Ordena por força (toques * volume)
-    significant_supports.sort(key=lambda x: x['strength'], reverse=True)
-    significant_resistances.sort(key=lambda x: x['strength'], reverse=True)
+    significant_supports = sorted(significant_supports, key=lambda x: x['strength'], reverse=True)
+    significant_resistances = sorted(significant_resistances, key=lambda x: x['strength'], reverse=True)
     
     # Mantém apenas os níveis mais fortes
     significant_supports = significant_supports[:8]
     significant_resistances = significant_resistances[:8]
     
     # Inicializa colunas de sinal
-    df_copy['sr_buy'] = False
-    df_copy['sr_sell'] = False
-    df_copy['signal_strength'] = 0.0
-    df_copy['signal_type'] = ''
-    
-    # Gera sinais com múltiplas confirmações
-    for i in range(max(20, n1), len(df_copy)):
-        current_close = df_copy.iloc[i]['close']
-        current_open = df_copy.iloc[i]['open']
-        current_high = df_copy.iloc[i]['high']
-        current_low = df_copy.iloc[i]['low']
-        current_volume = df_copy.iloc[i].get('volume', 1)
-        current_atr = df_copy.iloc[i]['atr'] if not pd.isna(df_copy.iloc[i]['atr']) else 0.01
+    n = len(df_copy)
+    sr_buy = np.zeros(n, dtype=bool)
+    sr_sell = np.zeros(n, dtype=bool)
+    signal_strength = np.zeros(n)
+    signal_type = np.full(n, '', dtype=object)
+    
+    # Gera sinais com múltiplas confirmações, para todos os candles a partir de `start` de uma vez
+    start = max(20, n1)
+    if n > start:
+        bars = slice(start, n)
+        closes = df_copy['close'].values
+        opens = df_copy['open'].values
+        current_close = closes[bars]
+        current_open = opens[bars]
+        current_high = highs[bars]
+        current_low = lows[bars]
+        current_volume = volumes[bars]
+        atr_values = df_copy['atr'].values[bars]
+        current_atr = np.where(np.isnan(atr_values), 0.01, atr_values)
+        tolerance = current_atr * 0.5
         
-        # Volume médio para comparação
-        avg_volume = df_copy['volume'].iloc[max(0, i-20):i].mean() if 'volume' in df_copy.columns else 1
+        # Volume médio dos 20 candles anteriores para comparação
+        if 'volume' in df_copy.columns:
+            avg_volume = np.lib.stride_tricks.sliding_window_view(volumes, 20)[start - 20:n - 20].mean(axis=1)
+        else:
+            avg_volume = np.ones(n - start)
+        volume_confirmation = current_volume > avg_volume * 1.2
         
         # Momentum
-        rsi = calculate_momentum_confirmation(df_copy, i)
+        rsi = calculate_momentum_series(closes)[bars]
+        
+        # Sequência de candles das últimas 3 velas (i-2, i-1, i)
+        bearish = (closes < opens).astype(np.int64)
+        bullish = (closes > opens).astype(np.int64)
+        bearish_streak = bearish[start - 2:n - 2] + bearish[start - 1:n - 1] + bearish[bars]
+        bullish_streak = bullish[start - 2:n - 2] + bullish[start - 1:n - 1] + bullish[bars]
         
         # SINAIS DE COMPRA
-        for support in significant_supports:
-            support_price = support['price']
-            support_strength = support['touches']
-            tolerance = current_atr * 0.5
-            
-            # Condições para sinal de compra
-            conditions_buy = []
-            
-            # 1. Preço próximo ao suporte
-            price_near_support = abs(current_low - support_price) <= tolerance
-            conditions_buy.append(price_near_support)
-            
-            # 2. Candle bullish (fechamento > abertura)
-            bullish_candle = current_close > current_open
-            conditions_buy.append(bullish_candle)
-            
-            # 3. RSI não está em sobrecompra (< 70)
-            rsi_ok = rsi < 70
-            conditions_buy.append(rsi_ok)
-            
-            # 4. Volume acima da média (confirmação)
-            volume_confirmation = current_volume > avg_volume * 1.2
-            conditions_buy.append(volume_confirmation)
-            
-            # 5. Preço não quebrou o suporte significativamente
-            no_breakdown = current_close > support_price - tolerance
-            conditions_buy.append(no_breakdown)
-            
-            # 6. Trend de curto prazo (últimas 3 velas não são todas bearish)
-            recent_closes = [df_copy.iloc[j]['close'] for j in range(max(0, i-2), i+1)]
-            recent_opens = [df_copy.iloc[j]['open'] for j in range(max(0, i-2), i+1)]
-            bearish_streak = sum(1 for c, o in zip(recent_closes, recent_opens) if c < o)
-            trend_ok = bearish_streak < 3
-            conditions_buy.append(trend_ok)
-            
-            # Calcula força do sinal
-            conditions_met = sum(conditions_buy)
-            signal_strength = (conditions_met / len(conditions_buy)) * support_strength
-            
-            # Gera sinal se pelo menos 5 de 6 condições forem atendidas
-            if conditions_met >= 5 and signal_strength > df_copy.iloc[i]['signal_strength']:
-                df_copy.loc[df_copy.index[i], 'sr_buy'] = True
-                df_copy.loc[df_copy.index[i], 'signal_strength'] = signal_strength
-                df_copy.loc[df_copy.index[i], 'signal_type'] = f'Support_Bounce_{support_strength}touches'
+        # 1. Preço próximo ao suporte | 2. Candle bullish | 3. RSI < 70 | 4. Volume acima da média
+        # 5. Preço não quebrou o suporte | 6. Últimas 3 velas não são todas bearish
+        buy_strength = np.zeros(n - start)
+        buy_level = np.full(n - start, -1)
+        if significant_supports:
+            support_prices = np.array([sp['price'] for sp in significant_supports])
+            support_touches = np.array([sp['touches'] for sp in significant_supports])
+            shared_buy = (current_close > current_open).astype(np.int64) + (rsi < 70) + volume_confirmation + (bearish_streak < 3)
+            buy_strength, buy_level = score_levels(
+                np.abs(current_low[:, None] - support_prices[None, :]) <= tolerance[:, None],
+                current_close[:, None] > support_prices[None, :] - tolerance[:, None],
+                shared_buy,
+                support_touches
+            )
         
         # SINAIS DE VENDA
-        for resistance in significant_resistances:
-            resistance_price = resistance['price']
-            resistance_strength = resistance['touches']
-            tolerance = current_atr * 0.5
-            
-            conditions_sell = []
-            
-            # 1. Preço próximo à resistência
-            price_near_resistance = abs(current_high - resistance_price) <= tolerance
-            conditions_sell.append(price_near_resistance)
-            
-            # 2. Candle bearish
-            bearish_candle = current_close < current_open
-            conditions_sell.append(bearish_candle)
-            
-            # 3. RSI não está em sobrevenda (> 30)
-            rsi_ok = rsi > 30
-            conditions_sell.append(rsi_ok)
-            
-            # 4. Volume acima da média
-            volume_confirmation = current_volume > avg_volume * 1.2
-            conditions_sell.append(volume_confirmation)
-            
-            # 5. Preço não quebrou a resistência significativamente
-            no_breakout = current_close < resistance_price + tolerance
-            conditions_sell.append(no_breakout)
-            
-            # 6. Trend de curto prazo (últimas 3 velas não são todas bullish)
-            recent_closes = [df_copy.iloc[j]['close'] for j in range(max(0, i-2), i+1)]
-            recent_opens = [df_copy.iloc[j]['open'] for j in range(max(0, i-2), i+1)]
-            bullish_streak = sum(1 for c, o in zip(recent_closes, recent_opens) if c > o)
-            trend_ok = bullish_streak < 3
-            conditions_sell.append(trend_ok)
-            
-            conditions_met = sum(conditions_sell)
-            signal_strength = (conditions_met / len(conditions_sell)) * resistance_strength
-            
-            if conditions_met >= 5 and signal_strength > abs(df_copy.iloc[i]['signal_strength']):
-                df_copy.loc[df_copy.index[i], 'sr_sell'] = True
-                df_copy.loc[df_copy.index[i], 'signal_strength'] = -signal_strength
-                df_copy.loc[df_copy.index[i], 'signal_type'] = f'Resistance_Rejection_{resistance_strength}touches'
+        # 1. Preço próximo à resistência | 2. Candle bearish | 3. RSI > 30 | 4. Volume acima da média
+        # 5. Preço não quebrou a resistência | 6. Últimas 3 velas não são todas bullish
+        sell_strength = np.zeros(n - start)
+        sell_level = np.full(n - start, -1)
+        if significant_resistances:
+            resistance_prices = np.array([r['price'] for r in significant_resistances])
+            resistance_touches = np.array([r['touches'] for r in significant_resistances])
+            shared_sell = (current_close < current_open).astype(np.int64) + (rsi > 30) + volume_confirmation + (bullish_streak < 3)
+            sell_strength, sell_level = score_levels(
+                np.abs(current_high[:, None] - resistance_prices[None, :]) <= tolerance[:, None],
+                current_close[:, None] < resistance_prices[None, :] + tolerance[:, None],
+                shared_sell,
+                resistance_touches
+            )
+        
+        # A venda só prevalece sobre a compra do mesmo candle se for mais forte
+        is_buy = buy_level >= 0
+        is_sell = (sell_level >= 0) & (sell_strength > buy_strength)
+        
+        sr_buy[bars] = is_buy
+        sr_sell[bars] = is_sell
+        signal_strength[bars] = np.where(is_sell, -sell_strength, buy_strength)
+        
+        for j in np.flatnonzero(is_buy & ~is_sell):
+            signal_type[start + j] = f"Support_Bounce_{significant_supports[buy_level[j]]['touches']}touches"
+        for j in np.flatnonzero(is_sell):
+            signal_type[start + j] = f"Resistance_Rejection_{significant_resistances[sell_level[j]]['touches']}touches"
+    
+    df_copy['sr_buy'] = sr_buy
+    df_copy['sr_sell'] = sr_sell
+    df_copy['signal_strength'] = signal_strength
+    df_copy['signal_type'] = signal_type.tolist()
     
     # Armazena níveis detectados
     support_levels = [s['price'] for s in significant_supports]
@@ -333,54 +395,14 @@ def detect_support_resistance_signals(df, n1=5, n2=5, min_touches=2, volume_fact
     
     return df_copy
 
-def get_support_resistance_levels(df, n1=5, n2=5, min_touches=2):
+def get_support_resistance_levels(df, n1=5, n2=5, min_touches=2, ctx: AnalysisContext = None):
     """
     Versão melhorada para extrair apenas os níveis de suporte e resistência.
     """
-    # Detecta pivots
-    support_data = []
-    resistance_data = []
-    
-    for l_idx in range(len(df)):
-        pivot_type = pivotid(df, l_idx, n1, n2)
-        if pivot_type == 1:  # Support
-            support_data.append({
-                'price': df.iloc[l_idx]['low'],
-                'volume': df.iloc[l_idx].get('volume', 1)
-            })
-        elif pivot_type == 2:  # Resistance
-            resistance_data.append({
-                'price': df.iloc[l_idx]['high'],
-                'volume': df.iloc[l_idx].get('volume', 1)
-            })
-    
-    # Agrupa níveis próximos
-    def group_levels(level_data, tolerance_pct=0.3):
-        if not level_data:
-            return []
-        
-        grouped = []
-        sorted_data = sorted(level_data, key=lambda x: x['price'])
-        current_group = [sorted_data[0]]
-        
-        for data in sorted_data[1:]:
-            avg_price = sum(d['price'] for d in current_group) / len(current_group)
-            if abs(data['price'] - avg_price) / avg_price * 100 < tolerance_pct:
-                current_group.append(data)
-            else:
-                if len(current_group) >= min_touches:
-                    group_price = sum(d['price'] for d in current_group) / len(current_group)
-                    grouped.append(group_price)
-                current_group = [data]
-        
-        if len(current_group) >= min_touches:
-            group_price = sum(d['price'] for d in current_group) / len(current_group)
-            grouped.append(group_price)
-        
-        return grouped
-    
-    support_levels = group_levels(support_data)
-    resistance_levels = group_levels(resistance_data)
+    # Detecta pivots e agrupa níveis próximos
+    _, supports, resistances = support_resistance_clusters(df, n1, n2, min_touches, ctx)
+    support_levels = [g['price'] for g in supports]
+    resistance_levels = [g['price'] for g in resistances]
     
     return support_levels + resistance_levels
 
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+from settings import BINANCE_WEIGHT_LIMIT
+
+def klines_weight(limit: int) -> int:
+    """
+    Peso de uma chamada a /api/v3/klines conforme o `limit` pedido.
+    """
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+class WeightLimiter:
+    """
+    Controla o peso de requisições consumido numa janela deslizante de 1 minuto.
+
+    `acquire` (ou `acquire_async`, em corrotinas) espera até haver peso
+    disponível; as duas formas dividem o mesmo orçamento. `sync` ajusta o
+    consumo local com o valor informado pela Binance no header
+    X-MBX-USED-WEIGHT-1M, para que chamadas feitas por outros processos
+    também sejam consideradas. `pause` suspende todas as requisições por um
+    tempo (ex: o Retry-After de um 429/418).
+    """
+
+    def __init__(self, limit: int = BINANCE_WEIGHT_LIMIT, window: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self._events = deque()  # (instante, peso)
+        self._used = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, weight = self._events.popleft()
+            self._used -= weight
+
+    def reserve(self, weight: int = 1) -> float:
+        """
+        Reserva `weight` se houver orçamento e retorna 0, ou retorna quantos
+        segundos esperar antes de tentar de novo.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            if self._used + weight <= self.limit or not self._events:
+                self._events.append((now, weight))
+                self._used += weight
+                return 0.0
+
+            return max(self.window - (now - self._events[0][0]), 0.01)
+
+    def acquire(self, weight: int = 1):
+        while True:
+            wait = self.reserve(weight)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, weight: int = 1):
+        while True:
+            wait = self.reserve(weight)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def sync(self, used_weight: int):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            extra = used_weight - self._used
+            if extra > 0:
+                self._events.append((now, extra))
+                self._used += extra
+
+weight_limiter = WeightLimiter()
@@ -0,0 +1,141 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple
+
+import numpy as np
+
+from settings import ANALYSIS_WORKERS
+from core.context import AnalysisContext
+from core.series import COLUMNS, CandleSeries
+from core.signals import CONFLUENCE_SIGNALS, is_enabled, signal_columns, signal_key
+
+# Com poucos candles o envio para os processos custa mais que os detectores
+PARALLEL_MIN_CANDLES = 2000
+
+SIGNALS_BY_NAME = {entry[0]: entry for entry in CONFLUENCE_SIGNALS}
+
+def share_candles(candles: CandleSeries) -> SharedMemory:
+    """
+    Copia timestamps e OHLCV para um bloco de memória compartilhada
+    (time int64 seguido do bloco float64 (5, n)), lido pelos processos com `attach_candles`.
+    """
+    n = len(candles)
+    shm = SharedMemory(create=True, size=max(1, candles.time.nbytes + candles.values.nbytes))
+    np.ndarray(n, dtype=np.int64, buffer=shm.buf)[:] = candles.time
+    np.ndarray((len(COLUMNS), n), dtype=np.float64, buffer=shm.buf, offset=candles.time.nbytes)[:] = candles.values
+    return shm
+
+def attach_candles(shm: SharedMemory, n: int) -> CandleSeries:
+    """
+    CandleSeries sobre o bloco de `share_candles`, sem cópia.
+    """
+    time = np.ndarray(n, dtype=np.int64, buffer=shm.buf)
+    values = np.ndarray((len(COLUMNS), n), dtype=np.float64, buffer=shm.buf, offset=time.nbytes)
+    return CandleSeries(time, values)
+
+def _run_detector(shm_name: str, n: int, name: str) -> List[Tuple]:
+    """
+    Executado nos processos: roda o detector de sinais `name` (e as buscas de
+    padrões que ele usa) e devolve as entradas do contexto para o processo principal.
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        df = attach_candles(shm, n).frame()
+        ctx = AnalysisContext(df)
+
+        _, _, detector, params, buy_column, sell_column = SIGNALS_BY_NAME[name]
+        signal_columns(df, detector, params, buy_column, sell_column, ctx)
+        results = list(ctx.items())
+
+        # Nenhuma view do bloco pode sobreviver ao close()
+        del df, ctx
+        return results
+    finally:
+        shm.close()
+
+def _ping():
+    return os.getpid()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor(workers: int = ANALYSIS_WORKERS):
+    """
+    Pool de processos do servidor, criado na primeira chamada e já aquecido
+    (processos iniciados e módulos importados). None quando `workers` é 0.
+    """
+    global _executor
+    if workers <= 0:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            for future in [_executor.submit(_ping) for _ in range(workers)]:
+                future.result()
+    return _executor
+
+def _discard_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def run_detectors(candles: CandleSeries, analysis, ctx: AnalysisContext, executor: ProcessPoolExecutor = None) -> bool:
+    """
+    Roda os detectores ativados em `analysis` em paralelo, nos processos do
+    pool, e grava os resultados em `ctx`. `generate_shapes` e `generate_signals`
+    depois só montam as saídas a partir do contexto.
+
+    Os candles vão para os processos por memória compartilhada; cada detector
+    é uma tarefa, então a latência fica próxima à do detector mais lento.
+    Detectores já em cache não são enviados.
+
+    Retorna False quando nada foi enviado (sem pool ou poucos candles) ou
+    quando algum detector falhou no pool; nesse caso nada é gravado em `ctx`
+    e os detectores rodam em série na própria análise.
+    """
+    executor = executor or get_executor()
+    if executor is None or len(candles) < PARALLEL_MIN_CANDLES:
+        return False
+
+    names = [
+        name for name, path, detector, params, _, _ in CONFLUENCE_SIGNALS
+        if is_enabled(analysis, path) and ctx.get(signal_key(detector, params)) is None
+    ]
+    if len(names) < 2:
+        return False
+
+    # Buscas de padrões (as mais lentas) primeiro
+    names.sort(key=lambda name: SIGNALS_BY_NAME[name][1][0] != 'shapes')
+
+    shm = share_candles(candles)
+    futures = []
+    try:
+        futures = [executor.submit(_run_detector, shm.name, len(candles), name) for name in names]
+        results = [future.result() for future in futures]
+    except BrokenProcessPool:
+        logging.exception("[ANALISE] Pool de processos quebrado, detectores em série")
+        _discard_executor(executor)
+        return False
+    except Exception:
+        logging.exception("[ANALISE] Falha de detector no pool, detectores em série")
+        return False
+    finally:
+        # Tarefas ainda em execução leem o bloco: só é removido depois que todas terminarem
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        shm.close()
+        shm.unlink()
+
+    for result in results:
+        for key, value in result:
+            ctx.store(key, value)
+    return True
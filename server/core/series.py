@@ -0,0 +1,156 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Sequence
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+def index_timestamps(index: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Timestamps em segundos (int64) de um DatetimeIndex, o formato enviado ao gráfico.
+
+    Detectores trabalham com índices inteiros de candle; a conversão para
+    timestamp é feita só na serialização, com `index_timestamps(df.index)[i]`.
+    """
+    return index.values.astype('datetime64[s]').astype(np.int64)
+
+class CandleSeries:
+    """
+    Container colunar de candles OHLCV.
+
+    Os preços/volume ficam num único bloco float64 de shape (5, n), uma linha
+    por coluna, e `time` num array int64 com o timestamp de abertura em
+    segundos. `open`, `high`, `low`, `close` e `volume` são views das linhas do
+    bloco, e `frame()` monta um DataFrame sobre o mesmo bloco sem copiá-lo.
+    """
+
+    __slots__ = ("time", "values")
+
+    def __init__(self, time: np.ndarray, values: np.ndarray):
+        self.time = np.ascontiguousarray(time, dtype=np.int64)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+
+    # Construtores
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        return cls(np.empty(0, dtype=np.int64), np.empty((len(COLUMNS), 0)))
+
+    @classmethod
+    def from_klines(cls, data: Sequence[Sequence]) -> "CandleSeries":
+        """
+        Converte a resposta JSON de /api/v3/klines (open time em ms, preços em string).
+        """
+        if len(data) == 0:
+            return cls.empty()
+
+        raw = np.array([k[:6] for k in data], dtype=np.float64)
+        return cls((raw[:, 0] // 1000).astype(np.int64), raw[:, 1:].T)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence]) -> "CandleSeries":
+        """
+        Converte linhas (timestamp, open, high, low, close, volume), ex: do SQLite.
+        """
+        if len(rows) == 0:
+            return cls.empty()
+
+        raw = np.array(rows, dtype=np.float64)
+        return cls(raw[:, 0].astype(np.int64), raw[:, 1:].T)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "CandleSeries":
+        return cls.from_rows([(r["timestamp"], *(r[c] for c in COLUMNS)) for r in records])
+
+    @classmethod
+    def merge(cls, parts: Sequence["CandleSeries"]) -> "CandleSeries":
+        """
+        Junta várias séries em ordem cronológica. Em timestamps repetidos
+        prevalece a última ocorrência.
+        """
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+
+        time = np.concatenate([p.time for p in parts])
+        values = np.concatenate([p.values for p in parts], axis=1)
+
+        _, last = np.unique(time[::-1], return_index=True)
+        keep = len(time) - 1 - last
+        return cls(time[keep], values[:, keep])
+
+    # Acesso
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.values[0]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.values[1]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.values[2]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.values[3]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.values[4]
+
+    def last_timestamp(self):
+        return int(self.time[-1]) if len(self.time) else None
+
+    def fingerprint(self) -> str:
+        """
+        Hash do conteúdo (timestamps e OHLCV): séries com os mesmos candles têm o
+        mesmo fingerprint, independente de como foram obtidas.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.time.tobytes())
+        digest.update(self.values.tobytes())
+        return digest.hexdigest()
+
+    def tail(self, n: int) -> "CandleSeries":
+        return CandleSeries(self.time[-n:], self.values[:, -n:]) if n < len(self) else self
+
+    def closed(self, interval: int, now: float) -> "CandleSeries":
+        """
+        Os candles já fechados em `now`, sem o candle em aberto (`interval` e `now` em segundos).
+        """
+        n = int(np.searchsorted(self.time, now - interval, side='right'))
+        return CandleSeries(self.time[:n], self.values[:, :n]) if n < len(self) else self
+
+    # Conversões
+    def frame(self) -> pd.DataFrame:
+        """
+        DataFrame OHLCV indexado por datetime ('timestamp'), sobre o mesmo bloco de memória.
+
+        Um novo DataFrame é criado a cada chamada; colunas adicionadas pelos
+        detectores não alteram a série.
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(self.time, unit='s'), name='timestamp')
+        return pd.DataFrame(self.values.T, index=index, columns=list(COLUMNS), copy=False)
+
+    def rows(self):
+        return zip(self.time.tolist(), *(row.tolist() for row in self.values))
+
+    def to_records(self) -> List[Dict]:
+        """
+        Lista de dicts {timestamp, open, high, low, close, volume} para serialização JSON.
+        """
+        return [
+            {
+                "timestamp": t,
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v
+            }
+            for t, o, h, l, c, v in self.rows()
+        ]
@@ -1,15 +1,13 @@
 import pandas as pd
 
+from core.context import AnalysisContext
+
 from core.patterns.shapes.sr_levels import get_support_resistance_levels
 from core.patterns.shapes.flags import find_flags_pennants_trendline_df, find_flags_pennants_pips_df
 from core.patterns.shapes.hs import detect_hs_patterns
 from core.patterns.shapes.fibonacci import calculate_fibonacci_lines
 
-def generate_shapes(candles, analysis):
-    df = pd.DataFrame(candles)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-    df.set_index('timestamp', inplace=True)
-
+def generate_shapes(df: pd.DataFrame, analysis, ctx: AnalysisContext = None):
     sr = []
     flag = []
     hs = []
@@ -18,16 +16,17 @@ def generate_shapes(candles, analysis):
     print(analysis['sr'])
 
     if analysis['sr']:
-        sr = get_support_resistance_levels(df)
+        sr = get_support_resistance_levels(df, ctx=ctx)
 
     if analysis['flags']:
-        flag = find_flags_pennants_trendline_df(df)
+        flag = find_flags_pennants_trendline_df(df, ctx=ctx)
 
     if analysis['hs']:
-        hs = detect_hs_patterns(df)
+        hs = detect_hs_patterns(df, ctx=ctx)
 
     if analysis['fibonacci']:
-        fibonacci = calculate_fibonacci_lines(df)
+        # 'fibonacci_points': formato antigo, com um ponto por candle em cada linha
+        fibonacci = calculate_fibonacci_lines(df, compact=not analysis.get('fibonacci_points', False))
 
     return {
         "sr": sr,
@@ -1,4 +1,6 @@
 import logging
+import math
+import numpy as np
 import pandas as pd
 
 from core.patterns.candles import detect_candle_signals
@@ -9,107 +11,106 @@ from core.patterns.shapes.hs import detect_hs_signals
 from core.patterns.shapes.flags import detect_flag_signals
 from core.patterns.shapes.fibonacci import generate_fibonacci_signals
 
+from core.context import AnalysisContext, cached
 from core.evaluate import evaluate_signals
-
-def generate_signals(candles, analysis):
+from core.series import index_timestamps
+
+# Sinais que entram na confluência: (nome, chave de ativação em `analysis`, detector, parâmetros,
+# coluna de compra, coluna de venda). O nome também é a chave do peso em analysis['weights'] (padrão 1).
+CONFLUENCE_SIGNALS = [
+    ('candles', ('candles',), detect_candle_signals, {}, 'candles_buy', 'candles_sell'),
+    ('sr', ('shapes', 'sr'), detect_support_resistance_signals, {}, 'sr_buy', 'sr_sell'),
+    ('flags', ('shapes', 'flags'), detect_flag_signals, {}, 'flags_buy', 'flags_sell'),
+    ('hs', ('shapes', 'hs'), detect_hs_signals, {}, 'hs_buy', 'hs_sell'),
+    ('fibonacci', ('shapes', 'fibonacci'), generate_fibonacci_signals, {}, 'fibonacci_buy', 'fibonacci_sell'),
+    ('bb', ('indicators', 'bb'), bollinger_bands, {'keep_std': False}, 'bb_buy', 'bb_sell'),
+    ('ema', ('indicators', 'ema'), ema_crossover, {}, 'ema_buy', 'ema_sell'),
+    ('rsi', ('indicators', 'rsi'), rsi_signal, {}, 'rsi_buy', 'rsi_sell'),
+    ('macd', ('indicators', 'macd'), macd, {}, 'macd_buy', 'macd_sell'),
+    ('stochastic', ('indicators', 'stochastic'), stochastic, {}, 'stoch_buy', 'stoch_sell'),
+]
+
+# Detectores que reaproveitam as buscas de padrões das formas pelo contexto
+CONTEXT_DETECTORS = (detect_support_resistance_signals, detect_flag_signals, detect_hs_signals)
+
+class AnalysisError(ValueError):
+    """
+    Configuração de análise inválida (400).
+    """
+
+def confluence_weights(analysis):
+    """
+    Pesos de analysis['weights'] por nome de sinal (ausente ou null: todos 1).
+    Levanta `AnalysisError` se não for um objeto de números finitos.
+    """
+    weights = analysis.get('weights') or {}
+    if not isinstance(weights, dict):
+        raise AnalysisError("'weights' deve ser um objeto {sinal: peso}")
+
+    for name, weight in weights.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight):
+            raise AnalysisError(f"Peso inválido para '{name}': {weight!r}")
+    return weights
+
+def is_enabled(analysis, path):
+    value = analysis
+    for key in path:
+        value = value[key]
+    return bool(value)
+
+def signal_key(detector, params):
+    return ('signals', detector.__name__, tuple(sorted(params.items())))
+
+def signal_columns(df: pd.DataFrame, detector, params, buy_column, sell_column, ctx: AnalysisContext = None):
+    """
+    Colunas de compra/venda (float64, somente leitura) de um detector.
+
+    Com um `ctx`, o resultado fica em cache por detector e parâmetros, então
+    análises dos mesmos candles com outras confluências só calculam os
+    detectores que ainda não rodaram. O detector recebe uma cópia rasa de `df`,
+    já que vários acrescentam colunas ao DataFrame recebido.
+    """
+    def compute():
+        kwargs = dict(params, ctx=ctx) if detector in CONTEXT_DETECTORS else params
+        out = detector(df.copy(deep=False), **kwargs)
+
+        columns = []
+        for column in (buy_column, sell_column):
+            values = out[column].to_numpy(dtype=np.float64) if column in out.columns else np.zeros(len(df))
+            values.setflags(write=False)
+            columns.append(values)
+        return tuple(columns)
+
+    return cached(ctx, signal_key(detector, params), compute)
+
+def generate_signals(df: pd.DataFrame, analysis, ctx: AnalysisContext = None, next_timestamp: int = None):
     min_conf_buy = analysis['confluence']['buy']
     min_conf_sell = analysis['confluence']['sell']
 
-    df = pd.DataFrame(candles)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-    df.set_index('timestamp', inplace=True)
-
-    # Análises ativadas
-    if analysis['candles']:
-        df = detect_candle_signals(df)
-
-    if analysis['shapes']['sr']:
-        df = detect_support_resistance_signals(df)
-
-    if analysis['shapes']['flags']:
-        df = detect_flag_signals(df)
-    
-    if analysis['shapes']['fibonacci']:
-        df = generate_fibonacci_signals(df)
-
-    if analysis['shapes']['hs']:
-        df = detect_hs_signals(df)
-
-    if analysis['indicators']['bb']:
-        df = bollinger_bands(df)
-
-    if analysis['indicators']['ema']:
-        df = ema_crossover(df)
-
-    if analysis['indicators']['rsi']:
-        df = rsi_signal(df)
-
-    if analysis['indicators']['macd']:
-        df = macd(df)
-
-    if analysis['indicators']['stochastic']:
-        df = stochastic(df)
-
-    # Lista temporária de sinais brutos
-    buy_signals = []
-    sell_signals = []
-
-    for i in range(len(df) - 1):
-        row = df.iloc[i]
-
-        conf_buy = 0
-        conf_sell = 0
-
-        # Candles
-        if analysis['candles']:
-            conf_buy += int(row.get('candles_buy', False))
-            conf_sell += int(row.get('candles_sell', False))
-
-        # Shapes
-        if analysis['shapes']['sr']:
-            conf_buy += int(row.get('sr_buy', False))
-            conf_sell += int(row.get('sr_sell', False))
-
-        if analysis['shapes']['flags']:
-            conf_buy += int(row.get('flags_buy', False))
-            conf_sell += int(row.get('flags_sell', False))
-
-        if analysis['shapes']['hs']:
-            conf_buy += int(row.get('hs_buy', False))
-            conf_sell += int(row.get('hs_sell', False))
-
-        if analysis['shapes']['fibonacci']:
-            conf_buy += int(row.get('fibonacci_buy', False))
-            conf_sell += int(row.get('fibonacci_sell', False))
-
-        # Indicadores
-        if analysis['indicators']['bb']:
-            conf_buy += int(row.get('bb_buy', False))
-            conf_sell += int(row.get('bb_sell', False))
-
-        if analysis['indicators']['ema']:
-            conf_buy += int(row.get('ema_buy', False))
-            conf_sell += int(row.get('ema_sell', False))
-
-        if analysis['indicators']['rsi']:
-            conf_buy += int(row.get('rsi_buy', False))
-            conf_sell += int(row.get('rsi_sell', False))
-
-        if analysis['indicators']['macd']:
-            conf_buy += int(row.get('macd_buy', False))
-            conf_sell += int(row.get('macd_sell', False))
-
-        if analysis['indicators']['stochastic']:
-            conf_buy += int(row.get('stoch_buy', False))
-            conf_sell += int(row.get('stoch_sell', False))
-
-        next_ts = df.index[i + 1]
-
-        if conf_buy >= min_conf_buy and conf_sell < min_conf_sell:
-            buy_signals.append(int(next_ts.timestamp()))
-
-        elif conf_sell >= min_conf_sell and conf_buy < min_conf_buy:
-            sell_signals.append(int(next_ts.timestamp()))
+    # Confluência: soma (ponderada) das colunas de sinal das análises ativadas
+    weights = confluence_weights(analysis)
+    conf_buy = np.zeros(len(df))
+    conf_sell = np.zeros(len(df))
+
+    for name, path, detector, params, buy_column, sell_column in CONFLUENCE_SIGNALS:
+        if not is_enabled(analysis, path):
+            continue
+
+        buy, sell = signal_columns(df, detector, params, buy_column, sell_column, ctx)
+        weight = weights.get(name, 1)
+        conf_buy += weight * buy
+        conf_sell += weight * sell
+
+    # O sinal do candle i é emitido no candle seguinte; o do último, em `next_timestamp`
+    # (abertura do candle em aberto, que fica fora da análise), se informado
+    buy_mask = (conf_buy >= min_conf_buy) & (conf_sell < min_conf_sell)
+    sell_mask = (conf_sell >= min_conf_sell) & (conf_buy < min_conf_buy)
+
+    next_ts = index_timestamps(df.index)[1:]
+    if next_timestamp is not None and len(df):
+        next_ts = np.append(next_ts, np.int64(next_timestamp))
+    buy_signals = next_ts[buy_mask[:len(next_ts)]].tolist()
+    sell_signals = next_ts[sell_mask[:len(next_ts)]].tolist()
 
     # 🎯 Filtrando com modelo (apenas sinais > 70% de probabilidade de acerto)
     logging.info(f"[SINAIS] Sinais aceitos: {len(buy_signals)} compras | {len(sell_signals)} vendas")
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from settings import CANDLE_STORE_PATH
+from core.series import CandleSeries
+
+class CandleStore:
+    """
+    Armazenamento local de candles OHLCV em SQLite, indexado por (symbol, interval).
+
+    Os timestamps são gravados em segundos (mesmo formato retornado por
+    `fetch_ohlcv`). Gravações usam upsert, então o último candle (ainda aberto)
+    pode ser reescrito a cada sincronização.
+    """
+
+    def __init__(self, path: str = CANDLE_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                create table if not exists candles (
+                    symbol text not null,
+                    interval text not null,
+                    timestamp integer not null,
+                    open real not null,
+                    high real not null,
+                    low real not null,
+                    close real not null,
+                    volume real not null,
+                    primary key (symbol, interval, timestamp)
+                ) without rowid
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def bounds(self, symbol: str, interval: str):
+        """
+        Retorna (primeiro timestamp, último timestamp, quantidade) armazenados.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "select min(timestamp), max(timestamp), count(*) from candles where symbol = ? and interval = ?",
+                (symbol, interval)
+            ).fetchone()
+        return row[0], row[1], row[2]
+
+    def count(self, symbol: str, interval: str, start: int, end: int) -> int:
+        """
+        Quantidade de candles armazenados com timestamp em [start, end] (segundos).
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "select count(*) from candles where symbol = ? and interval = ? and timestamp between ? and ?",
+                (symbol, interval, int(start), int(end))
+            ).fetchone()
+        return row[0]
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        return self.bounds(symbol, interval)[1]
+
+    def upsert(self, symbol: str, interval: str, candles: CandleSeries):
+        if not len(candles):
+            return
+
+        rows = [(symbol, interval, *row) for row in candles.rows()]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "insert or replace into candles values (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def read(self, symbol: str, interval: str, limit: int) -> CandleSeries:
+        """
+        Retorna os `limit` candles mais recentes em ordem cronológica.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                select timestamp, open, high, low, close, volume from candles
+                where symbol = ? and interval = ?
+                order by timestamp desc limit ?
+                """,
+                (symbol, interval, int(limit))
+            ).fetchall()
+
+        rows.reverse()
+        return CandleSeries.from_rows(rows)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> CandleStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandleStore()
+    return _store
@@ -0,0 +1,39 @@
+import logging
+from typing import Dict, Iterator
+
+from core.analysis import generate_analysis_cached
+from core.series import CandleSeries
+
+# Candles por linha do NDJSON
+CANDLE_CHUNK_SIZE = 5000
+
+def candle_chunks(candles: CandleSeries, size: int = CANDLE_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Os candles em blocos de até `size` registros, em ordem cronológica: {"candles": [...]}.
+    Só um bloco é convertido para dicts por vez.
+    """
+    for start in range(0, len(candles), size):
+        chunk = CandleSeries(candles.time[start:start + size], candles.values[:, start:start + size])
+        yield {"candles": chunk.to_records()}
+
+def analysis_stream(symbol, timeframe, limit, candles: CandleSeries, analysis) -> Iterator[Dict]:
+    """
+    Resposta de /analysis em partes, para envio como NDJSON (um objeto por linha).
+
+    Primeiro os candles, em blocos, e só então a análise; depois as formas, os
+    sinais e a avaliação. As chaves são as da resposta única, então juntar
+    todas as linhas (concatenando "candles") reconstrói o mesmo objeto. Se a
+    análise falhar, a última linha é {"error": mensagem}.
+    """
+    yield from candle_chunks(candles)
+
+    try:
+        shapes, buy, sell, buy_eval, sell_eval = generate_analysis_cached(symbol, timeframe, limit, candles, analysis)
+    except Exception as e:
+        logging.exception(f"[ANALISE] Falha na análise de {symbol} {timeframe}")
+        yield {"error": str(e)}
+        return
+
+    yield {"shapes": shapes}
+    yield {"sell": sell, "buy": buy}
+    yield {"evaluate": {"buy": buy_eval, "sell": sell_eval}}
@@ -10,4 +10,19 @@ EXCHANGE_ID = os.getenv("EXCHANGE_ID", "binance")
 TIMERANGE = int(os.getenv("TIMERANGE", "1"))  # converte para int aqui
 LIMIT = calculate_limit(TIMEFRAME, TIMERANGE)
 UPDATE_INTERVAL_SECONDS = int(os.getenv("UPDATE_INTERVAL_SECONDS", 300))
-CHART_PATH = "static/candlestick_chart.png"
\ No newline at end of file
+CHART_PATH = "static/candlestick_chart.png"
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://api.binance.com")
+CANDLE_STORE_PATH = os.getenv("CANDLE_STORE_PATH", "data/candles.db")
+BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", 5000))  # abaixo do limite de 6000/min da Binance
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", 4))
+EXCHANGE_CONNECT_TIMEOUT = float(os.getenv("EXCHANGE_CONNECT_TIMEOUT", 3.05))
+EXCHANGE_READ_TIMEOUT = float(os.getenv("EXCHANGE_READ_TIMEOUT", 10))
+EXCHANGE_MAX_RETRIES = int(os.getenv("EXCHANGE_MAX_RETRIES", 5))
+EXCHANGE_BACKOFF_FACTOR = float(os.getenv("EXCHANGE_BACKOFF_FACTOR", 0.5))
+EXCHANGE_POOL_SIZE = int(os.getenv("EXCHANGE_POOL_SIZE", 10))
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", 128))  # 0 desativa o cache em memória
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "")  # ex: data/analysis.db; vazio desativa o cache em disco
+DETECTOR_CACHE_SIZE = int(os.getenv("DETECTOR_CACHE_SIZE", 256))  # resultados de detectores por série de candles; 0 desativa
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", 0))  # processos para os detectores de cada análise; 0 roda tudo na thread da requisição
+BATCH_MAX_COMBINATIONS = int(os.getenv("BATCH_MAX_COMBINATIONS", 64))  # símbolo x timeframe x timerange por chamada de /analysis/batch
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 4))  # análises simultâneas em /analysis/batch
@@ -0,0 +1,28 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_exchange import FakeExchange
+
+@pytest.fixture
+def exchange(monkeypatch, tmp_path):
+    """
+    FakeExchange ligado ao cliente Binance, com um CandleStore temporário e o
+    relógio de `core.exchange` preso ao `now_ms` do servidor.
+    """
+    from core import binance, exchange as exchange_module, store
+    from core.ratelimit import WeightLimiter
+
+    fake = FakeExchange(now_ms=1_760_000_000_000).start()
+
+    monkeypatch.setattr(binance, "weight_limiter", WeightLimiter())
+    monkeypatch.setattr(binance, "_client", binance.BinanceClient(base_url=fake.url, backoff_factor=0))
+    monkeypatch.setattr(store, "_store", store.CandleStore(str(tmp_path / "candles.db")))
+    monkeypatch.setattr(exchange_module, "time", SimpleNamespace(time=lambda: fake.now_ms / 1000))
+
+    yield fake
+    fake.stop()
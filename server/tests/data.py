@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+def random_ohlc(n: int, seed: int = 0, tick: float = None, gap: float = 0.3) -> pd.DataFrame:
+    """
+    Candles OHLCV aleatórios (passeio aleatório) indexados por datetime de 1 minuto.
+
+    Com `tick`, os preços são arredondados para múltiplos dele, o que gera
+    empates frequentes (corpos nulos, máximas iguais, candles sem range).
+    `gap` é o desvio da abertura em relação ao fechamento anterior.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = np.r_[close[:1], close[:-1]] + rng.normal(0, gap, n)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.5, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.5, n))
+    volume = rng.lognormal(3, 0.8, n)
+
+    if tick:
+        open_, high, low, close = (np.round(a / tick) * tick for a in (open_, high, low, close))
+
+    index = pd.date_range("2024-01-01", periods=n, freq="min", name="timestamp")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+def flat_ohlc(n: int, price: float = 100.0) -> pd.DataFrame:
+    """
+    Candles sem variação (open = high = low = close).
+    """
+    df = random_ohlc(n)
+    df[["open", "high", "low", "close"]] = price
+    return df
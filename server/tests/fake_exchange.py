@@ -0,0 +1,132 @@
+"""
+Servidor HTTP local que imita /api/v3/klines da Binance, para testes e
+benchmarks offline do armazenamento, do backfill e do cliente.
+"""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.limit import candle_open, candles_between, shift_candles
+
+def kline_price(open_ms: int) -> float:
+    # Preço determinístico por timestamp: o mesmo candle sempre tem o mesmo OHLC
+    return 100.0 + (open_ms // 60_000) % 97 + ((open_ms // 3_600_000) % 13) / 10
+
+class FakeExchange:
+    """
+    Klines sintéticos alinhados ao intervalo pedido como na Binance (semanas
+    na segunda, meses no dia 1), até `now_ms` (o último candle está aberto).
+    Segue a semântica de startTime/endTime/limit da Binance (limit padrão 500,
+    máximo 1000).
+
+    `calls` guarda os parâmetros de cada requisição; respostas de erro podem
+    ser enfileiradas em `failures` como (status, headers, corpo). `used_weight`
+    é devolvido em X-MBX-USED-WEIGHT-1M quando não for None. Com `overlap`,
+    respostas com startTime trazem também os `overlap` candles anteriores ao
+    pedido (páginas vizinhas se sobrepõem). `peak_in_flight` é o maior número
+    de requisições atendidas ao mesmo tempo (cada uma dura ao menos `latency`).
+    """
+
+    def __init__(self, now_ms: int = None, latency: float = 0.0):
+        self.now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        self.latency = latency
+        self.calls = []
+        self.failures = deque()
+        self.used_weight = None
+        self.overlap = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def advance(self, ms: int):
+        self.now_ms += ms
+
+    def klines(self, interval: str, limit=500, start_time=None, end_time=None):
+        limit = min(int(limit), 1000)
+        end = min(int(end_time), self.now_ms) if end_time is not None else self.now_ms
+        end_open = candle_open(interval, end)
+
+        if start_time is not None:
+            # Primeiro candle que abre em startTime ou depois
+            first = candle_open(interval, int(start_time))
+            if first < int(start_time):
+                first = shift_candles(interval, first, 1)
+            count = min(candles_between(interval, first, end_open) + 1, limit)
+            if self.overlap and count > 0:
+                first = shift_candles(interval, first, -self.overlap)
+                count += self.overlap
+        else:
+            first = shift_candles(interval, end_open, -(limit - 1))
+            count = limit
+
+        rows = []
+        for t in (shift_candles(interval, first, k) for k in range(count)):
+            if t < 0:
+                continue
+            p = kline_price(t)
+            close_time = shift_candles(interval, t, 1) - 1
+            rows.append([t, str(p), str(p + 2), str(p - 2), str(p + 1), "10", close_time, "0", 1, "0", "0", "0"])
+        return rows
+
+    def _handler(self):
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if exchange.used_weight is not None:
+                    self.send_header('X-MBX-USED-WEIGHT-1M', str(exchange.used_weight))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, str(value))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                with exchange._lock:
+                    exchange.calls.append(query)
+                    failure = exchange.failures.popleft() if exchange.failures else None
+                    exchange.in_flight += 1
+                    exchange.peak_in_flight = max(exchange.peak_in_flight, exchange.in_flight)
+
+                try:
+                    if exchange.latency:
+                        time.sleep(exchange.latency)
+
+                    if failure is not None:
+                        status, headers, body = failure
+                        self._send(status, body, headers)
+                        return
+
+                    rows = exchange.klines(
+                        query['interval'], query.get('limit', 500), query.get('startTime'), query.get('endTime')
+                    )
+                    self._send(200, json.dumps(rows))
+                finally:
+                    with exchange._lock:
+                        exchange.in_flight -= 1
+
+        return Handler
@@ -0,0 +1,51 @@
+"""
+Gera tests/fixtures/sr_golden.json com as saídas da implementação anterior
+de pivots e níveis de S/R (tests/legacy.py). Rodar a partir de server/:
+
+    python -m tests.fixtures.make_sr_golden
+"""
+import json
+import os
+
+from tests import legacy
+from tests.data import random_ohlc
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sr_golden.json")
+
+# (nome, candles, seed, tick)
+SERIES = [
+    ("random", 1000, 11, None),
+    ("ticks", 1000, 12, 0.5),
+]
+
+PARAMS = [
+    {"n1": 5, "n2": 5, "min_touches": 2},
+    {"n1": 3, "n2": 7, "min_touches": 3},
+]
+
+def main():
+    golden = []
+    for name, n, seed, tick in SERIES:
+        df = random_ohlc(n, seed=seed, tick=tick)
+        cases = []
+        for params in PARAMS:
+            pivots, supports, resistances = legacy.support_resistance_clusters(df, **params)
+            cases.append({
+                "params": params,
+                "pivots": [int(p) for p in pivots],
+                "supports": supports,
+                "resistances": resistances,
+                "levels": legacy.get_support_resistance_levels(df, **params),
+            })
+
+        golden.append({
+            "name": name,
+            "candles": {column: df[column].tolist() for column in ("open", "high", "low", "close", "volume")},
+            "cases": cases,
+        })
+
+    with open(PATH, "w") as f:
+        json.dump(golden, f)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,777 @@
+"""
+Implementações anteriores às versões vetorizadas, mantidas apenas como
+referência nos testes de equivalência e nos benchmarks.
+"""
+
+# Padrões de candle (core.patterns.candles), um candle por vez
+def engulfing(df):
+    df['engulfing'] = 0
+    for i in range(1, len(df)):
+        prev, curr = df.iloc[i-1], df.iloc[i]
+        if (prev['close'] < prev['open'] and curr['open'] < curr['close'] and curr['open'] < prev['close'] and curr['close'] > prev['open']):
+            df.at[df.index[i], 'engulfing'] = 1  # Bullish
+        elif (prev['close'] > prev['open'] and curr['open'] > curr['close'] and curr['open'] > prev['close'] and curr['close'] < prev['open']):
+            df.at[df.index[i], 'engulfing'] = -1  # Bearish
+    return df
+
+def hammer(df):
+    df['hammer'] = 0
+    for i in range(len(df)):
+        c = df.iloc[i]
+        body = abs(c['close'] - c['open'])
+        lower_wick = min(c['open'], c['close']) - c['low']
+        upper_wick = c['high'] - max(c['open'], c['close'])
+        if lower_wick > 2 * body and upper_wick < body:
+            df.at[df.index[i], 'hammer'] = 1
+    return df
+
+def doji(df):
+    df['doji'] = 0
+    for i in range(len(df)):
+        c = df.iloc[i]
+        body = abs(c['close'] - c['open'])
+        total_range = c['high'] - c['low']
+        if total_range > 0 and body < 0.1 * total_range:
+            df.at[df.index[i], 'doji'] = 1
+    return df
+
+def morning_star(df):
+    df['morning_star'] = 0
+    for i in range(2, len(df)):
+        c1, c2, c3 = df.iloc[i-2], df.iloc[i-1], df.iloc[i]
+        bearish_c1 = c1['close'] < c1['open'] and (c1['open'] - c1['close']) > (c1['high'] - c1['low']) * 0.6
+        small_body_c2 = abs(c2['close'] - c2['open']) < (c2['high'] - c2['low']) * 0.3
+        gap_down_c2 = c2['high'] < c1['close']
+        bullish_c3 = c3['close'] > c3['open'] and (c3['close'] - c3['open']) > (c3['high'] - c3['low']) * 0.6
+        close_above_mid_c1 = c3['close'] > (c1['open'] + c1['close']) / 2
+
+        if bearish_c1 and small_body_c2 and gap_down_c2 and bullish_c3 and close_above_mid_c1:
+            df.at[df.index[i], 'morning_star'] = 1
+    return df
+
+def evening_star(df):
+    df['evening_star'] = 0
+    for i in range(2, len(df)):
+        c1, c2, c3 = df.iloc[i-2], df.iloc[i-1], df.iloc[i]
+        bullish_c1 = c1['close'] > c1['open'] and (c1['close'] - c1['open']) > (c1['high'] - c1['low']) * 0.6
+        small_body_c2 = abs(c2['close'] - c2['open']) < (c2['high'] - c2['low']) * 0.3
+        gap_up_c2 = c2['low'] > c1['close']
+        bearish_c3 = c3['close'] < c3['open'] and (c3['open'] - c3['close']) > (c3['high'] - c3['low']) * 0.6
+        close_below_mid_c1 = c3['close'] < (c1['open'] + c1['close']) / 2
+
+        if bullish_c1 and small_body_c2 and gap_up_c2 and bearish_c3 and close_below_mid_c1:
+            df.at[df.index[i], 'evening_star'] = -1
+    return df
+
+def harami(df):
+    df['harami'] = 0
+    for i in range(1, len(df)):
+        prev, curr = df.iloc[i-1], df.iloc[i]
+        if (prev['close'] < prev['open'] and
+            curr['open'] < curr['close'] and
+            curr['low'] > prev['close'] and
+            curr['high'] < prev['open'] and
+            abs(prev['close'] - prev['open']) > 2 * abs(curr['close'] - curr['open'])):
+            df.at[df.index[i], 'harami'] = 1
+        elif (prev['close'] > prev['open'] and
+              curr['open'] > curr['close'] and
+              curr['low'] > prev['open'] and
+              curr['high'] < prev['close'] and
+              abs(prev['close'] - prev['open']) > 2 * abs(curr['close'] - curr['open'])):
+            df.at[df.index[i], 'harami'] = -1
+    return df
+
+def inverted_hammer(df):
+    df['inverted_hammer'] = 0
+    for i in range(len(df)):
+        c = df.iloc[i]
+        body = abs(c['close'] - c['open'])
+        upper_wick = c['high'] - max(c['open'], c['close'])
+        lower_wick = min(c['open'], c['close']) - c['low']
+        if upper_wick > 2 * body and lower_wick < body and body > 0:
+            df.at[df.index[i], 'inverted_hammer'] = 1
+    return df
+
+CANDLE_PATTERNS = {
+    'engulfing': engulfing,
+    'hammer': hammer,
+    'doji': doji,
+    'morning_star': morning_star,
+    'evening_star': evening_star,
+    'harami': harami,
+    'inverted_hammer': inverted_hammer,
+}
+
+def detect_candle_signals(df):
+    for fn in CANDLE_PATTERNS.values():
+        df = fn(df)
+
+    df['candles_buy'] = (df['engulfing'] == 1) | \
+                        (df['hammer'] == 1) | \
+                        (df['morning_star'] == 1) | \
+                        (df['harami'] == 1) | \
+                        (df['inverted_hammer'] == 1)
+
+    df['candles_sell'] = (df['engulfing'] == 1) | \
+                         (df['evening_star'] == 1) | \
+                         (df['harami'] == 1)
+    return df
+
+# Extremos por janela móvel (utils.rolling_window), um candle por vez
+def rw_extremes(data, order):
+    from utils.rolling_window import rw_bottom, rw_top
+
+    tops = []
+    bottoms = []
+    for i in range(len(data)):
+        if rw_top(data, i, order):
+            tops.append([i, i - order, data[i - order]])
+        if rw_bottom(data, i, order):
+            bottoms.append([i, i - order, data[i - order]])
+    return tops, bottoms
+
+# Suporte e resistência (core.patterns.shapes.sr_levels)
+def pivotid(df, l, n1, n2):
+    l = int(l)
+    n1 = int(n1)
+    n2 = int(n2)
+
+    if l - n1 < 0 or l + n2 >= len(df):
+        return 0
+
+    pividlow = 1
+    pividhigh = 1
+
+    for i in range(l - n1, l + n2 + 1):
+        if df.iloc[l]['low'] > df.iloc[i]['low']:
+            pividlow = 0
+            break
+
+    for i in range(l - n1, l + n2 + 1):
+        if df.iloc[l]['high'] < df.iloc[i]['high']:
+            pividhigh = 0
+            break
+
+    if pividlow and pividhigh:
+        return 3
+    elif pividlow:
+        return 1
+    elif pividhigh:
+        return 2
+    else:
+        return 0
+
+def group_and_count_touches(level_data, min_touches=2, tolerance_pct=0.3):
+    if not level_data:
+        return []
+
+    grouped_levels = []
+    sorted_data = sorted(level_data, key=lambda x: x['price'])
+
+    current_group = [sorted_data[0]]
+
+    for data in sorted_data[1:]:
+        avg_price = sum(d['price'] for d in current_group) / len(current_group)
+        if abs(data['price'] - avg_price) / avg_price * 100 < tolerance_pct:
+            current_group.append(data)
+        else:
+            if len(current_group) >= min_touches:
+                group_price = sum(d['price'] for d in current_group) / len(current_group)
+                group_volume = sum(d['volume'] for d in current_group)
+                grouped_levels.append({
+                    'price': group_price,
+                    'touches': len(current_group),
+                    'volume': group_volume,
+                    'strength': len(current_group) * group_volume
+                })
+            current_group = [data]
+
+    if len(current_group) >= min_touches:
+        group_price = sum(d['price'] for d in current_group) / len(current_group)
+        group_volume = sum(d['volume'] for d in current_group)
+        grouped_levels.append({
+            'price': group_price,
+            'touches': len(current_group),
+            'volume': group_volume,
+            'strength': len(current_group) * group_volume
+        })
+
+    return grouped_levels
+
+def support_resistance_clusters(df, n1=5, n2=5, min_touches=2):
+    pivots = [pivotid(df, l_idx, n1, n2) for l_idx in range(len(df))]
+
+    support_data = []
+    resistance_data = []
+    for i, pivot in enumerate(pivots):
+        if pivot == 1:
+            support_data.append({'price': df.iloc[i]['low'], 'volume': df.iloc[i].get('volume', 1)})
+        elif pivot == 2:
+            resistance_data.append({'price': df.iloc[i]['high'], 'volume': df.iloc[i].get('volume', 1)})
+
+    return (
+        pivots,
+        group_and_count_touches(support_data, min_touches),
+        group_and_count_touches(resistance_data, min_touches),
+    )
+
+def get_support_resistance_levels(df, n1=5, n2=5, min_touches=2):
+    _, supports, resistances = support_resistance_clusters(df, n1, n2, min_touches)
+    return [g['price'] for g in supports] + [g['price'] for g in resistances]
+
+def detect_support_resistance_signals(df, n1=5, n2=5, min_touches=2):
+    import pandas as pd
+    from core.patterns.shapes.sr_levels import calculate_atr, calculate_momentum_confirmation
+
+    df_copy = df.copy()
+    df_copy['atr'] = calculate_atr(df_copy)
+
+    pivots, significant_supports, significant_resistances = support_resistance_clusters(df_copy, n1, n2, min_touches)
+    df_copy['pivot'] = pivots
+
+    significant_supports.sort(key=lambda x: x['strength'], reverse=True)
+    significant_resistances.sort(key=lambda x: x['strength'], reverse=True)
+    significant_supports = significant_supports[:8]
+    significant_resistances = significant_resistances[:8]
+
+    df_copy['sr_buy'] = False
+    df_copy['sr_sell'] = False
+    df_copy['signal_strength'] = 0.0
+    df_copy['signal_type'] = ''
+
+    for i in range(max(20, n1), len(df_copy)):
+        current_close = df_copy.iloc[i]['close']
+        current_open = df_copy.iloc[i]['open']
+        current_high = df_copy.iloc[i]['high']
+        current_low = df_copy.iloc[i]['low']
+        current_volume = df_copy.iloc[i].get('volume', 1)
+        current_atr = df_copy.iloc[i]['atr'] if not pd.isna(df_copy.iloc[i]['atr']) else 0.01
+
+        avg_volume = df_copy['volume'].iloc[max(0, i-20):i].mean() if 'volume' in df_copy.columns else 1
+        rsi = calculate_momentum_confirmation(df_copy, i)
+
+        recent_closes = [df_copy.iloc[j]['close'] for j in range(max(0, i-2), i+1)]
+        recent_opens = [df_copy.iloc[j]['open'] for j in range(max(0, i-2), i+1)]
+
+        for support in significant_supports:
+            support_price = support['price']
+            support_strength = support['touches']
+            tolerance = current_atr * 0.5
+
+            conditions_buy = [
+                abs(current_low - support_price) <= tolerance,
+                current_close > current_open,
+                rsi < 70,
+                current_volume > avg_volume * 1.2,
+                current_close > support_price - tolerance,
+                sum(1 for c, o in zip(recent_closes, recent_opens) if c < o) < 3,
+            ]
+
+            conditions_met = sum(conditions_buy)
+            signal_strength = (conditions_met / len(conditions_buy)) * support_strength
+
+            if conditions_met >= 5 and signal_strength > df_copy.iloc[i]['signal_strength']:
+                df_copy.loc[df_copy.index[i], 'sr_buy'] = True
+                df_copy.loc[df_copy.index[i], 'signal_strength'] = signal_strength
+                df_copy.loc[df_copy.index[i], 'signal_type'] = f'Support_Bounce_{support_strength}touches'
+
+        for resistance in significant_resistances:
+            resistance_price = resistance['price']
+            resistance_strength = resistance['touches']
+            tolerance = current_atr * 0.5
+
+            conditions_sell = [
+                abs(current_high - resistance_price) <= tolerance,
+                current_close < current_open,
+                rsi > 30,
+                current_volume > avg_volume * 1.2,
+                current_close < resistance_price + tolerance,
+                sum(1 for c, o in zip(recent_closes, recent_opens) if c > o) < 3,
+            ]
+
+            conditions_met = sum(conditions_sell)
+            signal_strength = (conditions_met / len(conditions_sell)) * resistance_strength
+
+            if conditions_met >= 5 and signal_strength > abs(df_copy.iloc[i]['signal_strength']):
+                df_copy.loc[df_copy.index[i], 'sr_sell'] = True
+                df_copy.loc[df_copy.index[i], 'signal_strength'] = -signal_strength
+                df_copy.loc[df_copy.index[i], 'signal_type'] = f'Resistance_Rejection_{resistance_strength}touches'
+
+    support_levels = [s['price'] for s in significant_supports]
+    resistance_levels = [r['price'] for r in significant_resistances]
+
+    df_copy['support_levels_detected'] = [support_levels] * len(df_copy)
+    df_copy['resistance_levels_detected'] = [resistance_levels] * len(df_copy)
+
+    return df_copy
+
+# Pontos perceptualmente importantes (utils.perceptually_important), reescaneando todos os segmentos
+def find_pips(data, n_pips, dist_measure):
+    pips_x = [0, len(data) - 1]
+    pips_y = [data[0], data[-1]]
+
+    for curr_point in range(2, n_pips):
+
+        md = 0.0
+        md_i = -1
+        insert_index = -1
+
+        for k in range(0, curr_point - 1):
+
+            left_adj = k
+            right_adj = k + 1
+
+            time_diff = pips_x[right_adj] - pips_x[left_adj]
+            price_diff = pips_y[right_adj] - pips_y[left_adj]
+            slope = price_diff / time_diff
+            intercept = pips_y[left_adj] - pips_x[left_adj] * slope
+
+            for i in range(pips_x[left_adj] + 1, pips_x[right_adj]):
+
+                d = 0.0
+                if dist_measure == 1:
+                    d = ((pips_x[left_adj] - i) ** 2 + (pips_y[left_adj] - data[i]) ** 2) ** 0.5
+                    d += ((pips_x[right_adj] - i) ** 2 + (pips_y[right_adj] - data[i]) ** 2) ** 0.5
+                elif dist_measure == 2:
+                    d = abs((slope * i + intercept) - data[i]) / (slope ** 2 + 1) ** 0.5
+                else:
+                    d = abs((slope * i + intercept) - data[i])
+
+                if d > md:
+                    md = d
+                    md_i = i
+                    insert_index = right_adj
+
+        pips_x.insert(insert_index, md_i)
+        pips_y.insert(insert_index, data[md_i])
+
+    return pips_x, pips_y
+
+# Linhas de tendência (utils.trendline_automation), inclinação otimizada por passos
+def check_trend_line(support, pivot, slope, y):
+    import numpy as np
+
+    intercept = -slope * pivot + y[pivot]
+    diffs = slope * np.arange(len(y)) + intercept - y
+
+    if support and diffs.max() > 1e-5:
+        return -1.0
+    elif not support and diffs.min() < -1e-5:
+        return -1.0
+    return (diffs ** 2.0).sum()
+
+def optimize_slope(support, pivot, init_slope, y):
+    slope_unit = (y.max() - y.min()) / len(y)
+
+    opt_step = 1.0
+    min_step = 0.0001
+    curr_step = opt_step
+
+    best_slope = init_slope
+    best_err = check_trend_line(support, pivot, init_slope, y)
+    assert best_err >= 0.0
+
+    get_derivative = True
+    derivative = None
+    while curr_step > min_step:
+        if get_derivative:
+            slope_change = best_slope + slope_unit * min_step
+            test_err = check_trend_line(support, pivot, slope_change, y)
+            derivative = test_err - best_err
+
+            if test_err < 0.0:
+                slope_change = best_slope - slope_unit * min_step
+                test_err = check_trend_line(support, pivot, slope_change, y)
+                derivative = best_err - test_err
+
+            if test_err < 0.0:
+                raise Exception("Derivative failed. Check your data. ")
+
+            get_derivative = False
+
+        if derivative > 0.0:
+            test_slope = best_slope - slope_unit * curr_step
+        else:
+            test_slope = best_slope + slope_unit * curr_step
+
+        test_err = check_trend_line(support, pivot, test_slope, y)
+        if test_err < 0 or test_err >= best_err:
+            curr_step *= 0.5
+        else:
+            best_err = test_err
+            best_slope = test_slope
+            get_derivative = True
+
+    return (best_slope, -best_slope * pivot + y[pivot])
+
+def fit_trendlines_single(data):
+    import numpy as np
+
+    x = np.arange(len(data))
+    coefs = np.polyfit(x, data, 1)
+    line_points = coefs[0] * x + coefs[1]
+
+    upper_pivot = (data - line_points).argmax()
+    lower_pivot = (data - line_points).argmin()
+
+    support_coefs = optimize_slope(True, lower_pivot, coefs[0], data)
+    resist_coefs = optimize_slope(False, upper_pivot, coefs[0], data)
+    return (support_coefs, resist_coefs)
+
+# Bandeiras por linhas de tendência (core.patterns.shapes.flags), reajustando a janela a cada candle
+def check_bull_pattern_trendline(pending, data, i, fit):
+    if data[pending.tip_x + 1:i].max() > pending.tip_y:
+        return False
+
+    flag_min = data[pending.tip_x:i].min()
+
+    pole_height = pending.tip_y - pending.base_y
+    pole_width = pending.tip_x - pending.base_x
+
+    flag_height = pending.tip_y - flag_min
+    flag_width = i - pending.tip_x
+
+    if flag_width > pole_width * 0.5:
+        return False
+    if flag_height > pole_height * 0.75:
+        return False
+
+    (support_slope, support_intercept), (resist_slope, resist_intercept) = fit(data[pending.tip_x:i])
+
+    current_resist = resist_intercept + resist_slope * (flag_width + 1)
+    if data[i] <= current_resist:
+        return False
+
+    pending.pennant = support_slope > 0
+    pending.conf_x = i
+    pending.conf_y = data[i]
+    pending.flag_width = flag_width
+    pending.flag_height = flag_height
+    pending.pole_width = pole_width
+    pending.pole_height = pole_height
+
+    pending.support_slope = support_slope
+    pending.support_intercept = support_intercept
+    pending.resist_slope = resist_slope
+    pending.resist_intercept = resist_intercept
+    return True
+
+def check_bear_pattern_trendline(pending, data, i, fit):
+    if data[pending.tip_x + 1:i].min() < pending.tip_y:
+        return False
+
+    flag_max = data[pending.tip_x:i].max()
+
+    pole_height = pending.base_y - pending.tip_y
+    pole_width = pending.tip_x - pending.base_x
+
+    flag_height = flag_max - pending.tip_y
+    flag_width = i - pending.tip_x
+
+    if flag_width > pole_width * 0.5:
+        return False
+    if flag_height > pole_height * 0.75:
+        return False
+
+    (support_slope, support_intercept), (resist_slope, resist_intercept) = fit(data[pending.tip_x:i])
+
+    current_support = support_intercept + support_slope * (flag_width + 1)
+    if data[i] >= current_support:
+        return False
+
+    pending.pennant = resist_slope < 0
+    pending.conf_x = i
+    pending.conf_y = data[i]
+    pending.flag_width = flag_width
+    pending.flag_height = flag_height
+    pending.pole_width = pole_width
+    pending.pole_height = pole_height
+
+    pending.support_slope = support_slope
+    pending.support_intercept = support_intercept
+    pending.resist_slope = resist_slope
+    pending.resist_intercept = resist_intercept
+    return True
+
+def find_flags_pennants_trendline(data, order, fit=fit_trendlines_single):
+    """
+    `fit` é a função de ajuste das linhas (por padrão a iterativa acima).
+    """
+    from core.patterns.shapes.flags import FlagPattern
+    from utils.rolling_window import rw_bottom, rw_top
+
+    pending_bull = None
+    pending_bear = None
+    last_bottom = -1
+    last_top = -1
+
+    bull_pennants = []
+    bear_pennants = []
+    bull_flags = []
+    bear_flags = []
+    for i in range(len(data)):
+        if rw_top(data, i, order):
+            last_top = i - order
+            if last_bottom != -1:
+                pending_bull = FlagPattern(last_bottom, data[last_bottom], tip_x=last_top, tip_y=data[last_top])
+
+        if rw_bottom(data, i, order):
+            last_bottom = i - order
+            if last_top != -1:
+                pending_bear = FlagPattern(last_top, data[last_top], tip_x=last_bottom, tip_y=data[last_bottom])
+
+        if pending_bear is not None and check_bear_pattern_trendline(pending_bear, data, i, fit):
+            (bear_pennants if pending_bear.pennant else bear_flags).append(pending_bear)
+            pending_bear = None
+
+        if pending_bull is not None and check_bull_pattern_trendline(pending_bull, data, i, fit):
+            (bull_pennants if pending_bull.pennant else bull_flags).append(pending_bull)
+            pending_bull = None
+
+    return bull_flags, bear_flags, bull_pennants, bear_pennants
+
+# Ombro-cabeça-ombro (core.patterns.shapes.hs), extremos e padrões recalculados a cada candle
+def find_hs_patterns(data, order, early_find=False):
+    from collections import deque
+
+    from core.patterns.shapes.hs import check_hs_pattern, check_ihs_pattern
+    from utils.rolling_window import rw_bottom, rw_top
+
+    last_is_top = False
+    recent_extrema = deque(maxlen=5)
+    recent_types = deque(maxlen=5)
+
+    hs_lock = False
+    ihs_lock = False
+
+    ihs_patterns = []
+    hs_patterns = []
+    for i in range(len(data)):
+        if rw_top(data, i, order):
+            recent_extrema.append(i - order)
+            recent_types.append(1)
+            ihs_lock = False
+            last_is_top = True
+
+        if rw_bottom(data, i, order):
+            recent_extrema.append(i - order)
+            recent_types.append(-1)
+            hs_lock = False
+            last_is_top = False
+
+        if len(recent_extrema) < 5:
+            continue
+
+        hs_alternating = True
+        ihs_alternating = True
+
+        if last_is_top:
+            for j in range(2, 5):
+                if recent_types[j] == recent_types[j - 1]:
+                    ihs_alternating = False
+            for j in range(1, 4):
+                if recent_types[j] == recent_types[j - 1]:
+                    hs_alternating = False
+
+            ihs_extrema = list(recent_extrema)[1:5]
+            hs_extrema = list(recent_extrema)[0:4]
+        else:
+            for j in range(2, 5):
+                if recent_types[j] == recent_types[j - 1]:
+                    hs_alternating = False
+            for j in range(1, 4):
+                if recent_types[j] == recent_types[j - 1]:
+                    ihs_alternating = False
+
+            ihs_extrema = list(recent_extrema)[0:4]
+            hs_extrema = list(recent_extrema)[1:5]
+
+        ihs_pat = None if ihs_lock or not ihs_alternating else check_ihs_pattern(ihs_extrema, data, i, early_find)
+        hs_pat = None if hs_lock or not hs_alternating else check_hs_pattern(hs_extrema, data, i, early_find)
+
+        if hs_pat is not None:
+            hs_lock = True
+            hs_patterns.append(hs_pat)
+
+        if ihs_pat is not None:
+            ihs_lock = True
+            ihs_patterns.append(ihs_pat)
+
+    return hs_patterns, ihs_patterns
+
+def detect_hs_patterns(df, order=20):
+    hs_patterns, ihs_patterns = find_hs_patterns(df['close'].values, order)
+
+    patterns = []
+    for pattern_list, pattern_type in ((hs_patterns, "head_shoulders"), (ihs_patterns, "inverse_head_shoulders")):
+        for pat in pattern_list:
+            points = [
+                (pat.start_i, pat.neck_start),
+                (pat.l_shoulder, pat.l_shoulder_p),
+                (pat.l_armpit, pat.l_armpit_p),
+                (pat.head, pat.head_p),
+                (pat.r_armpit, pat.r_armpit_p),
+                (pat.r_shoulder, pat.r_shoulder_p),
+                (pat.break_i, pat.break_p),
+            ]
+            patterns.append({
+                "points": [[df.index[i].timestamp(), float(p)] for i, p in points],
+                "neckline": [
+                    [df.index[pat.l_armpit].timestamp(), float(pat.l_armpit_p)],
+                    [df.index[pat.r_armpit].timestamp(), float(pat.r_armpit_p)]
+                ],
+                "type": pattern_type
+            })
+    return patterns
+
+def detect_hs_signals(df):
+    df['hs_buy'] = 0
+    df['hs_sell'] = 0
+
+    hs_patterns, ihs_patterns = find_hs_patterns(df['close'].values, 20)
+    for pat in hs_patterns:
+        df.at[df.index[pat.break_i], 'hs_sell'] = -1
+    for pat in ihs_patterns:
+        df.at[df.index[pat.break_i], 'hs_buy'] = 1
+    return df
+
+# Bandas de Bollinger (core.patterns.indicators), sinais um candle por vez
+def bollinger_bands(df, window=20, num_std=2):
+    import pandas as pd
+
+    df['BB_Middle'] = df['close'].rolling(window=window, min_periods=1).mean()
+    df['BB_Std'] = df['close'].rolling(window=window, min_periods=1).std()
+    df['BB_Upper'] = df['BB_Middle'] + num_std * df['BB_Std']
+    df['BB_Lower'] = df['BB_Middle'] - num_std * df['BB_Std']
+
+    df['bb_buy'] = 0
+    df['bb_sell'] = 0
+
+    for i in range(1, len(df)):
+        current_row = df.iloc[i]
+        prev_row = df.iloc[i-1]
+
+        if pd.isna(current_row['BB_Upper']) or pd.isna(current_row['BB_Lower']):
+            continue
+
+        if current_row['close'] <= current_row['BB_Lower']:
+            df.at[df.index[i], 'bb_buy'] = 1
+        elif prev_row['close'] <= prev_row['BB_Lower'] and current_row['close'] > current_row['BB_Lower']:
+            df.at[df.index[i], 'bb_buy'] = 1
+        elif prev_row['close'] < prev_row['BB_Middle'] and current_row['close'] > current_row['BB_Middle']:
+            df.at[df.index[i], 'bb_buy'] = 1
+
+        if current_row['close'] >= current_row['BB_Upper']:
+            df.at[df.index[i], 'bb_sell'] = 1
+        elif prev_row['close'] >= prev_row['BB_Upper'] and current_row['close'] < current_row['BB_Upper']:
+            df.at[df.index[i], 'bb_sell'] = 1
+        elif prev_row['close'] > prev_row['BB_Middle'] and current_row['close'] < current_row['BB_Middle']:
+            df.at[df.index[i], 'bb_sell'] = 1
+
+    return df
+
+# Fibonacci (core.patterns.shapes.fibonacci), estado dos níveis um candle por vez e um ponto por candle nas linhas
+FIB_LEVELS = [0.0, 0.236, 0.382, 0.5, 0.618, 0.786, 1.0]
+ACTIVE_LEVELS = [0.382, 0.5]
+
+def generate_fibonacci_signals(df, lookback_period=100):
+    import pandas as pd
+
+    df = df.copy()
+    df['fibonacci_buy'] = False
+    df['fibonacci_sell'] = False
+
+    df['high_max'] = df['high'].rolling(window=lookback_period).max()
+    df['low_min'] = df['low'].rolling(window=lookback_period).min()
+
+    level_indices = [FIB_LEVELS.index(lvl) for lvl in ACTIVE_LEVELS]
+    order_array = [False] * len(FIB_LEVELS)
+
+    for i in range(lookback_period, len(df)):
+        high = df['high_max'].iloc[i]
+        low = df['low_min'].iloc[i]
+
+        if pd.isna(high) or pd.isna(low):
+            continue
+
+        diff = high - low
+        fib_prices = [low + level * diff for level in FIB_LEVELS]
+
+        current_low = df['low'].iloc[i]
+        current_high = df['high'].iloc[i]
+
+        for j in level_indices:
+            if current_low <= fib_prices[j] and not order_array[j]:
+                df.at[df.index[i], 'fibonacci_buy'] = True
+                order_array[j] = True
+
+            if j < len(FIB_LEVELS) - 1:
+                if current_high >= fib_prices[j + 1] and order_array[j]:
+                    df.at[df.index[i], 'fibonacci_sell'] = True
+                    order_array[j] = False
+
+    return df
+
+def calculate_fibonacci_lines(df, lookback_period=100):
+    import pandas as pd
+
+    df = df.copy()
+    df['high_max'] = df['high'].rolling(window=lookback_period).max()
+    df['low_min'] = df['low'].rolling(window=lookback_period).min()
+
+    high = df['high_max'].dropna().iloc[-1]
+    low = df['low_min'].dropna().iloc[-1]
+    diff = high - low
+
+    fib_prices = [low + level * diff for level in FIB_LEVELS]
+
+    if isinstance(df.index[0], pd.Timestamp):
+        times = [int(ts.timestamp()) for ts in df.index]
+    else:
+        times = df.index.tolist()
+
+    lines_data = {}
+    for level, price in zip(FIB_LEVELS, fib_prices):
+        lines_data[level] = [{"time": t, "value": price} for t in times]
+
+    return lines_data
+
+# Avaliação de sinais (core.evaluate), um sinal por vez
+def evaluate_signals(df, signals, direction='buy', future_candles=10):
+    import pandas as pd
+
+    hits = 0
+    misses = 0
+    total = len(signals)
+
+    for ts in signals:
+        entry_time = pd.to_datetime(ts, unit='s')
+        idx = df.index.get_indexer([entry_time], method='nearest')[0]
+
+        if idx + future_candles >= len(df):
+            total -= 1
+            continue
+
+        entry_open = df.iloc[idx]['open']
+        exit_close = df.iloc[idx + future_candles]['close']
+
+        if direction == 'buy':
+            success = exit_close > entry_open
+        elif direction == 'sell':
+            success = exit_close < entry_open
+        else:
+            raise ValueError("Direction must be 'buy' or 'sell'")
+
+        if success:
+            hits += 1
+        else:
+            misses += 1
+
+    assertiveness = (hits / total * 100) if total > 0 else 0
+
+    return {
+        'total': total,
+        'hits': hits,
+        'misses': misses,
+        'assertiveness': round(assertiveness, 2)
+    }
@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import core.analysis as analysis_module
+from core.analysis import generate_analysis, generate_analysis_cached
+from core.cache import AnalysisCache, DiskCache, analysis_key
+from core.series import CandleSeries, index_timestamps
+from core.signals import generate_signals
+
+from tests.data import random_ohlc
+
+ANALYSIS = {
+    "candles": True,
+    "confluence": {"buy": 1, "sell": 1},
+    "shapes": {"sr": True, "flags": False, "hs": False, "fibonacci": True},
+    "indicators": {"bb": False, "ema": True, "rsi": True, "macd": False, "stochastic": False},
+}
+
+def series(n: int, seed: int = 0) -> CandleSeries:
+    df = random_ohlc(n, seed)
+    return CandleSeries(index_timestamps(df.index), df.to_numpy().T)
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = AnalysisCache(maxsize=16)
+    monkeypatch.setattr(analysis_module, "get_analysis_cache", lambda: cache)
+    return cache
+
+def test_closed_drops_open_candle():
+    candles = series(10)
+    last = candles.last_timestamp()
+
+    assert len(candles.closed(60, last + 30)) == 9
+    assert candles.closed(60, last + 60) is candles
+    assert len(candles.closed(60, candles.time[0])) == 0
+
+def test_open_candle_updates_reuse_cached_result(cache):
+    candles = series(300)
+    now = candles.last_timestamp() + 30
+
+    first = generate_analysis_cached("BTCUSDT", "1m", 300, candles, ANALYSIS, now=now)
+
+    # Nova sincronização: o candle em aberto mudou, os fechados não
+    updated = CandleSeries(candles.time, candles.values.copy())
+    updated.values[1:4, -1] *= 1.05
+    assert generate_analysis_cached("BTCUSDT", "1m", 300, updated, ANALYSIS, now=now + 20) is first
+    assert len(cache.memory) == 1
+
+    closed = candles.closed(60, now)
+    assert first == generate_analysis(closed, ANALYSIS, next_timestamp=candles.last_timestamp())
+
+def test_closing_candle_invalidates(cache):
+    candles = series(300)
+    now = candles.last_timestamp() + 30
+
+    first = generate_analysis_cached("BTCUSDT", "1m", 300, candles, ANALYSIS, now=now)
+    closed = generate_analysis_cached("BTCUSDT", "1m", 300, candles, ANALYSIS, now=now + 30)
+
+    assert closed is not first
+    assert len(cache.memory) == 2
+
+def test_revised_closed_candle_invalidates(cache):
+    candles = series(300)
+    now = candles.last_timestamp() + 30
+
+    first = generate_analysis_cached("BTCUSDT", "1m", 300, candles, ANALYSIS, now=now)
+
+    # Mesmo último candle fechado, mas um candle antigo corrigido (ex.: backfill)
+    revised = CandleSeries(candles.time, candles.values.copy())
+    revised.values[1:4, 100] *= 1.05
+    second = generate_analysis_cached("BTCUSDT", "1m", 300, revised, ANALYSIS, now=now)
+
+    assert second is not first
+    assert len(cache.memory) == 2
+    assert second == generate_analysis(revised.closed(60, now), ANALYSIS, next_timestamp=candles.last_timestamp())
+
+def test_last_closed_signal_emitted_at_open_candle():
+    df = series(100).frame()
+    closed, open_ts = df.iloc[:-1], int(index_timestamps(df.index)[-1])
+
+    # Confluência de compra 0: todo candle gera compra
+    analysis = dict(ANALYSIS, confluence={"buy": 0, "sell": 1e9})
+    buy, _, _, _ = generate_signals(closed, analysis, next_timestamp=open_ts)
+    assert buy == index_timestamps(df.index)[1:].tolist()
+
+    without, _, _, _ = generate_signals(closed, analysis)
+    assert without == buy[:-1]
+
+def test_single_flight():
+    cache = AnalysisCache(maxsize=16)
+    key = analysis_key("BTCUSDT", "1m", 300, 0, "fp", ANALYSIS)
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    def request():
+        barrier.wait()
+        results.append(cache.get_or_compute(key, compute))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+def test_single_flight_failure_propagates_and_retries():
+    cache = AnalysisCache(maxsize=16)
+    key = analysis_key("BTCUSDT", "1m", 300, 0, "fp", ANALYSIS)
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait()
+        raise RuntimeError("falhou")
+
+    def request(compute):
+        try:
+            cache.get_or_compute(key, compute)
+        except RuntimeError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=request, args=(failing,))
+    owner.start()
+    started.wait()
+    waiter = threading.Thread(target=request, args=(lambda: pytest.fail("cálculo duplicado"),))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    owner.join()
+    waiter.join()
+
+    assert len(errors) == 2
+    assert cache.get_or_compute(key, lambda: "ok") == "ok"
+
+def test_recheck_under_lock_reads_disk(tmp_path):
+    disk = DiskCache(str(tmp_path / "cache.db"))
+    key = analysis_key("BTCUSDT", "1m", 300, 0, "fp", ANALYSIS)
+    cache = AnalysisCache(maxsize=16, disk=disk)
+    other = AnalysisCache(maxsize=16, disk=disk)
+    original_get = disk.get
+    reads = []
+
+    def get(k):
+        # Outro processo grava o resultado entre o primeiro `get` e a checagem sob o lock
+        if not reads:
+            other.put(k, "do disco")
+        reads.append(k)
+        return original_get(k) if len(reads) > 1 else None
+
+    disk.get = get
+
+    assert cache.get_or_compute(key, lambda: pytest.fail("cálculo duplicado")) == "do disco"
+    assert cache.memory.get(key) == "do disco"
+
+def test_disk_cache_key_includes_fingerprint(tmp_path):
+    disk = DiskCache(str(tmp_path / "cache.db"))
+    old = analysis_key("BTCUSDT", "1m", 300, 0, "a", ANALYSIS)
+    revised = analysis_key("BTCUSDT", "1m", 300, 0, "b", ANALYSIS)
+    other_series = analysis_key("BTCUSDT", "5m", 300, 0, "c", ANALYSIS)
+
+    disk.put(old, "antigo")
+    disk.put(other_series, "outro")
+    assert disk.get(revised) is None
+
+    disk.put(revised, "corrigido")
+    assert disk.get(revised) == "corrigido"
+    assert disk.get(old) is None
+    assert disk.get(other_series) == "outro"
+
+def test_disk_cache_recreates_old_table(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("create table results (symbol text, timeframe text, limit_ integer, last_timestamp integer, analysis_hash text, value blob)")
+        conn.execute("insert into results values ('BTCUSDT', '1m', 300, 0, 'h', x'00')")
+
+    disk = DiskCache(path)
+    key = analysis_key("BTCUSDT", "1m", 300, 0, "fp", ANALYSIS)
+    disk.put(key, "novo")
+
+    assert disk.get(key) == "novo"
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from core import binance
+from core.backfill import backfill_klines, split_pages
+from core.ratelimit import WeightLimiter
+from core.series import CandleSeries
+
+MINUTE_MS = 60_000
+
+def expected_opens(start_ms, end_ms, interval_ms=MINUTE_MS):
+    first = -(-start_ms // interval_ms) * interval_ms
+    return np.arange(first, end_ms + 1, interval_ms) // 1000
+
+@pytest.mark.parametrize("start_ms, end_ms, page_size", [
+    (0, 999 * MINUTE_MS, 1000),
+    (0, 1000 * MINUTE_MS, 1000),
+    (MINUTE_MS, 3500 * MINUTE_MS + 30_000, 1000),
+    (0, 0, 1000),
+])
+def test_split_pages_cover_range_without_overlap(start_ms, end_ms, page_size):
+    pages = split_pages(start_ms, end_ms, MINUTE_MS, page_size)
+
+    assert pages[0][0] == start_ms and pages[-1][1] == end_ms
+    for (_, prev_end), (start, _) in zip(pages, pages[1:]):
+        assert start == prev_end + 1
+    assert all(end - start < page_size * MINUTE_MS for start, end in pages)
+
+def test_backfill_stitches_pages_in_order(exchange):
+    end_ms = exchange.now_ms
+    start_ms = end_ms // MINUTE_MS * MINUTE_MS - 3499 * MINUTE_MS
+
+    candles = backfill_klines("BTCUSDT", "1m", start_ms, end_ms, max_workers=4)
+
+    np.testing.assert_array_equal(candles.time, expected_opens(start_ms, end_ms))
+    assert len(exchange.calls) == 4
+    assert all("startTime" in call and "endTime" in call for call in exchange.calls)
+
+def test_backfill_deduplicates_across_page_boundaries(exchange):
+    exchange.overlap = 5
+    end_ms = exchange.now_ms
+    start_ms = end_ms // MINUTE_MS * MINUTE_MS - 2999 * MINUTE_MS
+
+    candles = backfill_klines("BTCUSDT", "1m", start_ms, end_ms, max_workers=3)
+
+    opens = expected_opens(start_ms, end_ms)
+    assert candles.time[0] == opens[0] - 5 * 60  # a primeira página começa antes do pedido
+    np.testing.assert_array_equal(candles.time[5:], opens)
+    assert np.all(np.diff(candles.time) == 60)
+
+def test_merge_keeps_last_occurrence():
+    first = CandleSeries(np.array([0, 60, 120]), np.ones((5, 3)))
+    second = CandleSeries(np.array([120, 180]), np.full((5, 2), 2.0))
+
+    merged = CandleSeries.merge([second, first, second])
+    assert merged.time.tolist() == [0, 60, 120, 180]
+    assert merged.close.tolist() == [1.0, 1.0, 2.0, 2.0]
+
+def test_backfill_is_throttled_by_weight_limit(exchange, monkeypatch):
+    # Cada página de 1000 candles pesa 5: com limite 10 por janela só 2 páginas começam por janela,
+    # e como cada uma termina bem antes da janela acabar nunca há mais de 2 ao mesmo tempo
+    monkeypatch.setattr(binance, "weight_limiter", WeightLimiter(limit=10, window=0.5))
+    exchange.latency = 0.05
+    end_ms = exchange.now_ms
+    start_ms = end_ms // MINUTE_MS * MINUTE_MS - 5999 * MINUTE_MS
+
+    candles = backfill_klines("BTCUSDT", "1m", start_ms, end_ms, max_workers=6)
+
+    assert len(candles) == 6000
+    assert len(exchange.calls) == 6
+    assert exchange.peak_in_flight <= 2
+
+def test_backfill_pages_run_concurrently(exchange, monkeypatch):
+    # Sem limite de peso as 6 páginas ficam em andamento juntas
+    monkeypatch.setattr(binance, "weight_limiter", WeightLimiter(limit=1000, window=60))
+    exchange.latency = 0.2
+    end_ms = exchange.now_ms
+    start_ms = end_ms // MINUTE_MS * MINUTE_MS - 5999 * MINUTE_MS
+
+    backfill_klines("BTCUSDT", "1m", start_ms, end_ms, max_workers=6)
+
+    assert exchange.peak_in_flight > 2
+
+def test_limiter_waits_when_budget_is_used():
+    limiter = WeightLimiter(limit=10, window=60)
+    assert limiter.reserve(6) == 0
+    assert limiter.reserve(4) == 0
+    assert limiter.reserve(1) > 0
+
+def test_limiter_sync_counts_weight_used_elsewhere():
+    limiter = WeightLimiter(limit=10, window=60)
+    limiter.reserve(1)
+    limiter.sync(10)
+    assert limiter.reserve(1) > 0
+
+def test_used_weight_header_is_synced(exchange, monkeypatch):
+    limiter = WeightLimiter(limit=100, window=60)
+    monkeypatch.setattr(binance, "weight_limiter", limiter)
+    exchange.used_weight = 95
+
+    binance.request_klines("BTCUSDT", "1m", 10)
+    assert limiter.reserve(10) > 0
@@ -0,0 +1,118 @@
+import importlib.util
+import os
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from core.batch import BatchError, Combination, analysis_from_settings, combinations_from_config, load_settings
+from utils.limit import calculate_limit
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Perfil como gravado na tabela crypto_settings (app/schemas/settings.sql)
+PROFILE = {
+    "id": "perfil-1",
+    "name": "Perfil",
+    "indicators": ["rsi", "ema"],
+    "candle_patterns": ["candles", "fibonacci"],
+    "time_ranges": ["1", "3"],
+    "time_frames": ["1h"],
+    "currencies": ["BTCUSDT", "ETHUSDT"],
+}
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[r for r in self.rows if all(r.get(c) == v for c, v in self.filters)])
+
+@pytest.fixture
+def supabase(monkeypatch):
+    # O cliente real conecta no Supabase ao importar; o módulo é trocado por um falso
+    tables = {"crypto_settings": [PROFILE]}
+    module = ModuleType("app.db.supabase")
+    module.supabase = SimpleNamespace(table=lambda name: FakeQuery(tables[name]))
+    monkeypatch.setitem(sys.modules, "app.db.supabase", module)
+    return tables
+
+@pytest.fixture
+def flask_app():
+    spec = importlib.util.spec_from_file_location("flask_app", os.path.join(SERVER_DIR, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def expected(currencies, timeframes, timeranges):
+    return [
+        Combination(symbol, timeframe, timerange, calculate_limit(timeframe, timerange))
+        for symbol in currencies for timeframe in timeframes for timerange in timeranges
+    ]
+
+@pytest.mark.parametrize("config", [
+    {"currencies": ["BTCUSDT"], "timeframes": ["1h", "4h"], "timeranges": [1, 3]},
+    {"currencies": ["BTCUSDT"], "time_frames": ["1h", "4h"], "time_ranges": ["1", "3"]},
+    {"currencies": ("BTCUSDT",), "timeframes": ["1h", "4h", "1h"], "time_ranges": [1, 3, 1]},
+])
+def test_combinations_accept_both_spellings(config):
+    assert combinations_from_config(config) == expected(["BTCUSDT"], ["1h", "4h"], [1, 3])
+
+@pytest.mark.parametrize("config", [
+    {"currencies": "BTCUSDT", "timeframes": ["1h"], "timeranges": [1]},
+    {"currencies": ["BTCUSDT"], "timeframes": "1h", "timeranges": [1]},
+    {"currencies": ["BTCUSDT"], "time_frames": ["1h"], "time_ranges": 1},
+    {"currencies": ["BTCUSDT"], "timeframes": {"1h": 1}, "timeranges": [1]},
+])
+def test_combinations_reject_non_lists(config):
+    with pytest.raises(BatchError, match="deve ser uma lista"):
+        combinations_from_config(config)
+
+def test_combinations_require_every_field():
+    with pytest.raises(BatchError):
+        combinations_from_config({"currencies": ["BTCUSDT"], "timeframes": ["1h"]})
+
+def test_load_settings(supabase):
+    assert load_settings("perfil-1") == PROFILE
+    with pytest.raises(LookupError):
+        load_settings("outro")
+
+def test_batch_with_settings_id(supabase, flask_app, monkeypatch):
+    calls = []
+
+    def run_batch(combinations, analysis, include_candles=False):
+        calls.append((combinations, analysis))
+        return iter([
+            {"symbol": c.symbol, "timeframe": c.timeframe, "timerange": c.timerange, "buy": [], "sell": []}
+            for c in combinations
+        ])
+
+    monkeypatch.setattr(flask_app, "run_batch", run_batch)
+
+    response = flask_app.app.test_client().post("/analysis/batch", json={"settings_id": "perfil-1"})
+
+    assert response.status_code == 200
+    combinations, analysis = calls[0]
+    assert combinations == expected(["BTCUSDT", "ETHUSDT"], ["1h"], [1, 3])
+    assert analysis == analysis_from_settings(PROFILE)
+    assert [(r["symbol"], r["timerange"]) for r in response.get_json()["results"]] == [(c.symbol, c.timerange) for c in combinations]
+
+def test_batch_unknown_settings_id(supabase, flask_app):
+    response = flask_app.app.test_client().post("/analysis/batch", json={"settings_id": "outro"})
+    assert response.status_code == 404
+
+def test_batch_rejects_string_field(flask_app):
+    body = {"currencies": ["BTCUSDT"], "timeframes": "1h", "timeranges": [1]}
+
+    response = flask_app.app.test_client().post("/analysis/batch", json=body)
+
+    assert response.status_code == 400
+    assert "timeframes" in response.get_json()["error"]
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError
+from urllib3.response import HTTPResponse
+
+from core import binance, exchange_async
+from core.binance import ExchangeRateLimitError, ExchangeResponseError, ExchangeRetry, RETRY_STATUS, request_klines
+from core.exchange_async import AsyncBinanceClient
+from core.ratelimit import WeightLimiter
+
+def test_429_waits_retry_after_through_limiter(exchange):
+    exchange.failures.append((429, {"Retry-After": "0.2"}, '{"code": -1003}'))
+
+    started = time.monotonic()
+    candles = request_klines("BTCUSDT", "1m", 10)
+
+    assert len(candles) == 10
+    assert len(exchange.calls) == 2
+    assert time.monotonic() - started >= 0.2
+
+def test_429_gives_up_after_max_retries(exchange):
+    client = binance.get_client()
+    exchange.failures.extend([(429, {"Retry-After": "0"}, "{}")] * (client.max_retries + 1))
+
+    with pytest.raises(ExchangeRateLimitError) as info:
+        request_klines("BTCUSDT", "1m", 10)
+
+    assert info.value.status == 429
+    assert len(exchange.calls) == client.max_retries + 1
+
+def test_418_is_not_retried_and_pauses_limiter(exchange):
+    exchange.failures.append((418, {"Retry-After": "30"}, '{"code": -1003}'))
+
+    with pytest.raises(ExchangeRateLimitError) as info:
+        request_klines("BTCUSDT", "1m", 10)
+
+    assert info.value.status == 418
+    assert info.value.retry_after == "30"
+    assert len(exchange.calls) == 1
+    assert binance.weight_limiter.reserve(1) > 25
+
+def test_5xx_retried_by_adapter(exchange):
+    exchange.failures.extend([(503, {}, "{}"), (502, {}, "{}")])
+
+    assert len(request_klines("BTCUSDT", "1m", 10)) == 10
+    assert len(exchange.calls) == 3
+
+def test_5xx_exhausted_is_response_error(exchange):
+    client = binance.get_client()
+    exchange.failures.extend([(500, {}, '{"msg": "erro interno"}')] * (client.max_retries + 1))
+
+    with pytest.raises(ExchangeResponseError) as info:
+        request_klines("BTCUSDT", "1m", 10)
+
+    assert info.value.status == 500
+    assert not isinstance(info.value, ExchangeRateLimitError)
+    assert len(exchange.calls) == client.max_retries + 1
+
+def test_5xx_waits_retry_after(exchange):
+    # O adapter só aceita Retry-After em segundos inteiros (ou data HTTP), como o da Binance
+    exchange.failures.append((503, {"Retry-After": "1"}, "{}"))
+
+    started = time.monotonic()
+    assert len(request_klines("BTCUSDT", "1m", 10)) == 10
+
+    assert len(exchange.calls) == 2
+    assert time.monotonic() - started >= 1
+    # Só o 429/418 pausa as demais requisições
+    assert binance.weight_limiter.reserve(1) == 0
+
+def test_retry_error_keeps_last_status(exchange, monkeypatch):
+    client = binance.get_client()
+    retry = ExchangeRetry(total=0, status_forcelist=RETRY_STATUS)
+    with pytest.raises(MaxRetryError) as exhausted:
+        retry.increment("GET", "/api/v3/klines", response=HTTPResponse(status=504))
+
+    def get(*args, **kwargs):
+        raise requests.exceptions.RetryError(exhausted.value)
+
+    monkeypatch.setattr(client.session, "get", get)
+
+    with pytest.raises(ExchangeResponseError) as info:
+        request_klines("BTCUSDT", "1m", 10)
+
+    assert info.value.status == 504
+    assert "too many 504 error responses" in str(info.value)
+
+def test_used_weight_synced_on_rate_limit(exchange):
+    exchange.used_weight = 1100
+    exchange.failures.append((429, {"Retry-After": "0"}, "{}"))
+
+    request_klines("BTCUSDT", "1m", 10)
+
+    assert binance.weight_limiter._used >= 1100
+
+def test_async_429_through_limiter(exchange, monkeypatch):
+    limiter = WeightLimiter()
+    monkeypatch.setattr(exchange_async, "weight_limiter", limiter)
+    exchange.failures.extend([(429, {"Retry-After": "0.2"}, "{}"), (418, {"Retry-After": "30"}, "{}")])
+
+    async def run():
+        async with AsyncBinanceClient(base_url=exchange.url, backoff_factor=0) as client:
+            with pytest.raises(ExchangeRateLimitError) as info:
+                await client.klines("BTCUSDT", "1m", 10)
+            return info.value
+
+    started = time.monotonic()
+    error = asyncio.run(run())
+
+    assert error.status == 418
+    assert len(exchange.calls) == 2
+    assert time.monotonic() - started >= 0.2
+    assert limiter.reserve(1) > 25
+
+def test_async_5xx_waits_retry_after(exchange, monkeypatch):
+    monkeypatch.setattr(exchange_async, "weight_limiter", WeightLimiter())
+    exchange.failures.append((503, {"Retry-After": "0.2"}, "{}"))
+
+    async def run():
+        async with AsyncBinanceClient(base_url=exchange.url, backoff_factor=0) as client:
+            return await client.klines("BTCUSDT", "1m", 10)
+
+    started = time.monotonic()
+    assert len(asyncio.run(run())) == 10
+
+    assert len(exchange.calls) == 2
+    assert time.monotonic() - started >= 0.2
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.evaluate import evaluate_signals, nearest_indices
+from core.series import index_timestamps
+
+from tests import legacy
+from tests.data import flat_ohlc, random_ohlc
+
+SERIES = {
+    "random": lambda: random_ohlc(300),
+    "tick": lambda: random_ohlc(300, seed=1, tick=1.0, gap=0),
+    "plano": lambda: flat_ohlc(50),
+    # Índice com buracos: os pontos médios não ficam mais a 30s de cada vizinho
+    "buracos": lambda: random_ohlc(400, seed=2, tick=0.5).iloc[np.r_[0:100, 130:200, 201:260, 300:400]],
+}
+
+def signal_times(df, seed=0):
+    """
+    Sinais nos candles, exatamente entre dois candles, fora das pontas e aleatórios.
+    """
+    times = index_timestamps(df.index)
+    rng = np.random.default_rng(seed)
+    between = (times[:-1] + times[1:]) // 2
+    outside = [times[0] - 3600, times[0] - 30, times[-1] + 30, times[-1] + 3600]
+    random = rng.integers(times[0] - 600, times[-1] + 600, 50)
+    return np.r_[times[::7], between, outside, random, times[-1], times[0]].tolist()
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("direction", ["buy", "sell"])
+@pytest.mark.parametrize("future_candles", [0, 1, 10, 60])
+def test_matches_legacy(name, direction, future_candles):
+    df = SERIES[name]()
+    signals = signal_times(df)
+
+    expected = legacy.evaluate_signals(df, signals, direction, future_candles)
+    assert evaluate_signals(df, signals, direction, future_candles) == expected
+
+@pytest.mark.parametrize("name", SERIES)
+def test_multiple_horizons_match_legacy(name):
+    df = SERIES[name]()
+    signals = signal_times(df, seed=1)
+    horizons = [1, 5, 10, 500]
+
+    result = evaluate_signals(df, signals, 'buy', horizons)
+
+    assert list(result) == horizons
+    for horizon in horizons:
+        assert result[horizon] == legacy.evaluate_signals(df, signals, 'buy', horizon)
+
+def test_nearest_ties_pick_later_candle():
+    df = random_ohlc(10)
+    times = index_timestamps(df.index)
+    targets = np.r_[(times[:-1] + times[1:]) // 2, times[0] - 1, times[-1] + 1]
+
+    result = nearest_indices(times, targets)
+
+    np.testing.assert_array_equal(result, df.index.get_indexer(pd.to_datetime(targets, unit='s'), method='nearest'))
+    np.testing.assert_array_equal(result, np.r_[np.arange(1, 10), 0, 9])
+
+@pytest.mark.parametrize("signals", [[], [0]])
+def test_empty_frame_matches_legacy(signals):
+    df = random_ohlc(10).iloc[:0]
+    assert evaluate_signals(df, signals) == legacy.evaluate_signals(df, signals)
+
+def test_invalid_direction():
+    with pytest.raises(ValueError):
+        evaluate_signals(random_ohlc(10), [], direction='hold')
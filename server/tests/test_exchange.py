@@ -0,0 +1,106 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from core.exchange import fetch_ohlcv, sync_range
+from core.store import get_store
+from utils.limit import candle_open, candles_between, shift_candles
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+
+def assert_contiguous(candles, interval_s, now_ms):
+    assert np.all(np.diff(candles.time) == interval_s)
+    assert candles.last_timestamp() == now_ms // 1000 // interval_s * interval_s
+
+def test_full_fetch_then_incremental(exchange):
+    candles = fetch_ohlcv("BTCUSDT", "1h", 720)
+    assert len(candles) == 720
+    assert_contiguous(candles, 3600, exchange.now_ms)
+
+    exchange.advance(3 * HOUR_MS)
+    start_ms, _ = sync_range("BTCUSDT", "1h", 720)
+    assert start_ms == candles.last_timestamp() * 1000
+
+    candles = fetch_ohlcv("BTCUSDT", "1h", 720)
+    assert len(candles) == 720
+    assert_contiguous(candles, 3600, exchange.now_ms)
+
+def test_longer_window_after_idle_period_has_no_gap(exchange):
+    fetch_ohlcv("BTCUSDT", "1h", 720)
+
+    # Parado 40 dias: a janela de 720 é refeita inteira e fica um buraco de ~10 dias antes dela
+    exchange.advance(40 * DAY_MS)
+    assert len(fetch_ohlcv("BTCUSDT", "1h", 720)) == 720
+
+    candles = fetch_ohlcv("BTCUSDT", "1h", 1440)
+    assert len(candles) == 1440
+    assert_contiguous(candles, 3600, exchange.now_ms)
+
+def test_hole_inside_window_triggers_full_fetch(exchange, tmp_path):
+    candles = fetch_ohlcv("BTCUSDT", "1h", 500)
+    hole = int(candles.time[100])
+
+    store = get_store()
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("delete from candles where timestamp = ?", (hole,))
+
+    current_open = exchange.now_ms // HOUR_MS * HOUR_MS
+    assert sync_range("BTCUSDT", "1h", 400)[0] == current_open - 399 * HOUR_MS
+
+    candles = fetch_ohlcv("BTCUSDT", "1h", 499)
+    assert_contiguous(candles, 3600, exchange.now_ms)
+
+def utc(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp()) * 1000
+
+@pytest.mark.parametrize("timeframe, ts, expected", [
+    ("1h", utc(2025, 10, 9, 8, 53), utc(2025, 10, 9, 8)),
+    ("1d", utc(2025, 10, 9, 8, 53), utc(2025, 10, 9)),
+    # 2025-10-09 é uma quinta: a semana abriu na segunda, 06/10
+    ("1w", utc(2025, 10, 9, 8, 53), utc(2025, 10, 6)),
+    ("1w", utc(2025, 10, 6), utc(2025, 10, 6)),
+    ("1w", utc(2025, 10, 5, 23, 59), utc(2025, 9, 29)),
+    ("1M", utc(2025, 10, 9, 8, 53), utc(2025, 10, 1)),
+    ("1M", utc(2024, 2, 29, 23), utc(2024, 2, 1)),
+])
+def test_candle_open(timeframe, ts, expected):
+    assert candle_open(timeframe, ts) == expected
+
+def test_month_shift_and_count():
+    assert shift_candles("1M", utc(2025, 1, 1), 1) == utc(2025, 2, 1)
+    assert shift_candles("1M", utc(2025, 1, 1), -13) == utc(2023, 12, 1)
+    assert candles_between("1M", utc(2023, 12, 1), utc(2025, 2, 1)) == 14
+
+def test_weekly_candles_open_on_monday(exchange):
+    candles = fetch_ohlcv("BTCUSDT", "1w", 50)
+
+    assert len(candles) == 50
+    assert np.all(np.diff(candles.time) == 7 * DAY_MS // 1000)
+    assert all(datetime.fromtimestamp(t, tz=timezone.utc).weekday() == 0 for t in candles.time)
+    assert candles.last_timestamp() * 1000 == candle_open("1w", exchange.now_ms)
+
+    # Com o histórico completo só o último candle (e os novos) são buscados de novo
+    exchange.advance(15 * DAY_MS)
+    assert sync_range("BTCUSDT", "1w", 50)[0] == candles.last_timestamp() * 1000
+
+    candles = fetch_ohlcv("BTCUSDT", "1w", 50)
+    assert len(candles) == 50
+    assert candles.last_timestamp() * 1000 == candle_open("1w", exchange.now_ms)
+    assert exchange.calls[-1]["startTime"] == str(candle_open("1w", exchange.now_ms - 15 * DAY_MS))
+
+def test_monthly_candles_open_on_first_day(exchange):
+    candles = fetch_ohlcv("BTCUSDT", "1M", 24)
+
+    assert len(candles) == 24
+    assert all(datetime.fromtimestamp(t, tz=timezone.utc).day == 1 for t in candles.time)
+    assert candles.last_timestamp() * 1000 == candle_open("1M", exchange.now_ms)
+
+    exchange.advance(40 * DAY_MS)
+    assert sync_range("BTCUSDT", "1M", 24)[0] == candles.last_timestamp() * 1000
+
+    candles = fetch_ohlcv("BTCUSDT", "1M", 24)
+    assert len(candles) == 24
+    assert candles.last_timestamp() * 1000 == candle_open("1M", exchange.now_ms)
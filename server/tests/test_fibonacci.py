@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from core.patterns.shapes.fibonacci import calculate_fibonacci_lines, generate_fibonacci_signals
+from core.shapes import generate_shapes
+
+from tests import legacy
+from tests.data import flat_ohlc, random_ohlc
+
+SERIES = {
+    "random": lambda: random_ohlc(500),
+    "tick": lambda: random_ohlc(500, seed=1, tick=1.0, gap=0),
+    "tick-fino": lambda: random_ohlc(500, seed=2, tick=0.1),
+    "plano": lambda: flat_ohlc(150),
+}
+
+SHAPES = {"sr": False, "flags": False, "hs": False, "fibonacci": True}
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("lookback", [5, 20, 100])
+def test_signals_match_legacy(name, lookback):
+    df = SERIES[name]()
+
+    result = generate_fibonacci_signals(df, lookback)
+    expected = legacy.generate_fibonacci_signals(df, lookback)
+
+    assert result["fibonacci_buy"].tolist() == expected["fibonacci_buy"].tolist()
+    assert result["fibonacci_sell"].tolist() == expected["fibonacci_sell"].tolist()
+
+@pytest.mark.parametrize("name", SERIES)
+def test_multiple_lookbacks_match_legacy(name):
+    df = SERIES[name]()
+    lookbacks = [5, 20, 100]
+
+    result = generate_fibonacci_signals(df, lookbacks)
+
+    any_buy = np.zeros(len(df), dtype=bool)
+    any_sell = np.zeros(len(df), dtype=bool)
+    for lookback in lookbacks:
+        expected = legacy.generate_fibonacci_signals(df, lookback)
+        assert result[f"fibonacci_buy_{lookback}"].tolist() == expected["fibonacci_buy"].tolist()
+        assert result[f"fibonacci_sell_{lookback}"].tolist() == expected["fibonacci_sell"].tolist()
+        any_buy |= expected["fibonacci_buy"].values
+        any_sell |= expected["fibonacci_sell"].values
+
+    assert result["fibonacci_buy"].tolist() == any_buy.tolist()
+    assert result["fibonacci_sell"].tolist() == any_sell.tolist()
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("lookback", [20, 100])
+def test_compact_lines_match_legacy_points(name, lookback):
+    df = SERIES[name]()
+
+    lines = calculate_fibonacci_lines(df, lookback)
+    expected = legacy.calculate_fibonacci_lines(df, lookback)
+
+    assert list(lines) == list(expected)
+    for level, points in expected.items():
+        assert lines[level] == {"start": points[0]["time"], "end": points[-1]["time"], "price": points[0]["value"]}
+        assert all(p["value"] == points[0]["value"] for p in points)
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("lookback", [20, 100])
+def test_points_form_matches_legacy(name, lookback):
+    df = SERIES[name]()
+    assert calculate_fibonacci_lines(df, lookback, compact=False) == legacy.calculate_fibonacci_lines(df, lookback)
+
+@pytest.mark.parametrize("name", SERIES)
+def test_shapes_fibonacci_points_is_legacy_form(name):
+    df = SERIES[name]()
+    expected = legacy.calculate_fibonacci_lines(df)
+
+    assert generate_shapes(df, dict(SHAPES, fibonacci_points=True))["fibonacci"] == expected
+    assert generate_shapes(df, SHAPES)["fibonacci"] == calculate_fibonacci_lines(df)
+
+def test_lines_need_full_window():
+    assert calculate_fibonacci_lines(random_ohlc(99)) == {}
+    assert len(calculate_fibonacci_lines(random_ohlc(100))) == len(legacy.FIB_LEVELS)
@@ -0,0 +1,53 @@
+import pytest
+
+from core.patterns.shapes.flags import FlagScanner, find_flags_pennants_trendline
+from utils.trendline_automation import fit_trendlines_single
+
+from tests import legacy
+from tests.data import random_ohlc
+
+def positions(result):
+    # (base_x, tip_x, conf_x) por lista: bull_flags, bear_flags, bull_pennants, bear_pennants
+    return [[(p.base_x, p.tip_x, p.conf_x) for p in patterns] for patterns in result]
+
+@pytest.mark.parametrize("tick", [None, 1.0, 0.5, 0.1])
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("order", [10, 20])
+def test_trendline_flags_match_legacy_fit(seed, tick, order):
+    # Com preços no tick há muitos empates (linhas planas, preço sobre a linha),
+    # decididos como no ajuste iterativo anterior
+    data = random_ohlc(1500, seed=seed, tick=tick)["close"].to_numpy()
+
+    assert positions(find_flags_pennants_trendline(data, order)) == positions(legacy.find_flags_pennants_trendline(data, order))
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("order", [3, 5, 10, 20])
+def test_flag_scanner_matches_per_bar_scan(seed, order):
+    # Mesmo ajuste das linhas nos dois lados: só a varredura incremental muda
+    data = random_ohlc(2000, seed=seed)["close"].to_numpy()
+
+    result = FlagScanner(order).run(data)
+    expected = legacy.find_flags_pennants_trendline(data, order, fit=fit_trendlines_single)
+
+    assert positions(result) == positions(expected)
+    for patterns, expected_patterns in zip(result, expected):
+        for pattern, other in zip(patterns, expected_patterns):
+            assert pattern.pennant == other.pennant
+            assert (pattern.flag_width, pattern.pole_width) == (other.flag_width, other.pole_width)
+            assert (pattern.flag_height, pattern.pole_height) == (other.flag_height, other.pole_height)
+            for field in ("support_slope", "support_intercept", "resist_slope", "resist_intercept"):
+                assert getattr(pattern, field) == pytest.approx(getattr(other, field), rel=1e-9, abs=1e-9)
+
+def test_flag_scanner_update_matches_run():
+    data = random_ohlc(2000, seed=7)["close"].to_numpy()
+    scanner = FlagScanner(10)
+
+    confirmed = []
+    for i, price in enumerate(data):
+        for pattern in scanner.update(price):
+            assert pattern.conf_x == i
+            confirmed.append(pattern)
+
+    expected = FlagScanner(10).run(data)
+    assert sorted(p.conf_x for p in confirmed) == sorted(p.conf_x for patterns in expected for p in patterns)
+    assert positions((scanner.bull_flags, scanner.bear_flags, scanner.bull_pennants, scanner.bear_pennants)) == positions(expected)
@@ -0,0 +1,79 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from core.patterns.shapes.hs import HSDetector, detect_hs_patterns, detect_hs_signals, find_hs_patterns, hs_detector_for
+
+from tests import legacy
+from tests.data import random_ohlc
+
+SERIES = {
+    "random": lambda: random_ohlc(3000, seed=4),
+    "ties": lambda: random_ohlc(3000, seed=5, tick=0.5),
+}
+
+def fields(patterns):
+    # NaN == NaN, para comparar padrões com r2 indefinido
+    return [
+        tuple("nan" if isinstance(v, float) and np.isnan(v) else v for v in dataclasses.astuple(p))
+        for p in patterns
+    ]
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("order", [2, 5, 10, 20])
+@pytest.mark.parametrize("early_find", [False, True])
+def test_detector_matches_legacy(series, order, early_find):
+    data = SERIES[series]()["close"].to_numpy()
+
+    hs, ihs = find_hs_patterns(data, order, early_find)
+    legacy_hs, legacy_ihs = legacy.find_hs_patterns(data, order, early_find)
+
+    assert fields(hs) == fields(legacy_hs)
+    assert fields(ihs) == fields(legacy_ihs)
+
+def test_patterns_found():
+    hs, ihs = find_hs_patterns(SERIES["random"]()["close"].to_numpy(), 5)
+    assert hs and ihs
+
+@pytest.mark.parametrize("splits", [[100], [255, 256, 257], [300, 1000, 2999], [1] * 40])
+def test_growing_detector_matches_legacy(splits):
+    # O buffer começa com 256 posições; a série cresce em vários pedaços depois da primeira chamada
+    df = SERIES["random"]()
+    data = df["close"].to_numpy()
+
+    detector = None
+    end = 0
+    for size in splits:
+        end = min(end + size, len(df))
+        detector = hs_detector_for(df.iloc[:end], order=5, detector=detector)
+    detector = hs_detector_for(df, order=5, detector=detector)
+
+    legacy_hs, legacy_ihs = legacy.find_hs_patterns(data, 5)
+    assert len(detector) == len(data)
+    np.testing.assert_array_equal(detector.data, data)
+    assert fields(detector.hs_patterns) == fields(legacy_hs)
+    assert fields(detector.ihs_patterns) == fields(legacy_ihs)
+
+def test_update_returns_patterns_on_break():
+    data = SERIES["random"]()["close"].to_numpy()
+    detector = HSDetector(5)
+
+    found = []
+    for i, close in enumerate(data):
+        for pat in detector.update(close):
+            assert pat.break_i == i
+            found.append(pat)
+
+    assert fields(found) == fields(sorted(detector.hs_patterns + detector.ihs_patterns, key=lambda p: p.break_i))
+
+@pytest.mark.parametrize("series", SERIES)
+def test_shapes_and_signals_match_legacy(series):
+    df = SERIES[series]()
+
+    assert detect_hs_patterns(df, order=5) == legacy.detect_hs_patterns(df, order=5)
+
+    signals = detect_hs_signals(df.copy())
+    expected = legacy.detect_hs_signals(df.copy())
+    for column in ("hs_buy", "hs_sell"):
+        np.testing.assert_array_equal(signals[column].to_numpy(), expected[column].to_numpy())
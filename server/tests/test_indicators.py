@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.patterns.indicators import bollinger_bands
+
+from tests import legacy
+from tests.data import flat_ohlc, random_ohlc
+
+SERIES = {
+    "random": lambda: random_ohlc(1500, seed=8),
+    "ties": lambda: random_ohlc(1500, seed=9, tick=0.5),
+    "flat": lambda: flat_ohlc(100),
+    "gaps": lambda: random_ohlc(500, seed=10, gap=3.0),
+    "one": lambda: random_ohlc(1),
+    "two": lambda: random_ohlc(2),
+    "empty": lambda: random_ohlc(0),
+}
+
+COLUMNS = ["BB_Middle", "BB_Upper", "BB_Lower", "bb_buy", "bb_sell"]
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("window, num_std", [(20, 2), (5, 1), (1, 2)])
+def test_bollinger_matches_legacy(series, window, num_std):
+    df = SERIES[series]()
+
+    result = bollinger_bands(df.copy(), window, num_std)
+    expected = legacy.bollinger_bands(df.copy(), window, num_std)
+
+    pd.testing.assert_frame_equal(result[COLUMNS + ["BB_Std"]], expected[COLUMNS + ["BB_Std"]], check_dtype=False)
+
+@pytest.mark.parametrize("series", ["random", "ties", "flat"])
+def test_bollinger_without_std(series):
+    df = SERIES[series]()
+
+    result = bollinger_bands(df.copy(), keep_std=False)
+    expected = legacy.bollinger_bands(df.copy())
+
+    assert "BB_Std" not in result.columns
+    pd.testing.assert_frame_equal(result[COLUMNS], expected[COLUMNS], check_dtype=False)
+
+def test_bollinger_signals_fire():
+    result = bollinger_bands(SERIES["random"]())
+    assert result["bb_buy"].sum() > 0 and result["bb_sell"].sum() > 0
+    assert np.isin(result["bb_buy"].unique(), [0, 1]).all()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from tests import legacy
+from utils import perceptually_important
+from utils.perceptually_important import find_pips
+
+DIST_MEASURES = [1, 2, 3]  # Euclidiana, perpendicular, vertical
+
+def random_walk(n, seed):
+    return np.cumsum(np.random.default_rng(seed).normal(size=n)) + 100
+
+def assert_same_pips(result, expected):
+    assert result[0] == expected[0]
+    np.testing.assert_array_equal(np.asarray(result[1], dtype=float), np.asarray(expected[1], dtype=float))
+
+SERIES = {
+    "random_walk": lambda: random_walk(300, 1),
+    "ties": lambda: np.round(np.random.default_rng(2).random(200) * 5),
+    "two_points": lambda: np.array([1.0, 2.0]),
+    "three_points": lambda: np.array([1.0, 3.0, 2.0]),
+}
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("dist_measure", DIST_MEASURES)
+@pytest.mark.parametrize("n_pips", [2, 3, 5, 10, 25])
+def test_matches_legacy(series, dist_measure, n_pips):
+    data = SERIES[series]()
+    assert_same_pips(find_pips(data, n_pips, dist_measure), legacy.find_pips(data, n_pips, dist_measure))
+
+@pytest.mark.parametrize("dist_measure", DIST_MEASURES)
+def test_matches_legacy_on_many_random_series(dist_measure):
+    rng = np.random.default_rng(dist_measure)
+    for _ in range(200):
+        data = random_walk(int(rng.integers(2, 80)), int(rng.integers(1 << 30)))
+        for n_pips in (3, 5, 8):
+            assert_same_pips(find_pips(data, n_pips, dist_measure), legacy.find_pips(data, n_pips, dist_measure))
+
+FALLBACK_SERIES = {
+    # Nenhum ponto fora do segmento (distância vertical/perpendicular zero)
+    "constant": lambda: np.ones(20),
+    "line": lambda: np.arange(20, dtype=np.float64),
+    # Mais pips pedidos que pontos disponíveis
+    "short": lambda: np.array([1.0, 4.0, 2.0, 3.0]),
+}
+
+# Com pips repetidos a varredura original divide por zero (comportamento mantido)
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("series", FALLBACK_SERIES)
+@pytest.mark.parametrize("dist_measure", DIST_MEASURES)
+def test_fallback_matches_legacy(series, dist_measure, monkeypatch):
+    data = FALLBACK_SERIES[series]()
+    n_pips = len(data) + 3
+
+    calls = []
+    scan = perceptually_important._find_pips_scan
+    monkeypatch.setattr(perceptually_important, "_find_pips_scan", lambda *args: calls.append(args) or scan(*args))
+
+    assert_same_pips(find_pips(data, n_pips, dist_measure), legacy.find_pips(data, n_pips, dist_measure))
+    assert calls, "o caminho de varredura completa não foi usado"
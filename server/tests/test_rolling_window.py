@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from tests import legacy
+from tests.data import random_ohlc
+from utils.rolling_window import RollingExtremes, rw_bottom, rw_confirmations, rw_extremes, rw_top
+
+ORDERS = [1, 2, 5, 20]
+
+SERIES = {
+    "random": lambda: random_ohlc(2000, seed=1)["close"].to_numpy(),
+    "ties": lambda: random_ohlc(2000, seed=2, tick=1.0)["close"].to_numpy(),
+    "plateaus": lambda: np.repeat(np.round(np.random.default_rng(3).normal(0, 1, 200)), 4),
+    "constant": lambda: np.full(100, 5.0),
+    "empty": lambda: np.array([], dtype=np.float64),
+    "short": lambda: np.array([3.0, 1.0, 2.0, 5.0, 4.0]),
+}
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("order", ORDERS)
+def test_confirmations_match_per_bar_functions(series, order):
+    data = SERIES[series]()
+    tops, bottoms = rw_confirmations(data, order)
+
+    assert tops.tolist() == [rw_top(data, i, order) for i in range(len(data))]
+    assert bottoms.tolist() == [rw_bottom(data, i, order) for i in range(len(data))]
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("order", ORDERS)
+def test_rw_extremes_matches_legacy(series, order):
+    data = SERIES[series]()
+    assert rw_extremes(data, order) == legacy.rw_extremes(data, order)
+
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("order", ORDERS)
+def test_streaming_extremes_match_per_bar_functions(series, order):
+    data = SERIES[series]()
+    extremes = RollingExtremes(order)
+
+    for i, price in enumerate(data):
+        assert extremes.update(price) == (rw_top(data, i, order), rw_bottom(data, i, order))
+
+def test_series_shorter_than_window_has_no_extremes():
+    data = np.arange(5, dtype=np.float64)
+    tops, bottoms = rw_confirmations(data, 2)
+    assert not tops.any() and not bottoms.any()
+
+def test_random_series_has_extremes():
+    # Garante que a equivalência não é trivial
+    tops, bottoms = rw_confirmations(SERIES["ties"](), 5)
+    assert tops.sum() > 10 and bottoms.sum() > 10
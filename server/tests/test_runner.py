@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from core import runner
+from core.analysis import generate_analysis
+from core.cache import get_detector_cache
+from core.context import AnalysisContext
+from core.series import CandleSeries, index_timestamps
+from core.signals import generate_signals
+
+from tests.data import random_ohlc
+
+ANALYSIS = {
+    "candles": False,
+    "confluence": {"buy": 1, "sell": 1},
+    "shapes": {"sr": False, "flags": False, "hs": False, "fibonacci": False},
+    "indicators": {"bb": False, "ema": True, "rsi": True, "macd": False, "stochastic": False},
+}
+
+@pytest.fixture(autouse=True)
+def clear_detector_cache():
+    # Detectores em cache de outros testes com os mesmos candles não seriam enviados ao pool
+    get_detector_cache().clear()
+    yield
+    get_detector_cache().clear()
+
+def series(n: int) -> CandleSeries:
+    df = random_ohlc(n)
+    return CandleSeries(index_timestamps(df.index), df.to_numpy().T)
+
+def replace_detector(monkeypatch, name, detector):
+    entry = runner.SIGNALS_BY_NAME[name]
+    monkeypatch.setitem(runner.SIGNALS_BY_NAME, name, (*entry[:2], detector, *entry[3:]))
+
+def test_detector_failure_waits_running_tasks(monkeypatch):
+    # Executor de threads: os detectores trocados aqui valem também nas tarefas
+    monkeypatch.setattr(runner, "PARALLEL_MIN_CANDLES", 0)
+    started = threading.Event()
+    finished = threading.Event()
+
+    def failing(df, **kwargs):
+        # Falha com a outra tarefa já em execução (não pode mais ser cancelada)
+        started.wait()
+        raise RuntimeError("detector falhou")
+
+    def slow(df, **kwargs):
+        started.set()
+        time.sleep(0.2)
+        finished.set()
+        return df
+
+    replace_detector(monkeypatch, "ema", failing)
+    replace_detector(monkeypatch, "rsi", slow)
+
+    candles = series(300)
+    ctx = AnalysisContext(candles.frame())
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert runner.run_detectors(candles, ANALYSIS, ctx, executor) is False
+        # O bloco compartilhado só é removido depois da tarefa em execução terminar
+        assert finished.is_set()
+
+    assert list(ctx.items()) == []
+
+def test_detector_failure_falls_back_to_serial(monkeypatch):
+    monkeypatch.setattr(runner, "PARALLEL_MIN_CANDLES", 0)
+
+    def failing(df, **kwargs):
+        raise RuntimeError("detector falhou")
+
+    candles = series(300)
+    expected = generate_analysis(candles, ANALYSIS)
+    get_detector_cache().clear()
+
+    replace_detector(monkeypatch, "ema", failing)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        monkeypatch.setattr(runner, "get_executor", lambda: executor)
+        assert generate_analysis(candles, ANALYSIS) == expected
+
+def test_process_pool_matches_serial(monkeypatch):
+    monkeypatch.setattr(runner, "PARALLEL_MIN_CANDLES", 0)
+    candles = series(500)
+
+    serial = AnalysisContext(candles.frame())
+    generate_signals(serial.df, ANALYSIS, ctx=serial)
+
+    pooled = AnalysisContext(candles.frame())
+    executor = runner.ProcessPoolExecutor(max_workers=2, mp_context=runner.multiprocessing.get_context("spawn"))
+    try:
+        assert runner.run_detectors(candles, ANALYSIS, pooled, executor) is True
+    finally:
+        executor.shutdown()
+
+    assert dict(serial.items()).keys() == dict(pooled.items()).keys()
+    for key, value in serial.items():
+        for a, b in zip(value, pooled.get(key)):
+            np.testing.assert_array_equal(a, b)
@@ -0,0 +1,79 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.patterns.shapes.sr_levels import (
+    detect_support_resistance_signals,
+    get_support_resistance_levels,
+    pivot_ids,
+    pivotid,
+    support_resistance_clusters,
+)
+
+from tests import legacy
+from tests.data import flat_ohlc, random_ohlc
+
+# Saídas da implementação anterior (ver tests/fixtures/make_sr_golden.py)
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "sr_golden.json")
+
+with open(GOLDEN_PATH) as f:
+    GOLDEN = json.load(f)
+
+CASES = [(series, case) for series in GOLDEN for case in series["cases"]]
+IDS = [f"{series['name']}-{case['params']['n1']}-{case['params']['n2']}-{case['params']['min_touches']}" for series, case in CASES]
+
+def frame(series):
+    df = pd.DataFrame(series["candles"])
+    df.index = pd.date_range("2024-01-01", periods=len(df), freq="min", name="timestamp")
+    return df
+
+@pytest.mark.parametrize("series, case", CASES, ids=IDS)
+def test_pivots_match_golden(series, case):
+    df = frame(series)
+    params = case["params"]
+
+    pivots = pivot_ids(df["low"].values, df["high"].values, params["n1"], params["n2"])
+    assert pivots.tolist() == case["pivots"]
+    assert [pivotid(df, l, params["n1"], params["n2"]) for l in range(len(df))] == case["pivots"]
+
+@pytest.mark.parametrize("series, case", CASES, ids=IDS)
+def test_clusters_match_golden(series, case):
+    df = frame(series)
+    pivots, supports, resistances = support_resistance_clusters(df, **case["params"])
+
+    assert pivots.tolist() == case["pivots"]
+    assert supports == case["supports"]
+    assert resistances == case["resistances"]
+
+@pytest.mark.parametrize("series, case", CASES, ids=IDS)
+def test_levels_match_golden(series, case):
+    assert get_support_resistance_levels(frame(series), **case["params"]) == case["levels"]
+
+def test_short_series_has_no_pivots():
+    assert not pivot_ids(np.ones(5), np.ones(5), 5, 5).any()
+
+SERIES = {
+    "random": lambda: random_ohlc(400),
+    "tick": lambda: random_ohlc(400, seed=1, tick=0.5),
+    "tick-grosso": lambda: random_ohlc(400, seed=2, tick=1.0, gap=0),
+    "sem-volume": lambda: random_ohlc(300, seed=3, tick=0.5).drop(columns="volume"),
+    "plano": lambda: flat_ohlc(100),
+    "curto": lambda: random_ohlc(15),
+}
+
+SIGNAL_COLUMNS = ["pivot", "sr_buy", "sr_sell", "signal_type", "support_levels_detected", "resistance_levels_detected"]
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("n1, n2, min_touches", [(5, 5, 2), (3, 3, 1), (10, 5, 3)])
+def test_signals_match_legacy(name, n1, n2, min_touches):
+    df = SERIES[name]()
+
+    result = detect_support_resistance_signals(df, n1, n2, min_touches)
+    expected = legacy.detect_support_resistance_signals(df, n1, n2, min_touches)
+
+    for column in SIGNAL_COLUMNS:
+        assert result[column].tolist() == expected[column].tolist(), column
+    np.testing.assert_array_equal(result["signal_strength"].values, expected["signal_strength"].values)
@@ -0,0 +1,104 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import utils.trendline_automation as trendline
+from utils.trendline_automation import fit_trendlines_iterative, fit_trendlines_single, index_array
+
+from tests import legacy
+from tests.data import random_ohlc
+
+def test_index_array():
+    x = index_array(50)
+    assert len(x) == 50
+    np.testing.assert_array_equal(x, np.arange(50))
+    assert not x.flags.writeable
+
+class SlowArray(np.ndarray):
+    def setflags(self, *args, **kwargs):
+        # Arrays grandes demoram a ficar prontos: a outra thread troca o _INDEX nesse meio tempo
+        if len(self) >= 100:
+            time.sleep(0.05)
+        super().setflags(*args, **kwargs)
+
+def test_index_array_concurrent_growth(monkeypatch):
+    def arange(n, dtype=None):
+        if n < 100:
+            time.sleep(0.02)
+        return np.arange(n, dtype=dtype).view(SlowArray)
+
+    monkeypatch.setattr(trendline, "_INDEX", np.arange(0, dtype=np.float64))
+    monkeypatch.setattr(trendline, "np", SimpleNamespace(arange=arange, float64=np.float64))
+
+    results = {}
+
+    def worker(n):
+        results[n] = index_array(n)
+
+    # A thread pequena começa a crescer o array; a grande passa pela checagem logo depois
+    small = threading.Thread(target=worker, args=(10,))
+    large = threading.Thread(target=worker, args=(1000,))
+    small.start()
+    time.sleep(0.005)
+    large.start()
+    small.join()
+    large.join()
+
+    assert len(results[10]) == 10
+    assert len(results[1000]) == 1000
+    np.testing.assert_array_equal(results[1000], np.arange(1000))
+
+def test_fit_trendlines_concurrent():
+    close = random_ohlc(400)["close"].to_numpy()
+    expected = fit_trendlines_single(close)
+    results = []
+
+    def worker():
+        results.append(fit_trendlines_single(close))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    for support, resist in results:
+        np.testing.assert_allclose(support, expected[0])
+        np.testing.assert_allclose(resist, expected[1])
+
+def windows(seed: int, tick: float = None, count: int = 200):
+    data = random_ohlc(3000, seed=seed, tick=tick)["close"].to_numpy()
+    rng = np.random.default_rng(seed)
+    for start, width in zip(rng.integers(0, 2900, count), rng.integers(3, 100, count)):
+        yield data[start:start + width]
+
+@pytest.mark.parametrize("tick", [None, 1.0, 0.1])
+def test_fit_matches_legacy_optimizer(tick):
+    # O otimizador iterativo para perto do ótimo exato: até alguns passos mínimos
+    # (0.0001 * slope_unit) e a folga de 1e-5 da validação da linha
+    checked = 0
+    for y in windows(0, tick):
+        try:
+            expected = legacy.fit_trendlines_single(y)
+        except Exception:
+            continue
+        slope_unit = (y.max() - y.min()) / len(y)
+        for (slope, intercept), (legacy_slope, _) in zip(fit_trendlines_single(y), expected):
+            assert abs(slope - legacy_slope) <= 1e-3 * slope_unit + 1e-5
+        checked += 1
+    assert checked > 100
+
+@pytest.mark.parametrize("tick", [None, 1.0, 0.1])
+def test_iterative_fit_is_legacy(tick):
+    for y in windows(1, tick, count=50):
+        try:
+            expected = legacy.fit_trendlines_single(y)
+        except Exception:
+            with pytest.raises(Exception):
+                fit_trendlines_iterative(y)
+            continue
+        np.testing.assert_allclose(fit_trendlines_iterative(y), expected, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,67 @@
+import importlib.util
+import os
+
+import pytest
+
+from core.signals import AnalysisError, confluence_weights, generate_signals
+from tests.data import random_ohlc
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANALYSIS = {
+    "candles": True,
+    "confluence": {"buy": 1, "sell": 1},
+    "shapes": {"sr": False, "flags": False, "hs": False, "fibonacci": False},
+    "indicators": {"bb": False, "ema": True, "rsi": True, "macd": False, "stochastic": False},
+}
+
+@pytest.fixture(scope="module")
+def client():
+    # O pacote server/app (FastAPI) tem o mesmo nome do módulo Flask app.py
+    spec = importlib.util.spec_from_file_location("flask_app", os.path.join(SERVER_DIR, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app.test_client()
+
+@pytest.mark.parametrize("weights, expected", [
+    (None, {}),
+    ({}, {}),
+    ({"rsi": 2, "ema": 0.5}, {"rsi": 2, "ema": 0.5}),
+])
+def test_confluence_weights(weights, expected):
+    analysis = dict(ANALYSIS, weights=weights)
+    assert confluence_weights(analysis) == expected
+
+@pytest.mark.parametrize("weights", [
+    {"rsi": "2"},
+    {"rsi": None},
+    {"rsi": True},
+    {"rsi": float("nan")},
+    [1, 2],
+])
+def test_invalid_weights(weights):
+    with pytest.raises(AnalysisError):
+        confluence_weights(dict(ANALYSIS, weights=weights))
+
+def test_null_weights_same_as_missing():
+    df = random_ohlc(300)
+    assert generate_signals(df, dict(ANALYSIS, weights=None)) == generate_signals(df, ANALYSIS)
+
+@pytest.mark.parametrize("weights", [{"rsi": "alto"}, {"ema": [1]}])
+def test_analysis_rejects_invalid_weights(client, weights):
+    body = {"symbol": "BTCUSDT", "timeframe": "1h", "timerange": 1, "analysis": dict(ANALYSIS, weights=weights)}
+
+    response = client.post("/analysis", json=body)
+
+    assert response.status_code == 400
+    assert "Peso inválido" in response.get_json()["error"]
+
+def test_batch_rejects_invalid_weights(client):
+    body = {
+        "currencies": ["BTCUSDT"], "timeframes": ["1h"], "timeranges": [1],
+        "analysis": dict(ANALYSIS, weights={"rsi": "alto"}),
+    }
+
+    response = client.post("/analysis/batch", json=body)
+
+    assert response.status_code == 400
@@ -1,19 +1,20 @@
 import os
 import re
+from datetime import datetime, timezone
 
-def calculate_limit(timeframe: str, timerange: int):
+# O epoch (1970-01-01) foi uma quinta; os candles semanais da Binance abrem na segunda 00:00 UTC
+WEEK_OFFSET_MS = 4 * 24 * 60 * 60 * 1000
+
+def timeframe_to_minutes(timeframe: str) -> int:
     """
-    Calcula o limite de candles baseado no timeframe e timerange.
-    
+    Converte um timeframe no formato "<n><unit>" para minutos.
+
     Args:
         timeframe (str): timeframe no formato "<n><unit>", ex: "1h", "15m", "2d", "1w", "1M"
-        timerange (int): quantidade do timeframe desejada, ex: 1, 2, 3...
-        
+
     Returns:
-        int: limite de candles para o período desejado considerando 1 mês (30 dias)
+        int: duração de um candle em minutos (1 mês = 30 dias)
     """
-    minutes_per_month = 30 * 24 * 60  # minutos em 1 mês
-    
     match = re.match(r"(\d+)([mhdwM])", timeframe)
 
     if not match:
@@ -23,18 +24,69 @@ def calculate_limit(timeframe: str, timerange: int):
     num = int(num)
     
     if unit == 'm':
-        timeframe_minutes = num
+        return num
     elif unit == 'h':
-        timeframe_minutes = num * 60
+        return num * 60
     elif unit == 'd':
-        timeframe_minutes = num * 24 * 60
+        return num * 24 * 60
     elif unit == 'w':
-        timeframe_minutes = num * 7 * 24 * 60
+        return num * 7 * 24 * 60
     elif unit == 'M':
-        timeframe_minutes = num * 30 * 24 * 60
+        return num * 30 * 24 * 60
     else:
         raise ValueError(f"Unidade desconhecida no timeframe: {unit}")
+
+def calculate_limit(timeframe: str, timerange: int):
+    """
+    Calcula o limite de candles baseado no timeframe e timerange.
+    
+    Args:
+        timeframe (str): timeframe no formato "<n><unit>", ex: "1h", "15m", "2d", "1w", "1M"
+        timerange (int): quantidade do timeframe desejada, ex: 1, 2, 3...
+        
+    Returns:
+        int: limite de candles para o período desejado considerando 1 mês (30 dias)
+    """
+    minutes_per_month = 30 * 24 * 60  # minutos em 1 mês
+    timeframe_minutes = timeframe_to_minutes(timeframe)
     
     limit = int((minutes_per_month / timeframe_minutes) * timerange)
     return limit
 
+def _month_index(ts_ms: int) -> int:
+    date = datetime.fromtimestamp(ts_ms // 1000, tz=timezone.utc)
+    return date.year * 12 + date.month - 1
+
+def _month_open(index: int) -> int:
+    return int(datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp()) * 1000
+
+def candle_open(timeframe: str, ts_ms: int) -> int:
+    """
+    Abertura (ms) do candle de `timeframe` que contém `ts_ms`, alinhada como na
+    Binance: semanas abrem na segunda e meses no dia 1 (UTC), os demais
+    intervalos são múltiplos da duração desde o epoch.
+    """
+    ts_ms = int(ts_ms)
+    if timeframe.endswith('M'):
+        num = int(timeframe[:-1])
+        return _month_open(_month_index(ts_ms) // num * num)
+
+    interval_ms = timeframe_to_minutes(timeframe) * 60 * 1000
+    offset = WEEK_OFFSET_MS if timeframe.endswith('w') else 0
+    return (ts_ms - offset) // interval_ms * interval_ms + offset
+
+def shift_candles(timeframe: str, open_ms: int, n: int) -> int:
+    """
+    Abertura do candle `n` posições depois do que abre em `open_ms` (antes, se `n` for negativo).
+    """
+    if timeframe.endswith('M'):
+        return _month_open(_month_index(open_ms) + n * int(timeframe[:-1]))
+    return int(open_ms) + n * timeframe_to_minutes(timeframe) * 60 * 1000
+
+def candles_between(timeframe: str, start_ms: int, end_ms: int) -> int:
+    """
+    Quantos candles há da abertura `start_ms` até a abertura `end_ms` (0 se forem o mesmo candle).
+    """
+    if timeframe.endswith('M'):
+        return (_month_index(end_ms) - _month_index(start_ms)) // int(timeframe[:-1])
+    return (int(end_ms) - int(start_ms)) // (timeframe_to_minutes(timeframe) * 60 * 1000)
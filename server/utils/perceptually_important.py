@@ -1,18 +1,39 @@
+import bisect
+import heapq
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import mplfinance as mpf
 
-def find_pips(data: np.array, n_pips: int, dist_measure: int):
-    # dist_measure
-    # 1 = Euclidean Distance
-    # 2 = Perpindicular Distance
-    # 3 = Vertical Distance
+def _segment_distances(data: np.array, lx: int, ly: float, rx: int, ry: float, dist_measure: int):
+    # Distances of every point strictly between two adjacent pips, vectorized.
+    x = np.arange(lx + 1, rx)
+    y = data[lx + 1:rx]
 
-    pips_x = [0, len(data) - 1]  # Index
-    pips_y = [data[0], data[-1]] # Price
+    if dist_measure == 1: # Euclidean distance
+        d = ((lx - x) ** 2 + (ly - y) ** 2) ** 0.5
+        d += ((rx - x) ** 2 + (ry - y) ** 2) ** 0.5
+    else:
+        slope = (ry - ly) / (rx - lx)
+        intercept = ly - lx * slope
+        d = np.abs((slope * x + intercept) - y)
+        if dist_measure == 2: # Perpindicular distance
+            d /= (slope ** 2 + 1) ** 0.5
 
-    for curr_point in range(2, n_pips):
+    return np.where(np.isnan(d), -np.inf, d)
+
+def _segment_candidate(data: np.array, lx: int, rx: int, dist_measure: int):
+    # Best (negated distance, index, left, right) heap entry for a segment, or None if it has no interior points
+    if rx - lx < 2:
+        return None
+
+    d = _segment_distances(data, lx, data[lx], rx, data[rx], dist_measure)
+    j = int(np.argmax(d))
+    return (-d[j], lx + 1 + j, lx, rx)
+
+def _find_pips_scan(data: np.array, pips_x: list, pips_y: list, start: int, n_pips: int, dist_measure: int):
+    # Original full rescan, used once no point lies strictly away from its segment
+    for curr_point in range(start, n_pips):
 
         md = 0.0 # Max distance
         md_i = -1 # Max distance index
@@ -50,3 +71,40 @@ def find_pips(data: np.array, n_pips: int, dist_measure: int):
 
     return pips_x, pips_y
 
+def find_pips(data: np.array, n_pips: int, dist_measure: int):
+    # dist_measure
+    # 1 = Euclidean Distance
+    # 2 = Perpindicular Distance
+    # 3 = Vertical Distance
+    #
+    # Each segment between adjacent pips keeps its farthest point in a heap.
+    # Inserting a pip only splits one segment, so only the two new halves are
+    # measured again. Ties go to the leftmost point, as in a left-to-right scan.
+
+    data = np.asarray(data)
+    pips_x = [0, len(data) - 1]  # Index
+    pips_y = [data[0], data[-1]] # Price
+
+    heap = []
+    candidate = _segment_candidate(data, 0, len(data) - 1, dist_measure)
+    if candidate is not None:
+        heap.append(candidate)
+
+    for curr_point in range(2, n_pips):
+        if not heap or -heap[0][0] <= 0.0:
+            # Nothing left to split: keep the original behaviour for the rest
+            return _find_pips_scan(data, pips_x, pips_y, curr_point, n_pips, dist_measure)
+
+        _, md_i, lx, rx = heapq.heappop(heap)
+
+        insert_index = bisect.bisect_left(pips_x, md_i)
+        pips_x.insert(insert_index, md_i)
+        pips_y.insert(insert_index, data[md_i])
+
+        for seg in ((lx, md_i), (md_i, rx)):
+            candidate = _segment_candidate(data, seg[0], seg[1], dist_measure)
+            if candidate is not None:
+                heapq.heappush(heap, candidate)
+
+    return pips_x, pips_y
+
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from collections import deque
+from typing import Tuple
 
 # Checks if there is a local top detected at curr index
 def rw_top(data: np.array, curr_index: int, order: int) -> bool:
@@ -32,36 +34,77 @@ def rw_bottom(data: np.array, curr_index: int, order: int) -> bool:
     
     return bottom
 
-def rw_extremes(data: np.array, order:int):
-    # Rolling window local tops and bottoms
-    tops = []
-    bottoms = []
-    for i in range(len(data)):
-        if rw_top(data, i, order):
-            # top[0] = confirmation index
-            # top[1] = index of top
-            # top[2] = price of top
-            top = [i, i - order, data[i - order]]
-            tops.append(top)
-        
-        if rw_bottom(data, i, order):
-            # bottom[0] = confirmation index
-            # bottom[1] = index of bottom
-            # bottom[2] = price of bottom
-            bottom = [i, i - order, data[i - order]]
-            bottoms.append(bottom)
-    
+def rw_confirmations(data: np.array, order: int):
+    # Rolling window tops and bottoms for every index in one pass.
+    # tops[i] == rw_top(data, i, order) and bottoms[i] == rw_bottom(data, i, order).
+    # A top confirmed at i is the max of the window data[i - 2 * order: i + 1],
+    # found with a rolling max/min (O(n)) instead of checking each neighbour.
+    data = np.asarray(data, dtype=np.float64)
+    n = len(data)
+    tops = np.zeros(n, dtype=bool)
+    bottoms = np.zeros(n, dtype=bool)
+
+    first = order * 2 + 1
+    if n <= first:
+        return tops, bottoms
+
+    width = order * 2 + 1
+    series = pd.Series(data)
+    window_max = series.rolling(width).max().values
+    window_min = series.rolling(width).min().values
+
+    center = data[first - order:n - order] # data[i - order] for i >= first
+    tops[first:] = center >= window_max[first:]
+    bottoms[first:] = center <= window_min[first:]
     return tops, bottoms
 
+def rw_extremes(data: np.array, order:int):
+    # Rolling window local tops and bottoms
+    tops_mask, bottoms_mask = rw_confirmations(data, order)
 
+    # top[0] = confirmation index
+    # top[1] = index of top
+    # top[2] = price of top
+    tops = [[i, i - order, data[i - order]] for i in np.flatnonzero(tops_mask).tolist()]
 
+    # bottom[0] = confirmation index
+    # bottom[1] = index of bottom
+    # bottom[2] = price of bottom
+    bottoms = [[i, i - order, data[i - order]] for i in np.flatnonzero(bottoms_mask).tolist()]
 
+    return tops, bottoms
 
-
-
-
-
-
-
-
-
+class RollingExtremes:
+    # Streaming rw_top / rw_bottom: feed one price per bar, O(1) amortized.
+    # update() returns (top, bottom) for the new bar, the same as
+    # rw_top(data, i, order) and rw_bottom(data, i, order) on the full series.
+    def __init__(self, order: int):
+        self.order = order
+        self.width = order * 2 + 1
+        self.index = -1
+        self._window = deque(maxlen=self.width)
+        self._max = deque() # (index, price), prices decreasing
+        self._min = deque() # (index, price), prices increasing
+
+    def update(self, price: float) -> Tuple[bool, bool]:
+        self.index += 1
+        i = self.index
+        self._window.append(price)
+
+        while self._max and self._max[-1][1] <= price:
+            self._max.pop()
+        self._max.append((i, price))
+        while self._max[0][0] <= i - self.width:
+            self._max.popleft()
+
+        while self._min and self._min[-1][1] >= price:
+            self._min.pop()
+        self._min.append((i, price))
+        while self._min[0][0] <= i - self.width:
+            self._min.popleft()
+
+        if i < self.width:
+            return False, False
+
+        center = self._window[self.order] # data[i - order]
+        return center >= self._max[0][1], center <= self._min[0][1]
@@ -1,14 +1,33 @@
+import bisect
+import threading
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+_INDEX = np.arange(0, dtype=np.float64)
+_INDEX_LOCK = threading.Lock()
+
+def index_array(n: int) -> np.array:
+    # Read-only view of a shared np.arange, grown on demand, so fits don't allocate x each call.
+    # The slice is taken from a local reference: another thread may swap _INDEX meanwhile.
+    global _INDEX
+    index = _INDEX
+    if len(index) < n:
+        with _INDEX_LOCK:
+            index = _INDEX
+            if len(index) < n:
+                index = np.arange(max(n, 2 * len(index)), dtype=np.float64)
+                index.setflags(write=False)
+                _INDEX = index
+    return index[:n]
+
 def check_trend_line(support: bool, pivot: int, slope: float, y: np.array):
     # compute sum of differences between line and prices, 
     # return negative val if invalid 
     
     # Find the intercept of the line going through pivot point with given slope
     intercept = -slope * pivot + y[pivot]
-    line_vals = slope * np.arange(len(y)) + intercept
+    line_vals = slope * index_array(len(y)) + intercept
      
     diffs = line_vals - y
     
@@ -22,8 +41,55 @@ def check_trend_line(support: bool, pivot: int, slope: float, y: np.array):
     err = (diffs ** 2.0).sum()
     return err;
 
+def line_of_best_fit(y: np.array):
+    # Least squares slope and intercept over x = 0..len(y)-1 (same line as np.polyfit(x, y, 1))
+    x = index_array(len(y))
+    x_mean = (len(y) - 1) / 2.0
+    dx = x - x_mean
+    slope = (dx * (y - y.mean())).sum() / (dx * dx).sum()
+    return slope, y.mean() - slope * x_mean
+
 def optimize_slope(support: bool, pivot:int , init_slope: float, y: np.array):
-    
+    # Best slope for a line through (pivot, y[pivot]) that stays below (support)
+    # or above (resistance) every price.
+    #
+    # The squared error is a parabola in the slope, and every price adds a
+    # linear bound on the slope, so the optimum is the unconstrained least
+    # squares slope clipped to the feasible interval. The binding bound is the
+    # convex hull tangent through the pivot.
+    if len(y) < 2:
+        return (init_slope, -init_slope * pivot + y[pivot])
+
+    dx = index_array(len(y)) - pivot
+    dy = y - y[pivot]
+
+    best_slope = (dx * dy).sum() / (dx * dx).sum()
+
+    right = dx > 0
+    left = dx < 0
+    ratio_right = dy[right] / dx[right]
+    ratio_left = dy[left] / dx[left]
+
+    # Support: line <= price, so slope <= ratio to the right and >= ratio to the left.
+    # Resistance is the mirror image.
+    if support:
+        lo = ratio_left.max() if len(ratio_left) else -np.inf
+        hi = ratio_right.min() if len(ratio_right) else np.inf
+    else:
+        lo = ratio_right.max() if len(ratio_right) else -np.inf
+        hi = ratio_left.min() if len(ratio_left) else np.inf
+
+    best_slope = min(max(best_slope, lo), hi)
+
+    # Optimize done, return best slope and intercept
+    return (best_slope, -best_slope * pivot + y[pivot])
+
+def optimize_slope_iterative(support: bool, pivot:int , init_slope: float, y: np.array):
+    # Previous numerical optimizer: walks the slope from init_slope with
+    # shrinking steps while the line stays valid (within 1e-5). It stops close
+    # to, not at, the optimize_slope result; kept for exact ties (flat lines,
+    # prices on the line), where which side it stops on decides flag vs pennant.
+
     # Amount to change slope by. Multiplyed by opt_step
     slope_unit = (y.max() - y.min()) / len(y) 
     
@@ -79,11 +145,25 @@ def optimize_slope(support: bool, pivot:int , init_slope: float, y: np.array):
     # Optimize done, return best slope and intercept
     return (best_slope, -best_slope * pivot + y[pivot])
 
+def fit_trendlines_iterative(data: np.array):
+    # fit_trendlines_single with the previous optimizer (optimize_slope_iterative)
+    x = index_array(len(data))
+    coefs = np.polyfit(x, data, 1)
+    line_points = coefs[0] * x + coefs[1]
+
+    upper_pivot = (data - line_points).argmax() 
+    lower_pivot = (data - line_points).argmin() 
+
+    support_coefs = optimize_slope_iterative(True, lower_pivot, coefs[0], data)
+    resist_coefs = optimize_slope_iterative(False, upper_pivot, coefs[0], data)
+
+    return (support_coefs, resist_coefs)
+
 def fit_trendlines_single(data: np.array):
     # find line of best fit (least squared) 
     # coefs[0] = slope,  coefs[1] = intercept 
-    x = np.arange(len(data))
-    coefs = np.polyfit(x, data, 1)
+    x = index_array(len(data))
+    coefs = line_of_best_fit(data)
 
     # Get points of line.
     line_points = coefs[0] * x + coefs[1]
@@ -99,8 +179,8 @@ def fit_trendlines_single(data: np.array):
     return (support_coefs, resist_coefs) 
 
 def fit_trendlines_high_low(high: np.array, low: np.array, close: np.array):
-    x = np.arange(len(close))
-    coefs = np.polyfit(x, close, 1)
+    x = index_array(len(close))
+    coefs = line_of_best_fit(close)
     # coefs[0] = slope,  coefs[1] = intercept
     line_points = coefs[0] * x + coefs[1]
     upper_pivot = (high - line_points).argmax() 
@@ -110,3 +190,90 @@ def fit_trendlines_high_low(high: np.array, low: np.array, close: np.array):
     resist_coefs = optimize_slope(False, upper_pivot, coefs[0], high)
 
     return (support_coefs, resist_coefs)
+
+class TrendlineWindow:
+    # Incremental fit_trendlines_single for a window that only grows to the right.
+    #
+    # Keeps running sums for the least squares line and the upper/lower convex
+    # hulls of the points (monotone chain, O(1) amortized per append). The pivot
+    # of each trendline is the hull vertex tangent to the best-fit slope, and
+    # the slope bounds from optimize_slope are the slopes of its two hull
+    # edges, so fit() costs O(log hull size) instead of O(window).
+    def __init__(self, data: np.array = ()):
+        self.n = 0
+        self.y0 = None
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+        self.upper = [] # (x, y) vertices, edge slopes decreasing
+        self.upper_neg_slopes = []
+        self.lower = [] # (x, y) vertices, edge slopes increasing
+        self.lower_slopes = []
+
+        for y in data:
+            self.append(y)
+
+    def __len__(self):
+        return self.n
+
+    @staticmethod
+    def _push(hull, slopes, point, upper: bool):
+        x2, y2 = point
+        while len(hull) >= 2:
+            (x0, y0), (x1, y1) = hull[-2], hull[-1]
+            cross = (x1 - x0) * (y2 - y0) - (y1 - y0) * (x2 - x0)
+            if (cross >= 0) if upper else (cross <= 0):
+                hull.pop()
+                slopes.pop()
+            else:
+                break
+
+        if hull:
+            x1, y1 = hull[-1]
+            slope = (y2 - y1) / (x2 - x1)
+            slopes.append(-slope if upper else slope)
+        hull.append(point)
+
+    def append(self, y: float):
+        if self.y0 is None:
+            self.y0 = float(y)
+
+        # Prices are shifted by the first one to keep the sums small
+        x = float(self.n)
+        y = float(y) - self.y0
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+
+        self._push(self.upper, self.upper_neg_slopes, (x, y), True)
+        self._push(self.lower, self.lower_slopes, (x, y), False)
+
+    def _pivot_slope(self, px: float, py: float) -> float:
+        # Least squares slope of a line forced through (px, py)
+        num = self.sxy - px * self.sy - py * self.sx + self.n * px * py
+        den = self.sxx - 2 * px * self.sx + self.n * px * px
+        return num / den
+
+    def fit(self):
+        # Same ((support_slope, support_intercept), (resist_slope, resist_intercept)) as fit_trendlines_single
+        n = self.n
+        slope = (n * self.sxy - self.sx * self.sy) / (n * self.sxx - self.sx * self.sx)
+
+        # Support: lowest point relative to the best-fit line
+        k = bisect.bisect_left(self.lower_slopes, slope)
+        px, py = self.lower[k]
+        lo = self.lower_slopes[k - 1] if k > 0 else -np.inf
+        hi = self.lower_slopes[k] if k < len(self.lower_slopes) else np.inf
+        support_slope = min(max(self._pivot_slope(px, py), lo), hi)
+        support = (support_slope, py + self.y0 - support_slope * px)
+
+        # Resistance: highest point relative to the best-fit line
+        k = bisect.bisect_left(self.upper_neg_slopes, -slope)
+        px, py = self.upper[k]
+        lo = -self.upper_neg_slopes[k] if k < len(self.upper_neg_slopes) else -np.inf
+        hi = -self.upper_neg_slopes[k - 1] if k > 0 else np.inf
+        resist_slope = min(max(self._pivot_slope(px, py), lo), hi)
+        resist = (resist_slope, py + self.y0 - resist_slope * px)
+
+        return support, resist